@@ -0,0 +1,82 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark bulk translation of lessons to chords against number of processes.
+
+A large corpus is made by repeating the bundled lessons. Each word is
+translated by a new translator, so remembered words from one run don't
+speed up the next. The chords are checked to be the same for every number
+of processes.
+
+Call from main game directory:
+    python -m benchmarks.bulktranslation [number of lines]
+"""
+
+import glob
+import multiprocessing
+import time
+
+from fly.translation import wordstochords
+from fly.utils import dictionaryregistry
+from fly.utils import files as fileutils
+
+CORPUS_LINES = 200000
+
+
+def get_corpus(number_of_lines):
+
+    """Return number_of_lines lines taken in turn from the bundled lessons."""
+
+    lines = []
+    lessons_glob = os.path.join(fileutils.get_lessons_directory(), "*.les")
+    for lesson_path in sorted(glob.glob(lessons_glob)):
+        with open(lesson_path) as f:
+            lines.extend(f.readlines())
+    repeats = number_of_lines // len(lines) + 1
+    return (lines * repeats)[:number_of_lines]
+
+
+def main():
+
+    """Translate the corpus with 1, 2, 4... processes, up to one per CPU."""
+
+    if len(sys.argv) > 1:
+        number_of_lines = int(sys.argv[1])
+    else:
+        number_of_lines = CORPUS_LINES
+    lines = get_corpus(number_of_lines)
+    words = sum(len(list(wordstochords.WordToChordTranslator.yield_word(
+                line))) for line in lines)
+    dictionary = dictionaryregistry.get_plover_dict()
+
+    process_counts = [1]
+    while process_counts[-1] * 2 <= multiprocessing.cpu_count():
+        process_counts.append(process_counts[-1] * 2)
+    if process_counts[-1] != multiprocessing.cpu_count():
+        process_counts.append(multiprocessing.cpu_count())
+
+    print("%d lines, %d words" % (len(lines), words))
+    print("%-10s %10s %12s" % ("processes", "time (s)", "words/sec"))
+    serial_chords = None
+    for processes in process_counts:
+        translator = wordstochords.WordToChordTranslator(dictionary)
+        start = time.time()
+        chords = translator.translate_many(lines, processes)
+        elapsed = time.time() - start
+        if serial_chords is None:
+            serial_chords = chords
+        elif chords != serial_chords:
+            raise AssertionError("Chords differ with %d processes" %
+                                 processes)
+        print("%-10d %10.2f %12d" % (processes, elapsed, words / elapsed))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
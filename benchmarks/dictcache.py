@@ -0,0 +1,76 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly, 
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark loading dictionaries from json against loading from the cache.
+
+Call from main game directory:
+    python -m benchmarks.dictcache
+"""
+
+import glob
+import time
+
+from fly.utils import dictionaryreader
+from fly.utils import files as fileutils
+
+REPEATS = 5
+
+
+def best_time(function, *args, **kwargs):
+
+    """Run function REPEATS times and return the fastest run in seconds.
+
+    @param function: function to time
+    @type function: function
+
+    @rtype: float
+    """
+
+    times = []
+    for i in range(REPEATS):
+        start = time.time()
+        function(*args, **kwargs)
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main():
+
+    """Time json parsing and cache loading for every bundled dict."""
+
+    dict_dir = fileutils.get_dictionaries_directory()
+    dict_paths = sorted(glob.glob(os.path.join(dict_dir, '*.json')))
+
+    print("%-25s %10s %10s %10s %8s" % ("dictionary", "size (KB)", 
+                                        "json (ms)", "cache (ms)", 
+                                        "speedup"))
+    total_json = 0.0
+    total_cache = 0.0
+    for path in dict_paths:
+        # Make sure the cache is up to date before timing it.
+        dictionaryreader.load_dict(path)
+
+        json_time = best_time(dictionaryreader.load_dict, path, 
+                              use_cache=False)
+        cache_time = best_time(dictionaryreader.load_dict, path)
+        total_json += json_time
+        total_cache += cache_time
+
+        print("%-25s %10d %10.1f %10.1f %7.1fx" % (
+              os.path.basename(path), os.path.getsize(path) / 1024, 
+              json_time * 1000, cache_time * 1000, 
+              json_time / max(cache_time, 1e-9)))
+
+    print("%-25s %10s %10.1f %10.1f %7.1fx" % (
+          "total", "", total_json * 1000, total_cache * 1000,
+          total_json / max(total_cache, 1e-9)))
+
+
+if __name__ == "__main__":
+    main()
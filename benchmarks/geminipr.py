@@ -0,0 +1,106 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark reading Gemini PR packets from a serial port.
+
+A pty stands in for the machine's serial port. Synthetic packets are written
+to it as fast as the port takes them, and read by plover's Gemini PR machine,
+which batches reads and decodes with lookup tables, and by a machine reading
+and decoding a packet at a time as plover's used to. For each, the strokes/s
+and the CPU time per stroke (of the whole process, so including writing the
+packets) are reported.
+
+Call from main game directory:
+    python -m benchmarks.geminipr [packets]
+"""
+
+import random
+import time
+
+from fly.plover.machine import geminipr
+from fly.tests.fakestenotype import open_pty
+from fly.tests.geminipr import (RecordingStenotype, decode_bit_by_bit,
+                                random_packet)
+
+PACKET_COUNT = 20000
+
+
+class PacketAtATimeStenotype(RecordingStenotype):
+
+    """Gemini PR machine reading a packet at a time, decoding bit by bit."""
+
+    def run(self):
+        while not self.finished.isSet():
+            raw = self.serial_port.read(geminipr.BYTES_PER_STROKE)
+            if not raw:
+                continue
+            raw = [ord(x) for x in raw]
+            if not ((len(raw) == geminipr.BYTES_PER_STROKE) and
+                    (raw[0] & 0x80) and
+                    (len([b for b in raw if b & 0x80]) == 1)):
+                self.serial_port.flushInput()
+                continue
+            self._notify(decode_bit_by_bit("".join(chr(b) for b in raw)))
+
+
+def get_cpu_time():
+
+    """Return the user and system time used by this process."""
+
+    user, system = os.times()[:2]
+    return user + system
+
+
+def run(machine_class, packets):
+
+    """Push packets through a pty to a machine.
+
+    @return: (strokes decoded, seconds taken, CPU seconds taken)
+    @rtype: tuple (int, float, float)
+    """
+
+    master, slave, name = open_pty()
+    machine = machine_class(len(packets), port=name, timeout=0.05)
+    data = "".join(packets)
+    start = time.time()
+    start_cpu = get_cpu_time()
+    machine.start_capture()
+    try:
+        while data:
+            written = os.write(master, data[:4096])
+            data = data[written:]
+        machine.received.wait(60)
+        elapsed = time.time() - start
+        cpu = get_cpu_time() - start_cpu
+    finally:
+        machine.stop_capture()
+        os.close(master)
+        os.close(slave)
+    return len(machine.strokes), elapsed, cpu
+
+
+def main():
+
+    """Benchmark both machines with the same packets."""
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else PACKET_COUNT
+    random_generator = random.Random(0)
+    packets = [random_packet(random_generator) for i in range(count)]
+
+    for name, machine_class in (("packet at a time", PacketAtATimeStenotype),
+                                ("batched", RecordingStenotype)):
+        strokes, elapsed, cpu = run(machine_class, packets)
+        print("%-16s %6d/%d strokes in %.3f s, %8.0f strokes/s, "
+              "%.1f us CPU/stroke" % (name, strokes, count, elapsed,
+                                      strokes / elapsed,
+                                      cpu / max(strokes, 1) * 1000000))
+
+
+if __name__ == "__main__":
+    main()
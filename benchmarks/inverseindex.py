@@ -0,0 +1,87 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark building a word to chord translator from the plover dict.
+
+Compared are building the inverse dict in memory (as the translator used
+to), building the inverse index and caching it (cold) and reading the
+cached index (warm). The index is read when first used, so the time
+includes translating one word. Each is run in a fresh interpreter so that
+memory use can be compared.
+
+Call from main game directory:
+    python -m benchmarks.inverseindex
+"""
+
+import subprocess
+import time
+
+from fly.benchmarks.stringtable import get_rss_kb
+from fly.translation import wordstochords
+from fly.utils import dictionaryregistry
+from fly.utils import files as fileutils
+from fly.utils import inverseindex
+
+WORD = "love"
+
+
+def build_inverse_dict(dictionary):
+
+    """Build the inverse dict the way the translator used to."""
+
+    inverse_dict = {}
+    for key, value in dictionary.iteritems():
+        if value in inverse_dict:
+            inverse_dict[value].add_chord(key)
+        else:
+            inverse_dict[value] = wordstochords.ChordHolder(key)
+    return inverse_dict
+
+
+def measure(mode):
+
+    """Measure one way of building a translator and print a result line."""
+
+    path = fileutils.get_plover_dict_path()
+    dictionary = dictionaryregistry.get_dict(path)
+    # Load now so it isn't counted.
+    dictionaryregistry.get_categorization_dict()
+    if mode == "cold" and os.path.exists(inverseindex.get_index_path(path)):
+        os.remove(inverseindex.get_index_path(path))
+
+    rss_before = get_rss_kb()
+    start = time.time()
+    if mode == "memory":
+        build_inverse_dict(dictionary)[WORD].get_random_chord()
+    else:
+        translator = wordstochords.WordToChordTranslator(dictionary)
+        translator.translate_word(WORD)
+    build_time = time.time() - start
+    rss_after = get_rss_kb()
+
+    print("%-8s %10.1f %10d" % (mode, build_time * 1000, 
+                                rss_after - rss_before))
+
+
+def main():
+
+    """Run each mode in its own interpreter."""
+
+    print("%-8s %10s %10s" % ("mode", "time (ms)", "mem (KB)"))
+    sys.stdout.flush()
+    for mode in ("memory", "cold", "warm"):
+        subprocess.check_call([sys.executable, "-m", "benchmarks.inverseindex",
+                               mode])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        measure(sys.argv[1])
+    else:
+        main()
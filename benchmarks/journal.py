@@ -0,0 +1,134 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark journaling strokes and translations, against logging them as text.
+
+The strokes of the bundled lessons are translated, and each stroke and
+translation is logged as plover used to (a formatted line through a rotating
+file handler) and journaled. Reports the time spent on the thread reading the
+machine, the time the journal's writer thread takes, the size of each file,
+and the time to read the strokes back from each for replay.
+
+Call from main game directory:
+    python -m benchmarks.journal
+"""
+
+import logging
+import logging.handlers
+import shutil
+import tempfile
+import time
+
+from fly.benchmarks.stenotranslator import get_stroke_stream
+from fly.plover import config as conf
+from fly.plover import journal
+from fly.plover import steno
+from fly.plover.dictionary import eclipse
+from fly.plover.machine import replay
+from fly.tests.stenotranslator import DummyMachine
+from fly.utils import dictionaryregistry
+
+
+def get_events():
+
+    """Return the strokes of the lessons, each with the translations it
+    causes, as (steno keys, translations)."""
+
+    translator = steno.Translator(DummyMachine(),
+                                  dictionaryregistry.get_plover_dict(),
+                                  eclipse)
+    translations = []
+    translator.add_callback(lambda translation, overflow:
+                            translations.append(translation))
+    events = []
+    for stroke in get_stroke_stream():
+        del translations[:]
+        translator.consume_stroke(stroke)
+        steno_keys = [key for key in steno.STENO_KEYS
+                      if stroke.key_mask & steno.STENO_KEY_BITS[key]]
+        events.append((steno_keys, list(translations)))
+    return events
+
+
+def log_text(events, path):
+
+    """Log events as plover used to. Return the seconds taken."""
+
+    logger = logging.getLogger("benchmarks.journal")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=conf.LOG_MAX_BYTES, backupCount=conf.LOG_COUNT)
+    handler.setFormatter(logging.Formatter(conf.LOG_FORMAT))
+    logger.addHandler(handler)
+    start = time.time()
+    for steno_keys, translations in events:
+        logger.info('Stroke(%s)' % ' '.join(steno_keys))
+        for translation in translations:
+            logger.info(translation)
+    elapsed = time.time() - start
+    logger.removeHandler(handler)
+    handler.close()
+    return elapsed
+
+
+def log_journal(events, path):
+
+    """Journal events. Return the seconds taken queueing them, and the
+    seconds taken writing the queue when the journal is closed."""
+
+    writer = journal.JournalWriter(path, flush_interval=3600)
+    start = time.time()
+    for steno_keys, translations in events:
+        writer.on_steno_keys(steno_keys)
+        for translation in translations:
+            writer.on_translation(translation, None)
+    queued = time.time()
+    writer.close()
+    return queued - start, time.time() - queued
+
+
+def time_read(path):
+
+    """Return the seconds taken to read the strokes in a log or journal."""
+
+    start = time.time()
+    replay.read_stroke_log(path)
+    return time.time() - start
+
+
+def main():
+
+    """Log and journal the lessons, then read them back."""
+
+    events = get_events()
+    count = len(events)
+    directory = tempfile.mkdtemp()
+    try:
+        text_path = os.path.join(directory, "plover.log")
+        journal_path = os.path.join(directory, "plover.journal")
+        text_seconds = log_text(events, text_path)
+        queue_seconds, write_seconds = log_journal(events, journal_path)
+        print("%d strokes, %d translations" %
+              (count, sum(len(t) for s, t in events)))
+        print("%-8s %12s %12s %10s %10s" % ("", "us/stroke", "writer us",
+                                            "bytes", "read ms"))
+        print("%-8s %12.2f %12s %10d %10.1f" % (
+            "text", text_seconds / count * 1000000, "-",
+            os.path.getsize(text_path), time_read(text_path) * 1000))
+        print("%-8s %12.2f %12.2f %10d %10.1f" % (
+            "journal", queue_seconds / count * 1000000,
+            write_seconds / count * 1000000, os.path.getsize(journal_path),
+            time_read(journal_path) * 1000))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
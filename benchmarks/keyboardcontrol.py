@@ -0,0 +1,86 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark reading the key events of chords recorded from X.
+
+The keyboard "machine" (Sidewinder) gets each key of a chord as an X event.
+Replies holding chords of 12 keys pressed then released are read by plover's
+KeyboardCapture, and by the same capture parsing each event into an object
+and looking up its keysym, as plover's used to. No X server is needed: the
+display is faked.
+
+Call from main game directory:
+    python -m benchmarks.keyboardcontrol
+"""
+
+import timeit
+
+from Xlib import X
+from Xlib.protocol import event, rq
+
+from fly.plover import keyboardcontrol
+from fly.tests.keyboardcontrol import FakeReply, RecordingCapture, key_event
+
+CHORD_COUNT = 2000
+KEYS_PER_CHORD = 12
+
+
+class ParsingCapture(RecordingCapture):
+
+    """Parses every event and looks up its keysym, as plover's did."""
+
+    def process_events(self, reply):
+        data = reply.data
+        while len(data):
+            e, data = rq.EventField(None).parse_binary_value(
+                data, self.record_display.display, None, None)
+            keycode = e.detail
+            modifiers = e.state
+            keysym = self.local_display.keycode_to_keysym(keycode, modifiers)
+            key_event = keyboardcontrol.XKeyEvent(keycode, modifiers, keysym)
+            if e.type == X.KeyPress:
+                self.key_down(key_event)
+            elif e.type == X.KeyRelease:
+                self.key_up(key_event)
+
+
+def get_chords():
+
+    """Return a reply for each chord: its keys pressed, then released."""
+
+    keycodes = range(24, 24 + KEYS_PER_CHORD)
+    chord = FakeReply([key_event(event.KeyPress, keycode)
+                       for keycode in keycodes] +
+                      [key_event(event.KeyRelease, keycode)
+                       for keycode in keycodes])
+    return [chord] * CHORD_COUNT
+
+
+def main():
+
+    """Time both captures reading the same chords."""
+
+    chords = get_chords()
+    for name, capture_class in (("parsing", ParsingCapture),
+                                ("cached", RecordingCapture)):
+        capture = capture_class()
+
+        def read_chords():
+            for chord in chords:
+                capture.process_events(chord)
+            del capture.events[:]
+
+        seconds = min(timeit.repeat(read_chords, number=1, repeat=5))
+        print("%-8s %d chords of %d keys in %.3f s, %.1f us/chord" %
+              (name, CHORD_COUNT, KEYS_PER_CHORD, seconds,
+               seconds / CHORD_COUNT * 1000000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark generating the chords file of lessons of increasing size.
+
+Compared are building every line of chords in memory before writing (as
+lessons used to be generated), streaming chords to the file in one process,
+and streaming them translated in bulk with a process per CPU (as
+data.generation.lessonchords does). Lessons are made by repeating the bundled lessons. Each is run in a fresh interpreter
+so that peak memory use can be compared.
+
+Call from main game directory:
+    python -m benchmarks.lessonchords
+"""
+
+import multiprocessing
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+from fly.benchmarks.bulktranslation import get_corpus
+from fly.lessons.helpers import tochords
+from fly.utils import dictionaryregistry
+
+LESSON_LINES = (10000, 100000, 400000)
+
+
+def measure(mode, lesson_path):
+
+    """Generate chords for lesson_path one way and print a result line."""
+
+    if mode == "bulk":
+        chord_helper = tochords.LessonToChords(
+                processes=multiprocessing.cpu_count())
+    else:
+        chord_helper = tochords.LessonToChords(processes=1)
+    # Load now so it isn't counted.
+    chord_helper.translator.translate_word("love")
+    peak_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    chords_path = lesson_path + chord_helper.CHORDS_FILE_EXTENSION
+    start = time.time()
+    if mode == "list":
+        chord_lines = chord_helper.translator.translate_from_file(lesson_path)
+        with open(chords_path, 'w') as f:
+            f.write('\n'.join(chord_lines))
+    else:
+        chord_helper.generate_chords(lesson_path, chords_path)
+    generate_time = time.time() - start
+    peak_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print("%-8s %10d %10.2f %14d" % (mode, os.path.getsize(lesson_path) / 1024,
+                                     generate_time, peak_after - peak_before))
+
+
+def main():
+
+    """Run each mode for each size of lesson in its own interpreter."""
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print("%-8s %10s %10s %14s" % ("mode", "size (KB)", "time (s)",
+                                       "peak mem (KB)"))
+        sys.stdout.flush()
+        for lesson_lines in LESSON_LINES:
+            lesson_path = os.path.join(temp_dir, "%s.les" % lesson_lines)
+            with open(lesson_path, 'w') as f:
+                f.writelines(get_corpus(lesson_lines))
+            for mode in ("list", "stream", "bulk"):
+                subprocess.check_call([sys.executable, "-m",
+                                       "benchmarks.lessonchords", mode,
+                                       lesson_path])
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        measure(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,74 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark plover's formatter typing recorded stroke streams.
+
+The strokes of the bundled lessons' chords files are translated and the
+translations formatted, as when a user writes the lessons. Compared are
+rendering the whole translation buffer for every translation (as the
+formatter used to) and rendering only what changed, with the translator's
+usual buffer and with a larger one. The use of the formatter's cache of
+atoms of dictionary entries is shown.
+
+Call from main game directory:
+    python -m benchmarks.ploverformatter
+"""
+
+import time
+
+from fly.benchmarks.stenotranslator import get_stroke_stream
+from fly.plover import formatting
+from fly.plover import steno
+from fly.plover.dictionary import eclipse
+from fly.tests.ploverformatter import BruteForceFormatter, RecordingOutput
+from fly.tests.stenotranslator import DummyMachine
+from fly.utils import dictionaryregistry
+from fly.utils import files as fileutils
+
+
+def replay(formatter_class, dictionary, strokes, max_number_of_strokes):
+
+    """Return mean time to translate and format a stroke, in ms, and the
+    formatter."""
+
+    translator = steno.Translator(DummyMachine(), dictionary, eclipse,
+                                  max_number_of_strokes,
+                                  dictionaryregistry.get_metadata(dictionary))
+    formatter = formatter_class(translator, RecordingOutput())
+    start = time.time()
+    for stroke in strokes:
+        translator.consume_stroke(stroke)
+    return (time.time() - start) / len(strokes) * 1000, formatter
+
+
+def main():
+
+    """Replay the strokes through each formatter and buffer size."""
+
+    strokes = get_stroke_stream()
+    dictionary = dictionaryregistry.get_dict(fileutils.get_plover_dict_path())
+
+    print("%d strokes" % len(strokes))
+    print("%-12s %-8s %10s" % ("formatter", "buffer", "mean (ms)"))
+    for max_number_of_strokes in (None, 50):
+        for name, formatter_class in (("brute force", BruteForceFormatter),
+                                      ("incremental", formatting.Formatter)):
+            mean, formatter = replay(formatter_class, dictionary, strokes,
+                          max_number_of_strokes)
+            print("%-12s %-8s %10.3f" % (name, max_number_of_strokes or
+                                         "default", mean))
+            sys.stdout.flush()
+
+    stats = formatter.atom_cache.get_stats()
+    print("atom cache: %(hits)d hits, %(misses)d misses, %(size)d entries" %
+          stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark plover's Gemini PR and TX Bolt machines against fake machines.
+
+Each fake machine (see tests/fakestenotype.py) writes random strokes to a
+pty, which plover's machine opens from serial params read from a config. For
+each machine and each way of writing the strokes, reports the strokes/s
+decoded, the strokes lost and the CPU time per stroke (of the whole process,
+so including the fake machine writing).
+
+    flood     - as fast as the port takes them
+    steady    - at a typing rate well above a fast writer's
+    bursty    - in bursts, as after a pause
+    malformed - with malformed data before a fifth of them
+
+Call from main game directory:
+    python -m benchmarks.serialmachines [strokes]
+"""
+
+import random
+import time
+
+from fly.plover.machine import geminipr
+from fly.plover.machine import txbolt
+from fly.tests.fakestenotype import (GEMINI_PR, TX_BOLT, FakeStenotype,
+                                     StrokeRecorder, count_lost,
+                                     get_random_strokes)
+
+STROKE_COUNT = 5000
+
+MACHINES = ((GEMINI_PR, geminipr.Stenotype),
+            (TX_BOLT, txbolt.Stenotype))
+
+# Name, and arguments of FakeStenotype.write_strokes.
+SCENARIOS = (("flood", {}),
+             ("steady", {"strokes_per_second": 1000}),
+             ("bursty", {"strokes_per_second": 1000, "burst_size": 100}),
+             ("malformed", {"malformed_rate": 0.2}))
+
+
+def get_cpu_time():
+
+    """Return the user and system time used by this process."""
+
+    user, system = os.times()[:2]
+    return user + system
+
+
+def run(protocol, machine_class, strokes, write_args):
+
+    """Write strokes from a fake machine to a plover machine.
+
+    @return: (strokes received, strokes lost, seconds taken, CPU seconds
+             taken)
+    @rtype: tuple (int, int, float, float)
+    """
+
+    machine = FakeStenotype(protocol)
+    stenotype = machine_class(**machine.get_serial_params())
+    recorder = StrokeRecorder()
+    stenotype.add_callback(recorder)
+    start = time.time()
+    start_cpu = get_cpu_time()
+    stenotype.start_capture()
+    try:
+        machine.write_strokes(strokes, random_generator=random.Random(1),
+                              **write_args)
+        recorder.wait_for(len(strokes), 1)
+        elapsed = recorder.timestamps[-1] - start
+        cpu = get_cpu_time() - start_cpu
+    finally:
+        stenotype.stop_capture()
+        machine.close()
+    return (len(recorder.strokes), count_lost(strokes, recorder.strokes),
+            elapsed, cpu)
+
+
+def main():
+
+    """Run every scenario on both machines."""
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else STROKE_COUNT
+    strokes = get_random_strokes(random.Random(0), count)
+    print("%-10s %-10s %9s %9s %6s %10s" % ("machine", "scenario",
+                                            "received", "strokes/s", "lost",
+                                            "us CPU"))
+    for protocol, machine_class in MACHINES:
+        for name, write_args in SCENARIOS:
+            received, lost, elapsed, cpu = run(protocol, machine_class,
+                                               strokes, write_args)
+            print("%-10s %-10s %9d %9.0f %6d %10.1f" % (
+                protocol, name, received, received / elapsed, lost,
+                cpu / max(received, 1) * 1000000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark the CPU serial machines use while idle, and how long TX Bolt takes
+to notice a stroke has ended.
+
+A pty stands in for the machine's serial port. First each machine is left
+idle, with nothing written to it, and the CPU time it uses is reported,
+including a TX Bolt machine polling the port as plover's used to. Then TX
+Bolt strokes that can only be ended by the idle timeout are written one at a
+time, and the time from writing each to it being ended is reported for
+several timeouts.
+
+Call from main game directory:
+    python -m benchmarks.serialreader
+"""
+
+import time
+
+from fly.plover.machine import geminipr
+from fly.plover.machine import txbolt
+from fly.tests.fakestenotype import open_pty
+from fly.tests.txbolt import RecordingStenotype, encode
+from fly.utils import latency
+
+IDLE_SECONDS = 2.0
+STROKE_COUNT = 50
+STROKE_END_TIMEOUTS = (0.01, 0.03, 0.1)
+
+
+class PollingStenotype(txbolt.Stenotype):
+
+    """TX Bolt machine polling the port without blocking, as plover's did."""
+
+    def run(self):
+        while not self.finished.isSet():
+            raw = self.serial_port.read(self.serial_port.inWaiting())
+            if raw:
+                self._on_data(raw)
+            else:
+                self._on_idle()
+
+
+def get_cpu_time():
+
+    """Return the user and system time used by this process."""
+
+    user, system = os.times()[:2]
+    return user + system
+
+
+def measure_idle(machine_class):
+
+    """Return the CPU seconds used per second by an idle machine."""
+
+    master, slave, name = open_pty()
+    machine = machine_class(port=name, timeout=0.05)
+    machine.start_capture()
+    try:
+        start_cpu = get_cpu_time()
+        time.sleep(IDLE_SECONDS)
+        cpu = get_cpu_time() - start_cpu
+    finally:
+        machine.stop_capture()
+        os.close(master)
+        os.close(slave)
+    return cpu / IDLE_SECONDS
+
+
+def measure_stroke_end(idle_timeout):
+
+    """Return the percentiles of the time TX Bolt takes to end strokes."""
+
+    master, slave, name = open_pty()
+    machine = RecordingStenotype(port=name, idle_timeout=idle_timeout)
+    recorder = latency.LatencyRecorder()
+    machine.start_capture()
+    try:
+        for i in range(STROKE_COUNT):
+            machine.received.clear()
+            written = time.time()
+            os.write(master, encode(["S-", "T-", "A-", "-P"]))
+            machine.received.wait(1)
+            recorder.add(latency.TRANSLATE_STAGE,
+                         machine.strokes[-1][0] - written)
+    finally:
+        machine.stop_capture()
+        os.close(master)
+        os.close(slave)
+    return recorder.get_percentiles(latency.TRANSLATE_STAGE)
+
+
+def main():
+
+    """Report idle CPU of each machine, then TX Bolt stroke end latency."""
+
+    for name, machine_class in (("txbolt polling", PollingStenotype),
+                                ("txbolt", txbolt.Stenotype),
+                                ("geminipr", geminipr.Stenotype)):
+        print("%-16s idle CPU %5.1f%%" % (name,
+                                          measure_idle(machine_class) * 100))
+
+    print("stroke end timeout  %s" % " ".join(
+        "%7s" % ("p%d" % percentile)
+        for percentile in latency.PERCENTILES))
+    for idle_timeout in STROKE_END_TIMEOUTS:
+        print("%14.0f ms  %s" % (idle_timeout * 1000, " ".join(
+            "%7.1f" % (seconds * 1000)
+            for seconds in measure_stroke_end(idle_timeout))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark making plover strokes from the keys a machine sends.
+
+The keys of the strokes in the bundled lessons' chords files are made into
+strokes, as the machine callback does for every chord written. Compared is
+formatting the keys of every stroke (as strokes used to).
+
+Call from main game directory:
+    python -m benchmarks.stenostroke
+"""
+
+import time
+
+from fly.benchmarks.stenotranslator import get_stroke_stream
+from fly.plover import steno
+from fly.plover.dictionary import eclipse
+
+
+def format_keys(steno_keys, dictionary_format):
+
+    """Order and format keys without any caching, as strokes used to."""
+
+    steno_keys = list(set(steno_keys))
+    steno_keys.sort(key=lambda x: steno.STENO_KEY_ORDER[x])
+    if '#' in steno_keys:
+        numeral = False
+        for i, e in enumerate(steno_keys):
+            if e in steno.STENO_KEY_NUMBERS:
+                steno_keys[i] = steno.STENO_KEY_NUMBERS[e]
+                numeral = True
+        if numeral:
+            steno_keys.remove('#')
+    return steno_keys, dictionary_format.toRTFCRE(steno_keys)
+
+
+def time_strokes(make_stroke, keys_list, repeats=5):
+
+    """Return the best time to make every stroke, in us per stroke."""
+
+    best = None
+    for repeat in range(repeats):
+        start = time.time()
+        for keys in keys_list:
+            make_stroke(keys, eclipse)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / len(keys_list) * 1000000
+
+
+def main():
+
+    """Make strokes with and without the bitmask and formatting cache."""
+
+    # Unordered, as a machine sends them.
+    keys_list = [list(reversed(stroke.steno_keys))
+                 for stroke in get_stroke_stream()]
+
+    print("%d strokes" % len(keys_list))
+    print("%-10s %10s" % ("stroke", "us/stroke"))
+    for name, make_stroke in (("formatted", format_keys),
+                              ("bitmask", steno.Stroke)):
+        print("%-10s %10.2f" % (name, time_strokes(make_stroke, keys_list)))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
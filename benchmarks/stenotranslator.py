@@ -0,0 +1,115 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark plover's translator replaying recorded stroke streams.
+
+The chords files of the bundled lessons are what a user writing the
+lessons strokes, so their strokes are replayed through the translator.
+Compared are translating the whole stroke buffer after every stroke (as the
+translator used to) and translating incrementally, with both the string
+table and the parsed plover dict.
+
+Call from main game directory:
+    python -m benchmarks.stenotranslator
+"""
+
+import glob
+import time
+
+from fly.plover import steno
+from fly.plover.dictionary import eclipse
+from fly.tests.stenotranslator import BruteForceTranslator, DummyMachine
+from fly.utils import dictionaryregistry
+from fly.utils import files as fileutils
+
+LEFT_KEYS = "STKPWHR"
+VOWEL_KEYS = {"A": "A-", "O": "O-", "*": "*", "E": "-E", "U": "-U"}
+RIGHT_KEYS = "FRPBLGTSDZ"
+
+
+def get_steno_keys(rtfcre):
+
+    """Return the steno keys of a stroke, or None if it can't be worked
+    out (such as for numbers)."""
+
+    keys = []
+    left = True
+    for letter in rtfcre:
+        if letter == "-":
+            left = False
+        elif letter in VOWEL_KEYS:
+            keys.append(VOWEL_KEYS[letter])
+            left = False
+        elif left and letter in LEFT_KEYS:
+            keys.append(letter + "-")
+        elif not left and letter in RIGHT_KEYS:
+            keys.append("-" + letter)
+        else:
+            return None
+    if not keys or steno.Stroke(keys, eclipse).rtfcre != rtfcre:
+        return None
+    return keys
+
+
+def get_stroke_stream():
+
+    """Return the strokes of every bundled lesson's chords, in order."""
+
+    strokes = []
+    chords_glob = os.path.join(fileutils.get_lessons_directory(), "*.chd")
+    for chords_path in sorted(glob.glob(chords_glob)):
+        with open(chords_path) as f:
+            for chord in f.read().split():
+                for rtfcre in chord.split(eclipse.STROKE_DELIMITER):
+                    keys = get_steno_keys(rtfcre)
+                    if keys is not None:
+                        strokes.append(steno.Stroke(keys, eclipse))
+    return strokes
+
+
+def replay(translator_class, dictionary, strokes):
+
+    """Return mean and worst time to consume a stroke, in ms."""
+
+    translator = translator_class(DummyMachine(), dictionary, eclipse,
+                                  getattr(dictionary, 'max_strokes', None))
+    worst = 0.0
+    start = time.time()
+    for stroke in strokes:
+        stroke_start = time.time()
+        translator.consume_stroke(stroke)
+        worst = max(worst, time.time() - stroke_start)
+    mean = (time.time() - start) / len(strokes)
+    return mean * 1000, worst * 1000
+
+
+def main():
+
+    """Replay the strokes through each translator and dictionary."""
+
+    strokes = get_stroke_stream()
+    dictionaries = (("table", dictionaryregistry.get_table(
+                                  fileutils.get_plover_dict_path())),
+                    ("dict", dictionaryregistry.get_dict(
+                                 fileutils.get_plover_dict_path())))
+
+    print("%d strokes" % len(strokes))
+    print("%-12s %-6s %10s %10s" % ("translator", "dict", "mean (ms)",
+                                    "worst (ms)"))
+    for name, translator_class in (("brute force", BruteForceTranslator),
+                                   ("incremental", steno.Translator)):
+        for dictionary_name, dictionary in dictionaries:
+            mean, worst = replay(translator_class, dictionary, strokes)
+            print("%-12s %-6s %10.3f %10.3f" % (name, dictionary_name, mean,
+                                                worst))
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark the plover dict held as a python dict against the string table.
+
+Each backend is measured in a fresh interpreter so that memory use can be
+compared. Reported are the time to open the dictionary, the memory it adds,
+and the time per chord lookup. English to chords lookups are benchmarked by
+benchmarks.inverseindex.
+
+Call from main game directory:
+    python -m benchmarks.stringtable
+"""
+
+import random
+import subprocess
+import time
+
+from fly.utils import dictionaryreader
+from fly.utils import files as fileutils
+from fly.utils import stringtable
+
+LOOKUPS = 20000
+SEED = 1
+
+
+def get_rss_kb():
+
+    """Return resident memory of this process in KB."""
+
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    # Peak rather than current, but fine for a fresh process.
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def open_dict(path):
+    return dictionaryreader.load_dict(path)
+
+
+def open_table(path):
+    return stringtable.load_table(path)
+
+
+def measure(backend):
+
+    """Measure one backend in this process and print a result line."""
+
+    path = fileutils.get_plover_dict_path()
+    # Chords to look up, drawn without the backend under test.
+    chords = dictionaryreader.load_dict(path, use_cache=False).keys()
+    random.Random(SEED).shuffle(chords)
+    chords = chords[:LOOKUPS]
+
+    rss_before = get_rss_kb()
+    start = time.time()
+    dictionary = {"dict": open_dict, "table": open_table}[backend](path)
+    open_time = time.time() - start
+    rss_after = get_rss_kb()
+
+    start = time.time()
+    for chord in chords:
+        dictionary.get(chord)
+    lookup_time = time.time() - start
+
+    print("%-8s %10.1f %10d %12.2f" % (
+          backend, open_time * 1000, rss_after - rss_before,
+          lookup_time / len(chords) * 1e6))
+
+
+def main():
+
+    """Run each backend in its own interpreter."""
+
+    path = fileutils.get_plover_dict_path()
+    # Build the cache and table first, so neither is timed being written.
+    dictionaryreader.load_dict(path)
+    stringtable.load_table(path).close()
+
+    print("%-8s %10s %10s %12s" % ("backend", "open (ms)", "mem (KB)",
+                                   "lookup (us)"))
+    sys.stdout.flush()
+    for backend in ("dict", "table"):
+        subprocess.check_call([sys.executable, "-m", "benchmarks.stringtable",
+                               backend])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        measure(sys.argv[1])
+    else:
+        main()
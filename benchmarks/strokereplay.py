@@ -0,0 +1,99 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark the steno pipeline fed by the stroke replay machine.
+
+Strokes are replayed from a machine thread through plover's translator and
+formatter into Fly's stroke queue, as when Fly runs. By default the strokes
+of the bundled lessons are replayed as fast as possible, to measure
+throughput. A stroke log written by plover can be given instead, with a
+replay speed (1 for as logged, 0 for as fast as possible), to reproduce a
+user's session.
+
+Call from main game directory:
+    python -m benchmarks.strokereplay [stroke log [speed]]
+"""
+
+import shutil
+import tempfile
+import time
+
+from fly.benchmarks.stenotranslator import get_stroke_stream
+from fly.plover import formatting
+from fly.plover import steno
+from fly.plover.dictionary import eclipse
+from fly.tests.ploverformatter import RecordingOutput
+from fly.translation import strokequeue
+from fly.utils import dictionaryregistry
+from fly.utils import files as fileutils
+
+# Replay machine as plover's config loads it, so it is a machine to plover.
+from plover.machine import replay
+
+
+def write_lesson_log(log_file):
+
+    """Write the strokes of the bundled lessons as a stroke log."""
+
+    replay.write_stroke_log(log_file, [(None, list(stroke.steno_keys))
+                                       for stroke in get_stroke_stream()])
+
+
+def run(log_file, speed):
+
+    """Replay a stroke log through the pipeline.
+
+    @return: (strokes replayed, seconds taken, translations queued)
+    @rtype: tuple (int, float, int)
+    """
+
+    dictionary = dictionaryregistry.get_plover_dict()
+    machine = replay.Stenotype(log_file, speed)
+    translator = steno.Translator(machine, dictionary, eclipse,
+                                  metadata=dictionaryregistry.get_metadata(
+                                      dictionary))
+    formatting.Formatter(translator, RecordingOutput())
+    queue = strokequeue.StrokeQueue(len(machine.strokes) * 4 + 1)
+    translator.add_callback(queue.push)
+
+    start = time.time()
+    machine.start_capture()
+    machine.join()
+    elapsed = time.time() - start
+    return machine.replayed_count, elapsed, len(queue.drain())
+
+
+def main():
+
+    """Replay the lesson strokes, or the log given, and report throughput."""
+
+    directory = None
+    if len(sys.argv) > 1:
+        log_file = sys.argv[1]
+        speed = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    else:
+        directory = tempfile.mkdtemp()
+        log_file = os.path.join(directory, "lessons.log")
+        write_lesson_log(log_file)
+        speed = replay.AS_FAST_AS_POSSIBLE
+
+    try:
+        strokes, elapsed, translations = run(log_file, speed)
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory)
+
+    print("%d strokes replayed in %.3f s, %d translations queued" %
+          (strokes, elapsed, translations))
+    print("%.0f strokes/s, %.3f ms/stroke" % (strokes / elapsed,
+                                              elapsed / strokes * 1000))
+
+
+if __name__ == "__main__":
+    main()
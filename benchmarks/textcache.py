@@ -0,0 +1,104 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark drawing a screen whose text doesn't change.
+
+A screen like Fly's (a keyboard of labelled keys, captions, option buttons
+and an info panel) is drawn repeatedly. Clearing the text cache before each
+frame loads the fonts and renders all the text every frame, as the elements
+used to; otherwise the fonts and text come from the cache. Reports the time
+per frame of each, and the counts of the cache.
+
+Call from main game directory:
+    python -m benchmarks.textcache
+"""
+
+# Draw without opening a window.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+
+import pygame
+
+from fly.gui import constants
+from fly.gui import genericelements
+from fly.gui import textcache
+
+FRAMES = 200
+
+QWERTY_ROWS = ("qwertyuiop", "asdfghjkl;")
+STENO_ROWS = (("S-", "T-", "P-", "H-", "*", "*", "-F", "-P", "-L", "-T"),
+              ("S-", "K-", "W-", "R-", "*", "*", "-R", "-B", "-G", "-S"))
+
+
+def get_elements():
+
+    """Return the elements of a screen."""
+
+    elements = []
+    width = constants.KEY_WIDTH
+    for row, (qwerty_row, steno_row) in enumerate(zip(QWERTY_ROWS,
+                                                      STENO_ROWS)):
+        for column, (caption, steno_caption) in enumerate(zip(qwerty_row,
+                                                              steno_row)):
+            elements.append(genericelements.KeyboardKey(
+                (column * (width + 5), 300 + row * (width + 5)),
+                (width, width), caption, steno_caption))
+    elements.append(genericelements.Caption((10, 10), 40, (600, 40),
+                                            "Type the word\nshown below"))
+    elements.append(genericelements.Caption((10, 100), 60, (600, 60),
+                                            "steno"))
+    for i, caption in enumerate(("Lessons", "Words", "Chords", "Options",
+                                 "Quit")):
+        elements.append(genericelements.Button((800, 10 + i * 40), (150, 30),
+                                               caption))
+    elements.append(genericelements.DisplayPanel((0, 500), (800, 100),
+                                                 "Words per minute: 42"))
+    return elements
+
+
+def time_frames(elements, screen, cached):
+
+    """Return the seconds taken to draw each frame, on average."""
+
+    start = time.time()
+    for i in range(FRAMES):
+        if not cached:
+            textcache.clear()
+        for element in elements:
+            element.blit_on(screen)
+    return (time.time() - start) / FRAMES
+
+
+def main():
+
+    """Draw the screen with and without the text cache."""
+
+    pygame.font.init()
+    screen = pygame.Surface((constants.SCREEN_WIDTH, constants.SCREEN_HEIGHT))
+    elements = get_elements()
+    uncached = time_frames(elements, screen, False)
+    textcache.clear()
+    stats = textcache.get_stats()
+    cached = time_frames(elements, screen, True)
+    print("%d elements, %d frames" % (len(elements), FRAMES))
+    print("%-10s %10s" % ("", "ms/frame"))
+    print("%-10s %10.3f" % ("uncached", uncached * 1000))
+    print("%-10s %10.3f" % ("cached", cached * 1000))
+    new_stats = textcache.get_stats()
+    print("cached frames: %d fonts loaded, %d texts rendered, %d cache hits, "
+          "%d evictions" % (
+              new_stats["font_misses"] - stats["font_misses"],
+              new_stats["text_misses"] - stats["text_misses"],
+              new_stats["text_hits"] - stats["text_hits"],
+              new_stats["text_evictions"] - stats["text_evictions"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Benchmark splitting the bundled lessons into words and punctuation.
+
+Compared are splitting a word at a time with re.split (as the translator
+used to) and the compiled single pass tokenizer.
+
+Call from main game directory:
+    python -m benchmarks.tokenizer
+"""
+
+import glob
+import re
+import time
+
+from fly.translation import tokenizer
+from fly.utils import files as fileutils
+
+REPEATS = 20
+
+
+def yield_word_by_split(line):
+
+    """Split line the way the translator used to."""
+
+    for word in line.split(" "):
+        if word.find("<") != -1 or word.find(">") != -1:
+            continue
+        word = word.strip()
+        words_or_punctuation = re.split("([-.,?;!:\"])", word)
+        words_or_punctuation = [w for w in words_or_punctuation if w != '']
+        for i, word_or_punctuation in enumerate(words_or_punctuation):
+            if word_or_punctuation == "\"":
+                if i == 0:
+                    yield r'{"^}'
+                else:
+                    yield r'{^"}'
+            elif not re.search('\w+', word_or_punctuation):
+                yield "{%s}" % word_or_punctuation
+            else:
+                yield word_or_punctuation
+
+
+def yield_word_by_tokenizer(line):
+
+    """Split line with the tokenizer."""
+
+    get_dictionary_form = tokenizer.get_dictionary_form
+    for token, kind in tokenizer.tokenize_line(line):
+        yield get_dictionary_form(token, kind)
+
+
+def main():
+
+    """Time each way of splitting over all lessons."""
+
+    lines = []
+    lessons_glob = os.path.join(fileutils.get_lessons_directory(), "*.les")
+    for lesson_path in sorted(glob.glob(lessons_glob)):
+        with open(lesson_path) as f:
+            lines.extend(f.readlines())
+
+    print("%-10s %10s %12s" % ("method", "time (s)", "tokens/sec"))
+    for name, yield_word in (("re.split", yield_word_by_split),
+                             ("tokenizer", yield_word_by_tokenizer)):
+        start = time.time()
+        for i in xrange(REPEATS):
+            tokens = 0
+            for line in lines:
+                for word in yield_word(line):
+                    tokens += 1
+        elapsed = time.time() - start
+        print("%-10s %10.2f %12d" % (name, elapsed,
+                                     tokens * REPEATS / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -66,9 +66,30 @@ BASE_WORD_NUMBER = 5
 # Number of words that must be correct before new word added
 WORDS_BEFORE_WORD_ADDED = 5
 
+"""Dictionary storage"""
+# How the plover dictionary is held while Fly runs:
+# "table" - memory map a sorted table built beside dict.json (dict.json.sst).
+#           Starts faster and uses far less memory. The table is rebuilt
+#           automatically whenever dict.json changes.
+# "dict"  - parse dict.json into memory.
+DICTIONARY_BACKEND = "table"
+
 """For lessons only"""
 # Force translation of lesson files to chords when Fly starts, even if 
 # translation files already exist (useful only if code has changed)
 FORCE_LESSON_REGENERATION = False
 
+# Number of processes lesson files are translated to chords with while Fly
+# runs. Leave at 1: forking the game while its threads and pygame are running
+# isn't safe. To translate large lessons, such as whole novels, across every
+# CPU, generate their chords beforehand with
+# "python -m data.generation.lessonchords".
+LESSON_TRANSLATION_PROCESSES = 1
+
+"""Performance"""
+# Time each chord from the steno machine to the screen. Latencies are shown
+# in the top left corner, and written to latency.txt in the main directory
+# when Fly exits.
+RECORD_LATENCY = False
+
 
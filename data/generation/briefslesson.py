@@ -20,7 +20,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 import fly.utils.files as fileutils
-import fly.utils.dictionaryreader as dictionaryreader
+import fly.utils.dictionaryregistry as dictionaryregistry
 from fly.translation import wordstochords
 
 
@@ -31,8 +31,6 @@ class BriefsLessonCreator(object):
     into a lesson file.
     """
 
-    word_cat_dict_filename = fileutils.get_categorization_dict_path()
-
     def __init__(self, dictionary):
 
         """
@@ -48,7 +46,7 @@ class BriefsLessonCreator(object):
 
         chord_list = []
 
-        word_cat_dict = dictionaryreader.load_dict(self.word_cat_dict_filename)
+        word_cat_dict = dictionaryregistry.get_categorization_dict()
 
         for word, category in word_cat_dict.iteritems():
             if category == wordstochords.BRIEF:
@@ -77,8 +75,7 @@ if __name__ == "__main__":
     # for canon chords preferentially, but on this occasion we want briefs.
     output_file_chd = os.path.join(lessons_dir, "briefs.chd")
 
-    dict_filepath = fileutils.get_plover_dict_path()
-    dictionary = dictionaryreader.load_dict(dict_filepath)
+    dictionary = dictionaryregistry.get_plover_dict()
 
     # Generate lessons/briefs.chd
     logger.info("Generating files: %s, %s..." % (output_file_les, 
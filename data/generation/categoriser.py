@@ -14,13 +14,14 @@ Call from the fly directory with the following command:
 import os
 import sys
 import json
+import multiprocessing
 
 # Hack so that all modules can be imported from Fly, 
 # but this can be called as a script
 sys.path.append(os.path.dirname(os.getcwd()))
 
 from fly.utils import files as fileutils
-from fly.utils import dictionaryreader
+from fly.utils import dictionaryregistry
 from fly.lessons.helpers import finder
 from fly.lessons.helpers.filler import LessonFiller
 from fly.lessons.helpers.tochords import LessonToChords
@@ -47,7 +48,8 @@ def get_all_words_in_lessons(dictionary):
     
     # Populate lesson objects
     lesson_filler = LessonFiller()
-    chord_helper = LessonToChords(dictionary)
+    chord_helper = LessonToChords(dictionary,
+                                  processes=multiprocessing.cpu_count())
 
     for lesson in lesson_list:
         chords_file_path = chord_helper.get_chords_file_path(lesson.file_path)
@@ -152,10 +154,12 @@ def exit(category_dict_path, category_dict, new_category_dict):
     @type new_category_dict: dict
     """
 
+    category_dict = dict(category_dict)
     category_dict.update(new_category_dict)
     with open(category_dict_path, 'w') as f:
         print("Saving dict to %s" % category_dict_path)
         json.dump(category_dict, f)
+    dictionaryregistry.release(category_dict_path)
 
     print("Exiting...")
     return
@@ -167,9 +171,8 @@ def main():
     lesson words until there are none left to categorise."""
 
     # Generate plover dict
-    dict_filename = fileutils.get_plover_dict_path()
     print("Loading plover dict...")
-    dictionary = dictionaryreader.load_dict(dict_filename)
+    dictionary = dictionaryregistry.get_plover_dict()
 
     # Get words from lessons
     lessons_dir = fileutils.get_lessons_directory()
@@ -179,7 +182,7 @@ def main():
     # Get or create category dictionary
     category_dict_path = fileutils.get_lesson_words_categories_dict_path()
     if os.path.exists(category_dict_path):
-        category_dict = dictionaryreader.load_dict(category_dict_path)
+        category_dict = dictionaryregistry.get_dict(category_dict_path)
         print("Existing category dictionary contains %s entries, new "
               "entries will be added to it." % len(category_dict.keys()))
     else:
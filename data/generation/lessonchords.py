@@ -0,0 +1,55 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Generate the chords files of lessons, translating across every CPU.
+
+Fly generates missing chords files itself when it starts, but in its own
+process only (see LESSON_TRANSLATION_PROCESSES in the config). This is for
+large lessons, such as whole novels, which are quicker to translate in bulk
+beforehand. Existing chords files are replaced.
+
+Call from main game directory to generate the chords of every lesson:
+    python -m data.generation.lessonchords
+
+Or of particular lessons:
+    python -m data.generation.lessonchords path/to/lesson.les ...
+"""
+
+import multiprocessing
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+import fly.utils.files as fileutils
+from fly.lessons.helpers import finder
+from fly.lessons.helpers import tochords
+
+
+def main():
+
+    """Generate chords for the lessons named on the command line, or all."""
+
+    if len(sys.argv) > 1:
+        lesson_paths = sys.argv[1:]
+    else:
+        lesson_finder = finder.LessonFinder(fileutils.get_lessons_directory())
+        lesson_paths = [lesson.file_path
+                        for lesson in lesson_finder.find_lessons()]
+
+    processes = multiprocessing.cpu_count()
+    chord_helper = tochords.LessonToChords(processes=processes)
+    for lesson_path in lesson_paths:
+        chords_path = '%s%s' % (os.path.splitext(lesson_path)[0],
+                                chord_helper.CHORDS_FILE_EXTENSION)
+        chord_helper.generate_chords(lesson_path, chords_path)
+        logger.info("Wrote %s using %s processes." % (chords_path, processes))
+
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,8 @@ Code to generate dictionaries based on filtering.
 
 This module contains classes to generate dictionaries based on how
 easy it is to type the chords required to spell the words. The difficulty
-increases from Level 1 to Level 6.
+increases from Level 1 to Level 6. The levels are nested, so they are
+written out as a single level store (see fly.utils.leveldictstore).
 
 Call from main game directory to regenerate dictionaries:
     python -m data.generation.leveldictextraction
@@ -25,7 +26,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 import fly.utils.files as fileutils
-import fly.utils.dictionaryreader as dictionaryreader
+import fly.utils.dictionaryregistry as dictionaryregistry
+from fly.utils.leveldictstore import LevelDictionaryStore
 
 
 class LevelDictionaryCreator(object):
@@ -35,12 +37,7 @@ class LevelDictionaryCreator(object):
     with words of different difficulty level.
     """
 
-    dictionary_filename_1 = fileutils.get_level_dict_path(1)
-    dictionary_filename_2 = fileutils.get_level_dict_path(2)
-    dictionary_filename_3 = fileutils.get_level_dict_path(3)
-    dictionary_filename_4 = fileutils.get_level_dict_path(4)
-    dictionary_filename_5 = fileutils.get_level_dict_path(5)
-    dictionary_filename_6 = fileutils.get_level_dict_path(6)
+    level_store_filename = fileutils.get_level_store_path()
     
     def __init__(self, dictionary):
 
@@ -53,25 +50,21 @@ class LevelDictionaryCreator(object):
 
     def dump_dicts(self):
 
-        """Generates and writes out 6 dicts to hard-coded relative filepaths"""
+        """Generates 6 dicts and writes them out as a single level store"""
 
         sixDict = self.get_level_six_dict(self.dictionary)    
-        dump(sixDict, self.dictionary_filename_6)
-
         fiveDict = self.get_level_five_dict(sixDict)
-        dump(fiveDict, self.dictionary_filename_5)
-
         fourDict = self.get_level_four_dict(fiveDict)
-        dump(fourDict, self.dictionary_filename_4)
-
         threeDict = self.get_level_three_dict(fourDict)
-        dump(threeDict, self.dictionary_filename_3)
-
         twoDict = self.get_level_two_dict(threeDict)
-        dump(twoDict, self.dictionary_filename_2)
-
         oneDict = self.get_level_one_dict(twoDict)
-        dump(oneDict, self.dictionary_filename_1)
+
+        store = LevelDictionaryStore.from_level_dicts([oneDict, twoDict, 
+                                                       threeDict, fourDict,
+                                                       fiveDict, sixDict])
+        logger.info("Writing %s" % self.level_store_filename)
+        store.dump(self.level_store_filename)
+        dictionaryregistry.release(self.level_store_filename)
 
 
     @staticmethod
@@ -195,6 +188,7 @@ def dump(dictionary, filepath):
     with open(filepath, 'w') as f:
         logger.info("Writing %s" % filepath)
         json.dump(dictionary, f)
+    dictionaryregistry.release(filepath)
 
 
 def writeFilteredDict(dictionary, dict_filepath):
@@ -234,7 +228,7 @@ if __name__ == "__main__":
     logger.info("Generating dictionaries...")
 
     dict_filepath = fileutils.get_plover_dict_path()
-    dictionary = dictionaryreader.load_dict(dict_filepath)
+    dictionary = dictionaryregistry.get_plover_dict()
 
     writeFilteredDict(dictionary, dict_filepath)
 
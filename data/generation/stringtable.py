@@ -0,0 +1,51 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+"""
+Convert a json steno dictionary to a memory mapped string table.
+
+Fly builds the table for its own plover dict automatically (see
+DICTIONARY_BACKEND in the config), this is for converting other dicts or
+rebuilding by hand.
+
+Call from main game directory to convert the plover dict:
+    python -m data.generation.stringtable
+
+Or to convert any json dict:
+    python -m data.generation.stringtable path/to/dict.json [path/to/table]
+"""
+
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+import fly.utils.files as fileutils
+from fly.utils import stringtable
+
+
+def main():
+
+    """Convert the dict named on the command line, or the plover dict."""
+
+    if len(sys.argv) > 1:
+        dictionary_filename = sys.argv[1]
+    else:
+        dictionary_filename = fileutils.get_plover_dict_path()
+    table_filename = None
+    if len(sys.argv) > 2:
+        table_filename = sys.argv[2]
+
+    table_filename = stringtable.convert_dict(dictionary_filename,
+                                              table_filename)
+    table = stringtable.StringTable(table_filename)
+    logger.info("Wrote %s entries to %s." % (len(table), table_filename))
+    table.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,7 @@ logger = logging.getLogger(__name__)
 
 from fly import config
 from fly.gui import constants
+from fly.gui import textcache
 
 
 class DrawableElementInterface(pygame.Surface):
@@ -72,7 +73,6 @@ class Caption(DrawableElementInterface):
         """Draw element on screen."""
         
         self.fill(self.background_color)
-        font = pygame.font.Font(None, self.font_size)
         
         if self.display_text:
             line_number = 0
@@ -80,7 +80,8 @@ class Caption(DrawableElementInterface):
             # Handle multi-line text
             text_lines = self.text.split("\n")
             for line in text_lines:
-                text = font.render(line, 1, self.text_color)
+                text = textcache.render(line, self.font_size,
+                                        self.text_color)
                 self.blit(text, (self.margin, self.margin)) 
                 line_number += 1
                 blit_here = (self.pos[0], self.pos[1] + \
@@ -206,10 +207,10 @@ class KeyboardKey(DrawableElementInterface):
                 self.fill(self.partial_lit_color)
             if self.pressed:
                 self.fill(self.pressed_color)
-            
-        font = pygame.font.Font(None, int(self.font_size))
+
         if self.caption and self.display_qwerty:
-            text = font.render(self.caption, 1, self.text_color)
+            text = textcache.render(self.caption, self.font_size,
+                                    self.text_color)
             self.blit(text, (self.margin,self.margin))
        
         if self.steno_caption and self.display_steno:
@@ -222,7 +223,8 @@ class KeyboardKey(DrawableElementInterface):
                 self.steno_color = constants.HIGHLIGHTED_KEY_TEXT_COLOR
 
             # Render the steno label on the screen
-            steno_text = font.render(self.steno_caption, 1, self.steno_color)
+            steno_text = textcache.render(self.steno_caption, self.font_size,
+                                          self.steno_color)
             self.blit(steno_text, 
                       (constants.KEY_WIDTH-self.font_size/2.0-self.margin, 
                        constants.KEY_WIDTH-self.font_size/2.0-self.margin))
@@ -338,8 +340,7 @@ class DisplayPanel(DrawableElementInterface):
 
         self.fill(self.color)
             
-        font = pygame.font.Font(None, 16)
-        text = font.render(self.text, 1, self.text_color)
+        text = textcache.render(self.text, 16, self.text_color)
         self.blit(text, (self.margin,self.margin))
         surface.blit(self, self.pos)
         self.text = self.caption
@@ -465,8 +466,7 @@ class Button(DrawableElementInterface):
             if self.active:
                 self.fill(self.active_color)
                 
-            font = pygame.font.Font(None, 16)
-            text = font.render(self.caption, 1, self.text_color)
+            text = textcache.render(self.caption, 16, self.text_color)
             self.blit(text, (self.margin,self.margin))
             surface.blit(self, self.pos)
 
@@ -0,0 +1,45 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Latencies of recent chords, shown over the game when recording them."""
+
+import time
+
+from fly.gui import genericelements
+from fly.utils import latency
+
+# Percentiles are worked out at most this often, in seconds.
+UPDATE_INTERVAL = 1.0
+
+
+class LatencyOverlay(object):
+
+    """Table of latency percentiles in the top left corner of the screen."""
+
+    def __init__(self, latency_recorder):
+
+        """
+        @param latency_recorder: source of the latencies shown
+        @type latency_recorder: L{fly.utils.latency.LatencyRecorder}
+        """
+
+        self.latency_recorder = latency_recorder
+        font_size = 18
+        size = (330, font_size)
+        self.caption = genericelements.Caption((0, 0), font_size, size, "",
+                                               margin=2)
+        self.updated = 0
+
+    def blit_on(self, surface):
+
+        """Draw the latencies on screen, working them out again if due.
+
+        @param surface: the screen to draw on
+        @type surface: pygame.Surface
+        """
+
+        now = time.time()
+        if now - self.updated >= UPDATE_INTERVAL:
+            self.caption.set_text(self.latency_recorder.get_report())
+            self.updated = now
+        self.caption.blit_on(surface)
@@ -0,0 +1,114 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Fonts and rendered text shared by the elements drawn every frame.
+
+Loading a font reads and parses its file, and rendering text rasterises
+every glyph, yet most of what is on screen is the same from one frame to
+the next. Fonts are loaded once for each face and size, and the surfaces
+text is rendered to are kept in a least recently used cache, so that
+drawing a screen whose text hasn't changed does no font work at all.
+
+Rendered surfaces are shared by every element showing the same text, so
+they must only be blitted, never drawn on.
+
+Fonts can only be loaded once pygame.font has been initialised.
+"""
+
+import pygame
+
+from fly.utils import lrucache
+
+# Rendered texts kept. A screen shows under two hundred, counting each
+# key's labels in each of their colours.
+TEXT_CACHE_SIZE = 512
+
+# Loaded fonts by (face, size). There are only a handful, so they are
+# never evicted.
+_fonts = {}
+_font_counts = {"hits": 0, "misses": 0}
+
+# Rendered surfaces by (text, face, size, color, antialias).
+_text_surfaces = lrucache.LRUCache(TEXT_CACHE_SIZE)
+
+
+def get_font(size, face=None):
+
+    """Return the font of a face and size, loading it the first time.
+
+    @param size: height of the font in pixels, rounded down if not whole
+    @param face: path of the font file, or None for pygame's default
+
+    @type size: int or float
+    @type face: str
+
+    @rtype: pygame.font.Font
+    """
+
+    key = (face, int(size))
+    font = _fonts.get(key)
+    if font is None:
+        _font_counts["misses"] += 1
+        font = pygame.font.Font(face, key[1])
+        _fonts[key] = font
+    else:
+        _font_counts["hits"] += 1
+    return font
+
+
+def render(text, size, color, antialias=True, face=None):
+
+    """Return text rendered in a font, rendering it the first time.
+
+    @param text: a single line of text
+    @param size: height of the font in pixels, rounded down if not whole
+    @param color: colour of the text
+    @param antialias: whether to smooth the edges of the text
+    @param face: path of the font file, or None for pygame's default
+
+    @type text: str
+    @type size: int or float
+    @type color: tuple (int, int, int) representing red,
+                 green, blue where each is between 0 and 255
+    @type antialias: bool
+    @type face: str
+
+    @return: the rendered text, shared with other callers so not to be
+             drawn on
+    @rtype: pygame.Surface
+    """
+
+    key = (text, face, int(size), tuple(color), bool(antialias))
+    surface = _text_surfaces.get(key)
+    if surface is None:
+        surface = get_font(size, face).render(text, antialias, color)
+        _text_surfaces.put(key, surface)
+    return surface
+
+
+def get_stats():
+
+    """Return counts of how the caches have been used.
+
+    @return: "font_hits", "font_misses" and "fonts" for the fonts, and
+             "text_hits", "text_misses", "text_evictions" and "texts" for
+             the rendered text
+    @rtype: dict of str: int
+    """
+
+    text_stats = _text_surfaces.get_stats()
+    return {"font_hits": _font_counts["hits"],
+            "font_misses": _font_counts["misses"],
+            "fonts": len(_fonts),
+            "text_hits": text_stats["hits"],
+            "text_misses": text_stats["misses"],
+            "text_evictions": text_stats["evictions"],
+            "texts": text_stats["size"]}
+
+
+def clear():
+
+    """Forget the loaded fonts and rendered text. Counts are kept."""
+
+    _fonts.clear()
+    _text_surfaces.clear()
@@ -8,6 +8,8 @@ are plain text files with directive in first line. See file
 HOW_TO_ADD_LESSONS in data/lessons for more info.
 """
 
+import os
+
 from fly.lessons.helpers.finder import LessonFinder
 from fly.lessons.helpers.tochords import LessonToChords
 from fly.lessons.helpers.directive import DirectiveInterpreter
@@ -20,23 +22,98 @@ class LessonControl(object):
 
     """Deals with reading lesson from text file and translating."""
 
-    def __init__(self, dictionary):
+    def __init__(self, dictionary=None, add_chords=True):
         
         """
-        @param dictionary: plover keystroke to translation dict
-        @type dictionary: dict
+        @param dictionary: plover keystroke to translation dict. If None, the
+                           shared plover dict is used.
+        @param add_chords: whether to read/generate the chords of every lesson
+                           now. If False, L{add_chords} must be called before
+                           lessons are used.
+
+        @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+        @type add_chords: bool
         """
 
         self.current_lesson = None
         self.dir_helper = LessonFinder(fileutils.get_lessons_directory())
-        self.chord_helper = LessonToChords(dictionary)
+        self.chord_helper = None
         self.populate_helper = LessonFiller()
         self.word_chooser_helper = LessonWordChooserMapper()
         
         self.lesson_list = self.dir_helper.find_lessons()
         for lesson in self.lesson_list:
             self.__add_directives_to_lesson_obj(lesson)
-            self.__add_chords_to_lesson(lesson.file_path, lesson)
+
+        if add_chords:
+            self.add_chords(dictionary)
+
+    def add_chords(self, dictionary=None, progress_callback=None,
+                   cancel_event=None):
+
+        """Read/generate the steno chords for every lesson.
+
+        Generating chords can take a while, so this can be called on a
+        worker thread after the lessons have been listed.
+
+        @param dictionary: plover keystroke to translation dict. If None, the
+                           shared plover dict is used.
+        @param progress_callback: called with the fraction of lesson text
+                                  processed so far
+        @param cancel_event: if set, generating chords stops and
+                             GenerationCancelledError is raised (see
+                             L{fly.lessons.helpers.tochords})
+
+        @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+        @type progress_callback: function
+        @type cancel_event: threading.Event
+        """
+
+        self.chord_helper = LessonToChords(dictionary)
+
+        total_size = float(self.get_lessons_size())
+        done_size = 0
+        for lesson in self.lesson_list:
+            lesson_size = os.path.getsize(lesson.file_path)
+            lesson_progress = None
+            if progress_callback and total_size:
+                lesson_progress = self.__scale_progress(
+                        progress_callback, done_size / total_size,
+                        lesson_size / total_size)
+            self.__add_chords_to_lesson(lesson.file_path, lesson,
+                                        lesson_progress, cancel_event)
+            done_size += lesson_size
+            if progress_callback and total_size:
+                progress_callback(done_size / total_size)
+
+    @staticmethod
+    def __scale_progress(progress_callback, start, span):
+
+        """Return callback reporting progress through part of the work as
+        progress through all of it.
+
+        @param progress_callback: called with the fraction of all work done
+        @param start: fraction of all work done before the part
+        @param span: fraction of all work the part is
+
+        @type progress_callback: function
+        @type start: float
+        @type span: float
+
+        @rtype: function
+        """
+
+        return lambda fraction: progress_callback(start + fraction * span)
+
+    def get_lessons_size(self):
+
+        """Return the total size of all lesson files, in bytes.
+
+        @rtype: int
+        """
+
+        return sum(os.path.getsize(lesson.file_path) 
+                   for lesson in self.lesson_list)
 
     def __add_directives_to_lesson_obj(self, lesson):
 
@@ -56,7 +133,8 @@ class LessonControl(object):
         lesson.retrieval_directive = interpreter.get_retrieval_directive()
         lesson.display_directive = interpreter.get_display_directive()
 
-    def __add_chords_to_lesson(self, lesson_path, lesson):    
+    def __add_chords_to_lesson(self, lesson_path, lesson,
+                               progress_callback=None, cancel_event=None):
 
         """Generate/read the steno chords that correspond to the lesson.
         
@@ -65,12 +143,18 @@ class LessonControl(object):
         
         @param lesson_path: path to lesson file.
         @param lesson: lesson object to add chords to.
+        @param progress_callback: called with the fraction of the lesson
+                                  translated, if chords are generated
+        @param cancel_event: if set, generating chords stops
         
         @type lesson_path: str
         @type lesson: L{lessons.container.Lesson}
+        @type progress_callback: function
+        @type cancel_event: threading.Event
         """
         
-        chords_file_path = self.chord_helper.get_chords_file_path(lesson_path)
+        chords_file_path = self.chord_helper.get_chords_file_path(
+                lesson_path, progress_callback, cancel_event)
         lesson.chords_file_path = chords_file_path
 
     def get_lesson_names(self):
@@ -3,11 +3,10 @@
 
 """Populates lesson object by reading lesson files and interpreting data."""
 
-import re
 import logging
 logger = logging.getLogger(__name__)
 
-from fly.translation import wordstochords
+from fly.translation import tokenizer
 
 
 class LessonFiller(object):
@@ -103,24 +102,20 @@ class LessonFiller(object):
         """
 
         final_translations_list = []
+        word_counts = [0] * len(translation_sentence_list)
+        for token, kind, sentence_index in \
+                tokenizer.tokenize(translation_sentence_list):
+            final_translations_list.append(token.lower())
+            word_counts[sentence_index] += 1
+
         sentence_map = {}
         total_word_count = 0
         i = 0
-
-        for sentence in translation_sentence_list:
-            word_count = 0
-            translation_list = cls.get_translations_from_sentence(sentence)
-
-            for word in translation_list:
-                split_words = re.split("([-.,?!:;\"])", word)
-                words_and_punctuation = [w for w in split_words if w is not ""]
-                final_translations_list.extend(words_and_punctuation)
-                word_count += len(words_and_punctuation)
-                total_word_count += len(words_and_punctuation)
-
+        for word_count in word_counts:
             if word_count == 0:
                 continue
 
+            total_word_count += word_count
             word_indices = cls.generate_word_indices(word_count, 
                                                      total_word_count)
             sentence_map[i] = word_indices
@@ -128,30 +123,6 @@ class LessonFiller(object):
 
         return final_translations_list, sentence_map
 
-    @staticmethod
-    def get_translations_from_sentence(sentence):
-
-        """Split sentence into words and reject directives.
-
-        @param sentence: translated sentence to split
-        @type sentence: str
-
-        @return: list of words in sentence, with punctuation still attached.
-        @rtype: list of str
-        """
-
-        translation_list = sentence.split()
-        valid_translation_list = []
-        for t in translation_list:
-            # Directives are not allowed
-            if t.find("<") != -1 or t.find(">") != -1:
-                continue
-
-            t = t.lower().strip()
-            valid_translation_list.append(t)
-
-        return valid_translation_list
-
     @staticmethod
     def generate_word_indices(word_count, total_word_count):
 
@@ -190,14 +161,11 @@ class LessonFiller(object):
         @rtype: dict of str: str 
         """
 
-        word_getter = wordstochords.WordToChordTranslator.yield_word
-        translation_list = []
-        
+        get_dictionary_form = tokenizer.get_dictionary_form
         with open(lesson.file_path) as f:
-            data = f.readlines()
-            for line in data:
-                for word in word_getter(line):
-                    translation_list.append(word)
+            translation_list = [get_dictionary_form(token, kind) for 
+                                token, kind, sentence_index in 
+                                tokenizer.tokenize(f)]
 
         chord_translation_dict = {}
         for chord, translation in zip(lesson.chords_list, translation_list):
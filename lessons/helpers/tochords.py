@@ -3,10 +3,30 @@
 
 """Translate lesson file (plain text english) to steno chords file."""
 
+import itertools
 import os
 
 from fly import config
 from fly.translation import wordstochords
+from fly.utils import dictionaryregistry
+
+# Size of the buffer chords are written through, in bytes.
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Progress is reported, and cancellation checked, every this many lines.
+PROGRESS_LINES = 500
+
+# Lines translated at a time when translating with several processes, in
+# place of PROGRESS_LINES. Enough for every process to have several chunks
+# of lines (see L{fly.translation.wordstochords.BULK_CHUNK_LINES}).
+BULK_LINES = 8192
+
+
+class GenerationCancelledError(Exception):
+
+    """Generating a chords file was cancelled before it finished."""
+
+    pass
 
 
 class LessonToChords(object):
@@ -15,21 +35,42 @@ class LessonToChords(object):
 
     CHORDS_FILE_EXTENSION = '.chd'
 
-    def __init__(self, dictionary): 
+    def __init__(self, dictionary=None, processes=None): 
 
         """
-        @param dictionary: plover keystroke to translation dict
-        @type dictionary: dict
+        @param dictionary: plover keystroke to translation dict. If None, the
+                           shared plover dict is used.
+        @param processes: number of processes to translate lessons with. If
+                          None, LESSON_TRANSLATION_PROCESSES in the config.
+                          Only scripts run outside the game should use more
+                          than one, see
+                          L{fly.translation.wordstochords.WordToChordTranslator.translate_many}.
+
+        @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+        @type processes: int
         """
 
+        if dictionary is None:
+            dictionary = dictionaryregistry.get_plover_dict()
         self.translator = wordstochords.WordToChordTranslator(dictionary)
+        if processes is None:
+            processes = config.LESSON_TRANSLATION_PROCESSES
+        self.processes = processes
 
-    def get_chords_file_path(self, lesson_file_path):
+    def get_chords_file_path(self, lesson_file_path, progress_callback=None,
+                             cancel_event=None):
         
         """Read or create chords file and return path to file.
         
         @param lesson_file_path: file path to lesson to read/create chords for.
+        @param progress_callback: called with the fraction of the lesson
+                                  translated so far, if chords are generated
+        @param cancel_event: if set while chords are generated, generation
+                             stops and GenerationCancelledError is raised
+
         @type lesson_file_path: str
+        @type progress_callback: function
+        @type cancel_event: threading.Event
         """
 
         chords_file_path = '%s%s' % (os.path.splitext(lesson_file_path)[0], 
@@ -37,25 +78,85 @@ class LessonToChords(object):
         
         if config.FORCE_LESSON_REGENERATION or \
            not os.path.exists(chords_file_path):
-            self.__generate_chords(lesson_file_path, chords_file_path)
+            self.generate_chords(lesson_file_path, chords_file_path,
+                                 progress_callback, cancel_event)
 
         return chords_file_path
 
-    def __generate_chords(self, lesson_path, chords_file_path):
+    def generate_chords(self, lesson_path, chords_file_path,
+                        progress_callback=None, cancel_event=None):
         
         """Generate chords and write to file.
 
+        The lesson is read, translated and written a chunk of lines at a
+        time, so memory use doesn't grow with the size of the lesson. With
+        several processes, each chunk is translated in bulk across them.
+        Chords are written to a temporary file which replaces
+        chords_file_path only once all are written, so a cancelled or failed
+        generation leaves any existing chords file untouched.
+
         @param lesson_path: file path to lesson
         @param chords_file_path: file path to chords file corresponding to
                                  lesson file.
+        @param progress_callback: called with the fraction of the lesson
+                                  translated so far
+        @param cancel_event: if set, generation stops and
+                             GenerationCancelledError is raised
 
         @type lesson_path: str
         @type chords_file_path: str
+        @type progress_callback: function
+        @type cancel_event: threading.Event
         """
 
-        chord_lines_list = self.translator.translate_from_file(lesson_path)
-        chord_lines = '\n'.join(chord_lines_list)
-        with open(chords_file_path, 'w') as f:
-            f.write(chord_lines)
+        lesson_size = os.path.getsize(lesson_path)
+        temp_path = '%s.%s.tmp' % (chords_file_path, os.getpid())
+        try:
+            with open(temp_path, 'w', WRITE_BUFFER_SIZE) as chords_file:
+                with open(lesson_path) as lesson_file:
+                    self.__write_chords(lesson_file, lesson_size, chords_file,
+                                        progress_callback, cancel_event)
+            if os.name == 'nt' and os.path.exists(chords_file_path):
+                os.remove(chords_file_path)
+            os.rename(temp_path, chords_file_path)
+
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
 
+    def __write_chords(self, lesson_file, lesson_size, chords_file,
+                       progress_callback, cancel_event):
+
+        """Translate lesson_file in chunks of lines, writing to chords_file.
+
+        Lines of chords are separated by (not ended with) new lines.
+        """
 
+        if self.processes > 1:
+            chunk_lines = BULK_LINES
+        else:
+            chunk_lines = PROGRESS_LINES
+
+        # readline rather than iteration, so tell() gives progress.
+        lines = iter(lesson_file.readline, '')
+        first_chunk = True
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelledError(
+                        "Cancelled generating chords for %s" %
+                        lesson_file.name)
+            chunk = list(itertools.islice(lines, chunk_lines))
+            if not chunk:
+                break
+
+            if not first_chunk:
+                chords_file.write('\n')
+            first_chunk = False
+            chords_file.write('\n'.join(
+                    self.translator.translate_many(chunk, self.processes)))
+
+            if progress_callback and lesson_size:
+                progress_callback(lesson_file.tell() / float(lesson_size))
+
+        if progress_callback:
+            progress_callback(1.0)
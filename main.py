@@ -6,6 +6,7 @@
 
 import os
 import sys
+import time
 
 # Hack so that all modules can be imported from Fly, 
 # but the game can still be run just by calling
@@ -19,18 +20,40 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from fly import __version__
+from fly import config
 from fly.translation import ploverfacade
+from fly.translation import strokequeue
 from fly.models import threemode
+from fly.models import loadingmodel
 from fly.lessons import control
 from fly.statistics import gatherer
 from fly.gui import startup as startup_caption
 from fly.gui import constants
 from fly.gui import collection
+from fly.gui import latencyoverlay
+from fly.gui import textcache
+from fly.utils import dictionaryregistry
+from fly.utils import files as fileutils
+from fly.utils import latency
+from fly.utils import taskpipeline
 
 
-# Global variables, so can be accessed in main
-translation = ""
-chord = ""
+# Translations from plover, waiting for the main loop.
+stroke_queue = strokequeue.StrokeQueue()
+
+# Times chords from the machine to the screen, if switched on in the config.
+if config.RECORD_LATENCY:
+    latency_recorder = latency.LatencyRecorder()
+else:
+    latency_recorder = None
+
+# Names of the tasks that load Fly in the background.
+PLOVER_DICT_TASK = "plover dictionary"
+CATEGORIZATION_DICT_TASK = "categorization dictionary"
+LEVEL_STORE_TASK = "level dictionaries"
+LESSON_CHORDS_TASK = "lesson chords"
+WORD_MODEL_TASK = "word model"
+LESSON_MODEL_TASK = "lesson model"
 
 
 def translation_received(translationObj, overflow):
@@ -38,20 +61,22 @@ def translation_received(translationObj, overflow):
     """
     Callback function used to listen to plover's interpretation of key presses.
 
-    This is used to set global variables that can be read by the models when 
-    needed.
+    This is used to queue translations for the main loop, which passes them
+    on to the models.
 
     @param translationObj: A data model for the mapping between a sequence of
                            strokes and a string. 
-    @param overflow: unused.
+    @param overflow: translation no longer kept by plover, or None
 
     @type translationObj: L{plover.steno.Translation}
-    @type overflow: unused.
+    @type overflow: L{plover.steno.Translation}
     """
 
-    global translation, chord
-    translation = translationObj.english
-    chord = translationObj.rtfcre
+    if latency_recorder:
+        stroke_timestamp = latency_recorder.record_queued()
+    else:
+        stroke_timestamp = None
+    stroke_queue.push(translationObj, overflow, stroke_timestamp)
 
 
 class Main(object):
@@ -78,31 +103,126 @@ class Main(object):
         self.startupCaption = startup_caption.StartupCaption()
         self.update_startup_caption("Loading [0%]")
 
-        # Set up plover
+        # Set up plover. It translates chords only until the dictionary has
+        # loaded in the background.
         self.plover_control = ploverfacade.PloverControl()
-        self.plover_control.set_up_steno(translation_received)
-        dictionary = self.plover_control.get_dictionary()
+        self.plover_control.set_up_steno(translation_received, 
+                                         load_dictionary=False,
+                                         latency_recorder=latency_recorder)
 
-        # Set up lesson reading and statistics
-        self.lesson_control = control.LessonControl(dictionary)
+        # Set up lesson reading and statistics. Lessons are listed now, their
+        # chords are read or generated in the background.
+        self.lesson_control = control.LessonControl(add_chords=False)
         self.stats = gatherer.StatisticGatherer()
 
         # Set up GUI
         lesson_names = self.lesson_control.get_lesson_names()
         self.gui = collection.ElementsCollection(lesson_names)
+        if latency_recorder:
+            self.latency_overlay = latencyoverlay.LatencyOverlay(
+                    latency_recorder)
+        else:
+            self.latency_overlay = None
        
-        # Load models
+        # The alphabet model needs no dictionaries, so can be played
+        # straight away. The others load in the background and the loading
+        # model shows progress if they are chosen before they are ready.
         self.alphabet_model = threemode.get_alphabet_model()
-        self.update_startup_caption("Loading [33%]")
-        self.word_model = threemode.get_word_model() 
-        self.update_startup_caption("Loading [66%]")
-        self.lesson_model = threemode.get_lesson_model(self.gui,
-                                                       self.lesson_control)
-        self.update_startup_caption("Loading [100%]")
+        self.loader = self.create_loader()
+        self.loading_model = loadingmodel.LoadingModel(
+                self.loader.get_progress)
+        self.loader.start()
 
         self.model = self.alphabet_model
         self.current_model_name = self.model.name
 
+    def create_loader(self):
+
+        """Create the pipeline that loads dictionaries and models.
+
+        Independent tasks run concurrently. Tasks are weighted by the size
+        of the files they read, so that progress reflects the work done.
+
+        @rtype: L{fly.utils.taskpipeline.TaskPipeline}
+        """
+
+        # Read on this thread, as the GUI isn't safe to use from the
+        # loader's threads.
+        lesson_name = self.gui.get_current_lesson_name()
+
+        loader = taskpipeline.TaskPipeline()
+        loader.add_task(PLOVER_DICT_TASK, self.load_plover_dict,
+                        os.path.getsize(fileutils.get_plover_dict_path()))
+        loader.add_task(CATEGORIZATION_DICT_TASK,
+                        lambda progress: 
+                        dictionaryregistry.get_categorization_dict(),
+                        os.path.getsize(
+                            fileutils.get_categorization_dict_path()))
+        loader.add_task(LEVEL_STORE_TASK,
+                        lambda progress: dictionaryregistry.get_level_store(),
+                        os.path.getsize(fileutils.get_level_store_path()))
+        loader.add_task(LESSON_CHORDS_TASK, self.load_lesson_chords,
+                        self.lesson_control.get_lessons_size(),
+                        depends_on=(PLOVER_DICT_TASK, 
+                                    CATEGORIZATION_DICT_TASK))
+        loader.add_task(WORD_MODEL_TASK,
+                        lambda progress: threemode.get_word_model(),
+                        depends_on=(LEVEL_STORE_TASK, 
+                                    CATEGORIZATION_DICT_TASK))
+        loader.add_task(LESSON_MODEL_TASK,
+                        lambda progress: threemode.get_lesson_model(
+                            lesson_name, self.lesson_control),
+                        depends_on=(LESSON_CHORDS_TASK, LEVEL_STORE_TASK))
+        return loader
+
+    def load_plover_dict(self, progress):
+
+        """Load the plover dictionary and start translating with it.
+
+        @param progress: unused, loading is a single step
+        @type progress: function
+
+        @return: steno to english dictionary
+        @rtype: dict or L{fly.utils.stringtable.StringTable}
+        """
+
+        dictionary = dictionaryregistry.get_plover_dict()
+        self.plover_control.set_dictionary(dictionary)
+        return dictionary
+
+    def load_lesson_chords(self, progress):
+
+        """Read or generate the chords for every lesson.
+
+        @param progress: called with fraction of lessons processed
+        @type progress: function
+        """
+
+        dictionary = self.loader.get_result(PLOVER_DICT_TASK)
+        self.lesson_control.add_chords(dictionary, progress)
+
+    def get_model(self, model_name):
+
+        """Return the model with name given, or None if still loading.
+
+        @param model_name: name of model, see L{fly.models.threemode}
+        @type model_name: str
+
+        @rtype: L{fly.models.gamemodel.GameModel}
+        """
+
+        if model_name == threemode.ALPHABET_MODEL_NAME:
+            return self.alphabet_model
+
+        if model_name == threemode.WORD_MODEL_NAME:
+            task_name = WORD_MODEL_TASK
+        else:
+            task_name = LESSON_MODEL_TASK
+        if not self.loader.is_done(task_name):
+            return None
+        # Raises here if loading failed.
+        return self.loader.get_result(task_name)
+
     def update_startup_caption(self, text):
 
         """Set caption on screen to display specified text.
@@ -132,25 +252,31 @@ class Main(object):
 
         finally:
             self.plover_control.stop()
+            if latency_recorder:
+                latency_recorder.write_report(
+                        fileutils.get_latency_report_path())
+            logger.info("Text cache: %s" % textcache.get_stats())
 
     def main_loop(self):
 
         """This is executed as long as the game runs."""
 
-        global translation, chord
         self.gui.reset()
 
-        # Tell model about user input.
-        self.model.set_input_word_and_translation(chord, translation)
-
-        # Give model a chance to alter word and translation in case what plover
-        # provided is not what the model wants.
-        word_and_trans = self.model.get_chord_and_translation()
-
-        # Display user input.
-        self.gui.set_input_word_and_translation(word_and_trans[0], 
-                                                word_and_trans[1])
-        self.set_translation_blank()
+        # Tell model about every chord written since the last frame, in the
+        # order written, so that none are missed when writing quickly.
+        events = stroke_queue.drain()
+        if events:
+            for event in events:
+                if latency_recorder:
+                    started = time.time()
+                self.handle_input(event.chord, event.translation)
+                if latency_recorder:
+                    latency_recorder.record_model(event.timestamp,
+                                                  event.stroke_timestamp,
+                                                  started, time.time())
+        else:
+            self.handle_input("", "")
     
         # Check for mouse clicks or key presses etc.
         running = self.process_events()
@@ -161,21 +287,6 @@ class Main(object):
        
         # Display word user should type.
         self.gui.show_word_to_type(self.model.get_qwerty_letters_to_type())
-        if self.model.right_word_entered():
-            self.model.clear_inputs()
-            self.gui.on_right_word_entered()
-            self.stats.on_right_word_entered()
-
-            # Reset with new word
-            self.new_word_to_type()
-
-        elif self.model.wrong_word_entered():
-            # Record that a wrong word was entered for the accuracy count.
-            self.stats.on_wrong_word_entered()
-
-        else:
-            # Word has not been completed
-            pass
         
         # Update speed bar
         words_per_minute = self.stats.get_words_per_min()
@@ -185,7 +296,11 @@ class Main(object):
         # Update display
         self.screen.fill(constants.CANVAS_COLOR)
         self.gui.draw(self.screen)
+        if self.latency_overlay:
+            self.latency_overlay.blit_on(self.screen)
         pygame.display.flip()
+        if latency_recorder:
+            latency_recorder.record_displayed()
 
         # Switch model if user has changed models
         self.switch_model()
@@ -196,14 +311,54 @@ class Main(object):
 
         # Set the lesson model word chooser based on the lesson chosen in UI.
         # Only applies to the game if lesson model in use.
-        lesson = self.gui.get_current_lesson_name()
-        word_chooser = self.lesson_control.get_word_chooser(lesson)
-        if word_chooser:
-            self.lesson_model.set_word_chooser(word_chooser)
-            self.new_word_to_type()
+        lesson_model = self.get_model(threemode.LESSON_MODEL_NAME)
+        if lesson_model:
+            lesson = self.gui.get_current_lesson_name()
+            word_chooser = self.lesson_control.get_word_chooser(lesson)
+            if word_chooser:
+                lesson_model.set_word_chooser(word_chooser)
+                self.new_word_to_type()
 
         return True
 
+    def handle_input(self, chord, translation):
+
+        """Pass a chord the user wrote to the model and act on the result.
+
+        @param chord: chord written, or "" if none
+        @param translation: plover's translation of chord
+
+        @type chord: str
+        @type translation: str
+        """
+
+        # Tell model about user input.
+        self.model.set_input_word_and_translation(chord, translation)
+
+        # Give model a chance to alter word and translation in case what plover
+        # provided is not what the model wants.
+        word_and_trans = self.model.get_chord_and_translation()
+
+        # Display user input.
+        self.gui.set_input_word_and_translation(word_and_trans[0], 
+                                                word_and_trans[1])
+
+        if self.model.right_word_entered():
+            self.model.clear_inputs()
+            self.gui.on_right_word_entered()
+            self.stats.on_right_word_entered()
+
+            # Reset with new word
+            self.new_word_to_type()
+
+        elif self.model.wrong_word_entered():
+            # Record that a wrong word was entered for the accuracy count.
+            self.stats.on_wrong_word_entered()
+
+        else:
+            # Word has not been completed
+            pass
+
     def new_word_to_type(self):
 
         """Generate a new word for the user to type."""
@@ -215,19 +370,28 @@ class Main(object):
     
     def switch_model(self):
 
-        """Check which model the GUI is set to and switch if necessary."""
+        """Check which model the GUI is set to and switch if necessary.
 
-        model_name = self.gui.get_model_to_use()
-        if model_name == self.model.name:
-            return
+        If that model is still loading, the loading model is used until it
+        is ready, showing how much has loaded.
+        """
 
-        if model_name == threemode.ALPHABET_MODEL_NAME:
-            self.model = self.alphabet_model
-        elif model_name == threemode.WORD_MODEL_NAME:
-            self.model = self.word_model
+        model_name = self.gui.get_model_to_use()
+        if model_name == self.current_model_name:
+            if self.model is not self.loading_model:
+                return
+            model = self.get_model(model_name)
+            if model is None:
+                # Still loading, so only update the progress shown.
+                target_chord, target_translation = \
+                        self.loading_model.get_display_word_and_translation()
+                self.gui.set_word_to_type(target_chord, target_translation)
+                return
         else:
-            self.model = self.lesson_model
-        
+            model = self.get_model(model_name) or self.loading_model
+
+        self.current_model_name = model_name
+        self.model = model
         self.new_word_to_type()
 
     def process_events(self):
@@ -288,12 +452,6 @@ class Main(object):
         """Return True if a key is pressed."""
         return event.type == pygame.KEYDOWN
 
-    def set_translation_blank(self):
-        """Clear global chord and translation ready for new user input."""
-        global translation, chord
-        translation = ""
-        chord = ""
-
 
 if __name__ == "__main__":
 
@@ -0,0 +1,45 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Stands in for a model that is still loading in the background."""
+
+from fly.models import interface
+
+LOADING_MODEL_NAME = "loading"
+
+
+class LoadingModel(interface.InteractionModelInterface):
+
+    """Shows loading progress in place of a word to type.
+
+    Input is ignored, so nothing counts as a right or wrong word.
+    """
+
+    name = LOADING_MODEL_NAME
+
+    def __init__(self, get_progress):
+
+        """
+        @param get_progress: returns how much has been loaded, as a fraction
+        @type get_progress: function
+        """
+
+        self.get_progress = get_progress
+
+    def generate_word_to_type(self):
+        pass
+
+    def get_display_word_and_translation(self):
+        return "", "Loading [%d%%]" % (self.get_progress() * 100)
+
+    def get_chord_and_translation(self):
+        return "", ""
+
+    def right_word_entered(self):
+        return False
+
+    def wrong_word_entered(self):
+        return False
+
+    def get_qwerty_letters_to_type(self):
+        return []
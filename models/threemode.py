@@ -54,16 +54,21 @@ def get_word_model():
     return word_model
 
 
-def get_lesson_model(gui, lesson_control):
+def get_lesson_model(lesson_name, lesson_control):
 
     """Create game model to use for lesson model.
 
+    @param lesson_name: lesson selected in the GUI
+    @param lesson_control: lessons to choose words from
+
+    @type lesson_name: str
+    @type lesson_control: L{fly.lessons.control.LessonControl}
+
     @return: model configured for lesson
     @rtype: L{game_model.GameModel)
     """
 
-    lesson = gui.get_current_lesson_name()
-    word_chooser = lesson_control.get_word_chooser(lesson)
+    word_chooser = lesson_control.get_word_chooser(lesson_name)
     if word_chooser:
         lesson_word_chooser = word_chooser
     else:
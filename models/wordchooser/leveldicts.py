@@ -6,61 +6,57 @@
 import random
 
 from fly.models.wordchooser import interface
-from fly.utils import dictionaryreader as dictread
-from fly.utils import files as fileutils
+from fly.utils import dictionaryregistry
 from fly.translation import wordstochords
 
 
 class RetrieveFromLevelDictionaries(interface.WordChooserInterface):
 
     """
-    Six dictionaries have been generated (see data/generation/
+    Six levels of dictionary have been generated (see data/generation/
     leveldictextraction.py) which have varying levels of difficulty in
     terms of number of keys to press simultaneously. The level the user
     is at, which depends on user's speed and accuracy, determines which
-    dictionary the word to type is randomly drawn from.
-    """
+    level the word to type is randomly drawn from.
 
-    dictionary_filename_1 = fileutils.get_level_dict_path(1)
-    dictionary_filename_2 = fileutils.get_level_dict_path(2)
-    dictionary_filename_3 = fileutils.get_level_dict_path(3)
-    dictionary_filename_4 = fileutils.get_level_dict_path(4)
-    dictionary_filename_5 = fileutils.get_level_dict_path(5)
-    dictionary_filename_6 = fileutils.get_level_dict_path(6)
-    word_category_filepath = fileutils.get_categorization_dict_path()
+    All levels share a single store, where each level is an array of 
+    offsets into the store.
+    """
 
     def __init__(self):
-        self.dictionary_1 = dictread.load_dict(self.dictionary_filename_1)
-        self.dictionary_2 = dictread.load_dict(self.dictionary_filename_2)
-        self.dictionary_3 = dictread.load_dict(self.dictionary_filename_3)
-        self.dictionary_4 = dictread.load_dict(self.dictionary_filename_4)
-        self.dictionary_5 = dictread.load_dict(self.dictionary_filename_5)
-        self.dictionary_6 = dictread.load_dict(self.dictionary_filename_6)
-        self.word_cat_dict = dictread.load_dict(self.word_category_filepath)
+        self.store = dictionaryregistry.get_level_store()
+        self.word_cat_dict = dictionaryregistry.get_categorization_dict()
 
         self.previous_translation = ""
 
         # Start at lowest level
-        self.dictionary = self.dictionary_1
+        self.set_level(1)
 
     def get_word_and_translation(self, level):
 
-        word = self.get_random_canon_word()
-        translation = self.dictionary[word]
+        offset = self.get_random_canon_offset()
+        word = self.store.get_chord(offset)
+        translation = self.store.get_translation(offset)
         return word, translation
     
     def get_random_canon_word(self):
 
         """Chord returned will be canon or uncategorized."""
 
-        word = random.choice(self.dictionary.keys())
-        if word in self.word_cat_dict and \
-           self.word_cat_dict[word] != wordstochords.CANON:
-            return self.get_random_canon_word()
+        return self.store.get_chord(self.get_random_canon_offset())
+
+    def get_random_canon_offset(self):
+
+        """Offset in store of a random canon or uncategorized chord."""
 
-        return word
+        while True:
+            offset = random.choice(self.level_view)
+            word = self.store.get_chord(offset)
+            if word not in self.word_cat_dict or \
+               self.word_cat_dict[word] == wordstochords.CANON:
+                return offset
 
     def set_level(self, level):
-        self.dictionary = eval("self.dictionary_%s" % level)
+        self.level_view = self.store.get_level_view(level)
 
 
@@ -8,16 +8,14 @@ configuration, initialization, and control (starting and stopping) of
 a complete stenographic processing pipeline, from reading stroke keys
 from a stenotype machine to outputting translated English text to the
 screen. Configuration parameters are read from a user-editable
-configuration file. In addition, application log files are maintained
-by this module. This module does not provide a graphical user
-interface.
+configuration file. In addition, a journal of strokes and translations
+is maintained by this module. This module does not provide a graphical
+user interface.
 
 """
 
 # Import standard library modules.
 import os
-import logging
-import logging.handlers
 try :
     import simplejson as json
 except ImportError :
@@ -26,10 +24,12 @@ except ImportError :
 # Import plover modules.
 import plover.config as conf
 import plover.formatting as formatting
+import plover.journal as journal
 import plover.keyboardcontrol as keyboardcontrol
 import plover.steno as steno
 import plover.machine as machine
 import plover.machine.base
+import plover.machine.replay
 import plover.machine.sidewinder
 import plover.dictionary as dictionary
 
@@ -62,7 +62,7 @@ class StenoEngine:
     plover.keyboardcontrol.KeyboardEmulation class. This object
     displays text on the screen.
 
-    In addition to the above pieces, a logger records timestamped
+    In addition to the above pieces, a journal records timestamped
     strokes and translations. Many of these pieces can be configured
     by the user via a configuration file, which is by default located
     at ~/.config/plover/plover.cfg and will be automatically generated
@@ -78,6 +78,7 @@ class StenoEngine:
         self.subscribers = []
         self.is_running = False
         self.machine = None
+        self.journal = None
         self.machine_init = {}
         self.translator = None
         self.formatter = None
@@ -96,6 +97,11 @@ class StenoEngine:
                       plover.machine.base.SerialStenotypeBase):
             serial_params = conf.get_serial_params(machine_type, self.config)
             self.machine_init.update(serial_params.__dict__)
+            self.machine_init.update(conf.get_idle_timeout_params(
+                machine_type, self.config))
+        elif issubclass(self.machine_module.Stenotype,
+                        plover.machine.replay.Stenotype):
+            self.machine_init.update(conf.get_replay_params(self.config))
 
         # Set the steno dictionary format module.
         dictionary_format = self.config.get(conf.DICTIONARY_CONFIG_SECTION,
@@ -126,21 +132,23 @@ class StenoEngine:
             raise ValueError('The value of %s must end with %s.' %
                              (conf.DICTIONARY_FILE_OPTION, conf.JSON_EXTENSION))
 
-        # Initialize the logger.
-        log_file = os.path.join(conf.CONFIG_DIR,
-                                self.config.get(conf.LOGGING_CONFIG_SECTION,
-                                                conf.LOG_FILE_OPTION))
-        self.logger = logging.getLogger(conf.LOGGER_NAME)
-        self.logger.setLevel(logging.DEBUG)
-        handler = logging.handlers.RotatingFileHandler(log_file,
-                                                    maxBytes=conf.LOG_MAX_BYTES,
-                                                    backupCount=conf.LOG_COUNT)
-        handler.setFormatter(logging.Formatter(conf.LOG_FORMAT))
-        self.logger.addHandler(handler)
-
         # Construct the stenography capture-translate-format-display pipeline.
         self.machine = self.machine_module.Stenotype(**self.machine_init)
         self.output = keyboardcontrol.KeyboardEmulation()
+
+        # Journal strokes before the translator sees them, so that a
+        # stroke is journaled before its translations.
+        log_strokes = self.config.getboolean(conf.LOGGING_CONFIG_SECTION,
+                                             conf.ENABLE_STROKE_LOGGING_OPTION)
+        log_translations = self.config.getboolean(
+            conf.LOGGING_CONFIG_SECTION,
+            conf.ENABLE_TRANSLATION_LOGGING_OPTION)
+        if log_strokes or log_translations:
+            self.journal = journal.JournalWriter(
+                conf.get_journal_file(self.config))
+        if log_strokes:
+            self.machine.add_callback(self.journal.on_steno_keys)
+
         self.translator = steno.Translator(self.machine,
                                            self.dictionary,
                                            self.dictionary_module)
@@ -149,13 +157,8 @@ class StenoEngine:
                                             conf.MACHINE_AUTO_START_OPTION)
         self.set_is_running(auto_start)
 
-        # Add hooks for logging.
-        if self.config.getboolean(conf.LOGGING_CONFIG_SECTION,
-                                  conf.ENABLE_STROKE_LOGGING_OPTION):
-            self.machine.add_callback(self._log_stroke)
-        if self.config.getboolean(conf.LOGGING_CONFIG_SECTION,
-                                  conf.ENABLE_TRANSLATION_LOGGING_OPTION):
-            self.translator.add_callback(self._log_translation)
+        if log_translations:
+            self.translator.add_callback(self.journal.on_translation)
 
         # Start the machine monitoring for steno strokes.
         self.machine.start_capture()
@@ -183,6 +186,9 @@ class StenoEngine:
         """
         if self.machine:
             self.machine.stop_capture()
+        if self.journal:
+            self.journal.close()
+            self.journal = None
         self.is_running = False
 
     def add_callback(self, callback) :
@@ -194,11 +200,3 @@ class StenoEngine:
 
         """
         self.subscribers.append(callback)
-
-
-    def _log_stroke(self, steno_keys):
-        self.logger.info('Stroke(%s)' % ' '.join(steno_keys))
-
-
-    def _log_translation(self, translation, overflow):
-        self.logger.info(translation)
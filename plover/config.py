@@ -28,6 +28,9 @@ LOGGING_CONFIG_SECTION = 'Logging Configuration'
 LOG_FILE_OPTION = 'log_file'
 ENABLE_STROKE_LOGGING_OPTION = 'enable_stroke_logging'
 ENABLE_TRANSLATION_LOGGING_OPTION = 'enable_translation_logging'
+REPLAY_CONFIG_SECTION = 'Stroke Replay'
+REPLAY_LOG_FILE_OPTION = 'log_file'
+REPLAY_SPEED_OPTION = 'speed'
 
 # Default values for configuration options.
 DEFAULT_MACHINE_TYPE = 'Microsoft Sidewinder X4'
@@ -37,6 +40,7 @@ DEFAULT_DICTIONARY_FORMAT = 'Eclipse'
 DEFAULT_LOG_FILE = 'plover.log'
 DEFAULT_ENABLE_STROKE_LOGGING = 'true'
 DEFAULT_ENABLE_TRANSLATION_LOGGING = 'true'
+DEFAULT_REPLAY_SPEED = 1.0
 
 # Dictionary constants.
 JSON_EXTENSION = '.json'
@@ -44,6 +48,9 @@ ALTERNATIVE_ENCODING = 'latin-1'
 
 # Logging constants.
 LOG_EXTENSION = '.log'
+# Strokes and translations are journaled beside the log file, with this
+# extension instead, see plover.journal.
+JOURNAL_EXTENSION = '.journal'
 LOGGER_NAME = 'plover_logger'
 LOG_FORMAT = '%(asctime)s %(message)s'
 LOG_MAX_BYTES = 10000000
@@ -67,6 +74,9 @@ SERIAL_ALL_OPTIONS = (SERIAL_PORT_OPTION,
                       SERIAL_XONXOFF_OPTION,
                       SERIAL_RTSCTS_OPTION)
 SERIAL_DEFAULT_TIMEOUT = 2.0
+# Seconds without data after which a serial machine is idle, which ends
+# a stroke on a TX Bolt machine. Not a serial.Serial parameter.
+SERIAL_IDLE_TIMEOUT_OPTION = 'idle_timeout'
 
 def import_named_module(name, module_dictionary):
     """Returns the Python module corresponding to the given name.
@@ -213,6 +223,78 @@ def get_serial_params(section, config):
             self.__dict__.update(kwargs)
     return _Struct(**serial_params)
 
+def get_journal_file(config):
+    """Returns the path of the stroke journal in a configuration.
+
+    Arguments:
+
+    config -- The ConfigParser object containing the parameters of
+    interest.
+
+    The journal is the log_file option of the LOGGING_CONFIG_SECTION,
+    relative to the configuration directory, with its extension
+    replaced by JOURNAL_EXTENSION.
+
+    """
+    if config.has_option(LOGGING_CONFIG_SECTION, LOG_FILE_OPTION):
+        log_file = config.get(LOGGING_CONFIG_SECTION, LOG_FILE_OPTION)
+    else:
+        log_file = DEFAULT_LOG_FILE
+    return os.path.join(CONFIG_DIR,
+                        os.path.splitext(log_file)[0] + JOURNAL_EXTENSION)
+
+def get_replay_params(config):
+    """Returns the arguments for the stroke replay machine in a configuration.
+
+    Arguments:
+
+    config -- The ConfigParser object containing the parameters of
+    interest.
+
+    The strokes are replayed from the log_file option of the
+    REPLAY_CONFIG_SECTION, relative to the configuration directory,
+    which can be a stroke journal or a text stroke log. It defaults to
+    Plover's own journal. The speed option is how many times faster
+    than logged to replay the strokes, with 0 meaning as fast as
+    possible.
+
+    Returns a dictionary of keyword arguments for
+    plover.machine.replay.Stenotype.
+
+    """
+    if config.has_option(REPLAY_CONFIG_SECTION, REPLAY_LOG_FILE_OPTION):
+        log_file = config.get(REPLAY_CONFIG_SECTION, REPLAY_LOG_FILE_OPTION)
+    else:
+        log_file = get_journal_file(config)
+    if config.has_option(REPLAY_CONFIG_SECTION, REPLAY_SPEED_OPTION):
+        speed = config.getfloat(REPLAY_CONFIG_SECTION, REPLAY_SPEED_OPTION)
+    else:
+        speed = DEFAULT_REPLAY_SPEED
+    return {'log_file': os.path.join(CONFIG_DIR, log_file),
+            'speed': speed}
+
+def get_idle_timeout_params(section, config):
+    """Returns the idle timeout of a serial machine in a configuration.
+
+    Arguments:
+
+    section -- A string representing the section name containing the
+    parameters of interest.
+
+    config -- The ConfigParser object containing the parameters of
+    interest.
+
+    Returns a dictionary of keyword arguments for
+    plover.machine.base.SerialStenotypeBase, which is empty if the
+    section has no idle_timeout option so that the machine's own
+    default is used.
+
+    """
+    if config.has_option(section, SERIAL_IDLE_TIMEOUT_OPTION):
+        return {'idle_timeout': config.getfloat(section,
+                                                SERIAL_IDLE_TIMEOUT_OPTION)}
+    return {}
+
 def set_serial_params(serial_port, section, config):
     """Writes a serial.Serial object to a section of a ConfigParser object.
 
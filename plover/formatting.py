@@ -55,6 +55,243 @@ META_RE = re.compile(r"""(?:%s%s|%s%s|[^%s%s])+ # One or more of anything
 #                                   # doesn't contain unescaped { or }
 #             """, re.VERBOSE)
 
+# The number of dictionary entries whose atoms are kept by default.
+ATOM_CACHE_SIZE = 4096
+
+
+class AtomCache:
+    """A bounded map of dictionary entries to their parsed atoms.
+
+    Reducing a translation to atoms takes a regular expression and
+    some string handling, the result of which only depends on the
+    dictionary entry. The atoms of entries are therefore kept, so that
+    rendering a common word again is a dict lookup. See parse_atoms.
+
+    Entries are parsed when first rendered, or can be parsed ahead of
+    time with preload. When the cache is full, an arbitrary entry is
+    dropped to make room. Counts of hits, misses and evictions show
+    how well the cache is working.
+
+    """
+
+    def __init__(self, max_size=ATOM_CACHE_SIZE):
+        """Create an empty cache.
+
+        Arguments:
+
+        max_size -- The most dictionary entries to keep the atoms of.
+
+        """
+        if max_size < 1:
+            raise ValueError("Cache must hold at least one entry, not %s" %
+                             max_size)
+        self.max_size = max_size
+        self.atoms = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_atoms(self, english):
+        """Return the atoms of a dictionary entry, parsing it if needed.
+
+        Arguments:
+
+        english -- The English or meta command string of a dictionary
+        entry.
+
+        Returns a tuple as returned by parse_atoms.
+
+        """
+        atoms = self.atoms.get(english)
+        if atoms is not None:
+            self.hits += 1
+            return atoms
+        self.misses += 1
+        atoms = parse_atoms(english)
+        self._put(english, atoms)
+        return atoms
+
+    def preload(self, englishes):
+        """Parse dictionary entries ahead of time.
+
+        Arguments:
+
+        englishes -- An iterable of the English or meta command
+        strings of the dictionary entries most likely to be
+        rendered. Parsing stops once the cache is full.
+
+        """
+        for english in englishes:
+            if len(self.atoms) >= self.max_size:
+                break
+            if english not in self.atoms:
+                self._put(english, parse_atoms(english))
+
+    def get_stats(self):
+        """Return counts of how the cache has been used.
+
+        Returns a dict of the number of hits, misses, evictions and
+        entries held (size).
+
+        """
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.atoms)}
+
+    def _put(self, english, atoms):
+        # Keep the atoms of an entry, dropping another entry if full.
+        if len(self.atoms) >= self.max_size:
+            self.atoms.popitem()
+            self.evictions += 1
+        self.atoms[english] = atoms
+
+
+def parse_atoms(english):
+    """Reduce a dictionary entry to atoms.
+
+    An atom is an irreducible string that is either entirely a single
+    meta command or entirely text containing no meta commands.
+
+    Arguments:
+
+    english -- The English or meta command string of a dictionary
+    entry.
+
+    Returns a tuple of atoms, each a two-tuple of the meta command
+    without its markup (or None for text) and the meta command or text
+    with escaped meta markups unescaped.
+
+    """
+    if english.isdigit():
+        english = _apply_glue(english)
+    return tuple([_parse_atom(atom) for atom in META_RE.findall(english)])
+
+
+def _parse_atom(atom):
+    # Split an atom into its meta command, if any, and its value.
+    atom = atom.strip()
+    meta = _get_meta(atom)
+    if meta is not None:
+        return meta, _unescape_atom(meta)
+    return None, _unescape_atom(atom)
+
+
+def _get_meta(atom):
+    # Return the meta command, if any, without surrounding meta markups. 
+    if (atom is not None and
+        atom.startswith(META_START) and
+        atom.endswith(META_END)):
+        return atom[1:-1]
+    return None
+
+
+def _unescape_atom(atom):
+    # Replace escaped meta markups with unescaped meta markups.
+    return atom.replace(META_ESC_START, META_START).replace(META_ESC_END,
+                                                            META_END)
+
+
+def _apply_glue(s):
+    # Mark the given string as a glue stroke.
+    return META_START + META_GLUE_FLAG + s + META_END
+
+    
+class _Rendering:
+    """The printable text of a sequence of translations, kept in pieces.
+
+    Each atom of a translation adds a piece of text. Suffix meta
+    commands in a later translation can replace the last piece, but
+    pieces before it never change again. A rendering can therefore be
+    wound back to a state it was in, and the text after that state
+    compared and rendered again, without going over the text before
+    it.
+
+    A state is a tuple of the number of pieces, the last piece, the
+    length of the text, the emulated length (text plus key
+    combinations), the number of key combinations and the meta command
+    of the last atom, all as they were after a translation was
+    rendered.
+
+    """
+
+    def __init__(self):
+        """Create an empty rendering."""
+        self.text = []
+        self.pieces_dropped = 0
+        self.length = 0
+        self.text_length = 0
+        self.key_combinations = []
+        self.key_combinations_dropped = 0
+        self.previous_meta = None
+
+    def get_state(self):
+        """Return the state of the rendering after what's rendered so far."""
+        if self.text:
+            last_piece = self.text[-1]
+        else:
+            last_piece = None
+        return (self.pieces_dropped + len(self.text), last_piece,
+                self.length, self.text_length,
+                self.key_combinations_dropped + len(self.key_combinations),
+                self.previous_meta)
+
+    def get_text_since(self, state):
+        """Return the text that may have changed since a state.
+
+        Arguments:
+
+        state -- A state returned by get_state.
+
+        Returns a two-tuple of the length of the text before the
+        returned text, which won't change, and the text after it.
+
+        """
+        pieces, last_piece, length = state[:3]
+        if not pieces:
+            return 0, ''.join(self.text)
+        start = pieces - 1 - self.pieces_dropped
+        return length - len(last_piece), ''.join(self.text[start:])
+
+    def get_key_combinations_since(self, state):
+        """Return the key combinations added since a state."""
+        return self.key_combinations[state[4] - 
+                                     self.key_combinations_dropped:]
+
+    def restore(self, state):
+        """Wind the rendering back to a state it was in.
+
+        Arguments:
+
+        state -- A state returned by get_state, no earlier than the
+        state last passed to forget_before.
+
+        """
+        (pieces, last_piece, self.length, self.text_length, combinations,
+         self.previous_meta) = state
+        del self.text[pieces - self.pieces_dropped:]
+        if self.text:
+            self.text[-1] = last_piece
+        del self.key_combinations[combinations - 
+                                  self.key_combinations_dropped:]
+
+    def forget_before(self, state):
+        """Drop the text that can't change once past a state.
+
+        Arguments:
+
+        state -- A state returned by get_state. The rendering can't
+        be restored to any earlier state afterwards.
+
+        """
+        pieces, combinations = state[0], state[4]
+        keep_from = max(pieces - 1, self.pieces_dropped)
+        del self.text[:keep_from - self.pieces_dropped]
+        self.pieces_dropped = keep_from
+        del self.key_combinations[:combinations - 
+                                  self.key_combinations_dropped]
+        self.key_combinations_dropped = combinations
+
     
 class Formatter:
     """A state machine for converting Translation objects into printable text.
@@ -62,12 +299,19 @@ class Formatter:
     Instances of this class take in one Translation object at a time
     through the consume_translation method and output printable text.
 
+    The text of the translator's buffer is kept along with the state
+    it was in after each translation. When the buffer changes, only
+    the translations from the first one that changed onwards are
+    rendered again and compared to what was output before, so the
+    work done for a translation doesn't grow with the buffer.
+
     """
     
     def __init__(self, 
                  translator, 
                  text_output=None, 
-                 engine_command_callback=None):
+                 engine_command_callback=None,
+                 atom_cache=None):
         """Create a state machine for processing Translation objects.
 
         Arguments:
@@ -80,12 +324,24 @@ class Formatter:
         that takes a string as an argument, and a send_key_combination
         method that takes a string as an argument.
 
+        atom_cache -- An AtomCache of the atoms of dictionary entries,
+        for example one preloaded with the most common entries. If
+        None, the formatter fills a cache of its own as it goes.
+
         """
         self.translator = translator
         self.text_output = text_output
         self.engine_command_callback = engine_command_callback
-        self.keystrokes = ''
-        self.key_combos = []
+        if atom_cache is None:
+            atom_cache = AtomCache()
+        self.atom_cache = atom_cache
+        self.rendering = _Rendering()
+        # The state of the rendering before the first translation in
+        # rendered_translations.
+        self.start_state = self.rendering.get_state()
+        # A list of each rendered translation and the state of the
+        # rendering after it.
+        self.rendered_translations = []
         self.translator.add_callback(self.consume_translation)
 
     def consume_translation(self, translation, overflow):
@@ -103,6 +359,8 @@ class Formatter:
         if cmd: 
             if self.engine_command_callback:
                 self.engine_command_callback(cmd)
+            if overflow:
+                self._forget_translation(overflow)
             return
 
         num_backspaces = 0
@@ -111,8 +369,31 @@ class Formatter:
             tBuffer = [overflow] + self.translator.translations
         else:
             tBuffer = self.translator.translations
-        new_keystrokes, new_key_combos = self._translations_to_string(tBuffer)
-        old_length = len(self.keystrokes)
+
+        # Find the first translation that changed since last time and
+        # wind the rendering back to just before it.
+        rendered = self.rendered_translations
+        changed = 0
+        for (old, state), new in zip(rendered, tBuffer):
+            if not self._is_same_translation(old, new):
+                break
+            changed += 1
+        if changed:
+            state = rendered[changed - 1][1]
+        else:
+            state = self.start_state
+        unchanged_length, old_keystrokes = \
+            self.rendering.get_text_since(state)
+        old_key_combos = self.rendering.get_key_combinations_since(state)
+        self.rendering.restore(state)
+        del rendered[changed:]
+        for t in tBuffer[changed:]:
+            self._render_translation(t, self.rendering)
+            rendered.append((t, self.rendering.get_state()))
+        unchanged_length, new_keystrokes = \
+            self.rendering.get_text_since(state)
+        new_key_combos = self.rendering.get_key_combinations_since(state)
+        old_length = len(old_keystrokes)
         new_length = len(new_keystrokes)
         
         # XXX: There is some code duplication here with
@@ -123,7 +404,7 @@ class Formatter:
         # by emitting zero or more backspaces and zero or more
         # keystrokes.
         for i in range(min(old_length, new_length)):
-            if self.keystrokes[i] != new_keystrokes[i]:
+            if old_keystrokes[i] != new_keystrokes[i]:
                 num_backspaces += old_length - i
                 non_backspaces = new_keystrokes[i:]
                 break
@@ -138,13 +419,14 @@ class Formatter:
                 non_backspaces = new_keystrokes[old_length:]
 
         # Don't send key combinations again if they've already been
-        # sent.
-        skip_count = new_length - len(non_backspaces)
-        while new_key_combos and self.key_combos:
-            if new_key_combos[0] == self.key_combos[0]:
+        # sent. Those before the changed translations are the same.
+        skip_count = (unchanged_length + new_length - len(non_backspaces) +
+                      state[4])
+        while new_key_combos and old_key_combos:
+            if new_key_combos[0] == old_key_combos[0]:
                 skip_count += 1
                 new_key_combos.pop(0)
-                self.key_combos.pop(0)
+                old_key_combos.pop(0)
             else:
                 break
             
@@ -161,10 +443,22 @@ class Formatter:
                 prev_i = i
             self.text_output.send_string(non_backspaces[prev_i:])
 
-        # Keep track of the current state in preparation for the next
-        # call to this method.
-        self.keystrokes, self.key_combos = self._translations_to_string( \
-                                                  self.translator.translations)
+        if overflow:
+            self._forget_translation(overflow)
+
+    def _forget_translation(self, overflow):
+        # Stop tracking a translation that overflowed the translator's
+        # buffer. It won't change again, so its text is kept only as
+        # the context of the translations after it.
+        rendered = self.rendered_translations
+        if rendered and self._is_same_translation(rendered[0][0], overflow):
+            self.start_state = rendered.pop(0)[1]
+            self.rendering.forget_before(self.start_state)
+
+    def _is_same_translation(self, old, new):
+        # Return whether two translations render the same, so a
+        # rendering of one can stand for the other.
+        return old is new or (old == new and old.english == new.english)
 
     def _translations_to_string(self, translations):
         """ Converts a list of Translation objects into printable text.
@@ -181,115 +475,112 @@ class Formatter:
         is equal to index.
 
         """
-        text_length = 0
-        text = []
-        key_combinations = []
-        previous_atom = None
+        rendering = _Rendering()
         for translation in translations:
-            
-            if self._get_engine_command(translation):
-                continue
-            # Reduce the translation to atoms. An atom is in
-            # irreducible string that is either entirely a single meta
-            # command or entirely text containing no meta commands.
-            if translation.english is not None:
-                to_atomize = translation.english
-                if to_atomize.isdigit():
-                    to_atomize = self._apply_glue(to_atomize)
-                atoms = META_RE.findall(to_atomize)
+            self._render_translation(translation, rendering)
+        return (''.join(rendering.text), rendering.key_combinations)
+
+    def _render_translation(self, translation, rendering):
+        """Add the printable text of a Translation object to a rendering.
+
+        Arguments:
+
+        translation -- A Translation object.
+
+        rendering -- The rendering of the translations before it.
+
+        """
+        if self._get_engine_command(translation):
+            return
+        text = rendering.text
+        key_combinations = rendering.key_combinations
+        length = rendering.length
+        text_length = rendering.text_length
+        previous_meta = rendering.previous_meta
+
+        # Reduce the translation to atoms, see parse_atoms.
+        if translation.english is not None:
+            atoms = self.atom_cache.get_atoms(translation.english)
+        else:
+            to_atomize = translation.rtfcre
+            if to_atomize.isdigit():
+                to_atomize = _apply_glue(to_atomize)
+            atoms = [_parse_atom(to_atomize)]
+        for atom_meta, value in atoms:
+            if text:
+                space = SPACE
             else:
-                to_atomize = translation.rtfcre
-                if to_atomize.isdigit():
-                    to_atomize = self._apply_glue(to_atomize)
-                atoms = [to_atomize]
-            for atom in atoms:
-                atom = atom.strip()
-                if text:
+                space = NO_SPACE
+            if atom_meta is not None:
+                meta = value
+                english = meta
+                space = NO_SPACE  # Correct for most meta commands.
+                old_text = ''
+                if meta == META_ED_SUFFIX:
+                    if text:
+                        old_text = text.pop()
+                        english = orthography.add_ed_suffix(old_text)
+                elif meta == META_ER_SUFFIX:
+                    if text:
+                        old_text = text.pop()
+                        english = orthography.add_er_suffix(old_text)
+                elif meta == META_ING_SUFFIX:
+                    if text:
+                        old_text = text.pop()
+                        english = orthography.add_ing_suffix(old_text)
+                elif meta in META_COMMAS or meta in META_STOPS:
+                    pass  # Space is already deleted.
+                elif meta == META_PLURALIZE:
+                    if text:
+                        old_text = text.pop()
+                        english = orthography.pluralize_with_s(old_text)
+                elif meta.startswith(META_GLUE_FLAG):
+                    english = meta[1:]
+                    if (previous_meta is None or
+                        not previous_meta.startswith(META_GLUE_FLAG)):
+                        space = SPACE
+                elif meta.startswith(META_ATTACH_FLAG):
+                    english = meta[1:]
+                    if english.endswith(META_ATTACH_FLAG):
+                        english = english[:-1]
+                elif meta.endswith(META_ATTACH_FLAG):
                     space = SPACE
-                else:
+                    english = meta[:-1]
+                elif meta == META_CAPITALIZE:
+                    english = NO_SPACE
+                elif meta.startswith(META_KEY_COMBINATION):
+                    english = NO_SPACE
+                    combo = meta[1:]
+                    key_combinations.append((text_length, combo))
+                    text_length += 1
+                length -= len(old_text)
+                text_length -= len(old_text)
+            else:
+                english = value
+
+            # Check if the previous atom is a meta command that
+            # influences the next atom, namely this atom.
+            if previous_meta is not None:
+                if previous_meta in META_STOPS:
+                    space = STOP_SPACE
+                    english = english.capitalize()
+                elif previous_meta == META_CAPITALIZE:
                     space = NO_SPACE
-                meta = self._get_meta(atom)
-                if meta is not None:
-                    meta = self._unescape_atom(meta)
-                    english = meta
-                    space = NO_SPACE  # Correct for most meta commands.
-                    old_text = ''
-                    if meta == META_ED_SUFFIX:
-                        if text:
-                            old_text = text.pop()
-                            english = orthography.add_ed_suffix(old_text)
-                    elif meta == META_ER_SUFFIX:
-                        if text:
-                            old_text = text.pop()
-                            english = orthography.add_er_suffix(old_text)
-                    elif meta == META_ING_SUFFIX:
-                        if text:
-                            old_text = text.pop()
-                            english = orthography.add_ing_suffix(old_text)
-                    elif meta in META_COMMAS or meta in META_STOPS:
-                        pass  # Space is already deleted.
-                    elif meta == META_PLURALIZE:
-                        if text:
-                            old_text = text.pop()
-                            english = orthography.pluralize_with_s(old_text)
-                    elif meta.startswith(META_GLUE_FLAG):
-                        english = meta[1:]
-                        previous_meta = self._get_meta(previous_atom)
-                        if (previous_meta is None or
-                            not previous_meta.startswith(META_GLUE_FLAG)):
-                            space = SPACE
-                    elif meta.startswith(META_ATTACH_FLAG):
-                        english = meta[1:]
-                        if english.endswith(META_ATTACH_FLAG):
-                            english = english[:-1]
-                    elif meta.endswith(META_ATTACH_FLAG):
-                        space = SPACE
-                        english = meta[:-1]
-                    elif meta == META_CAPITALIZE:
-                        english = NO_SPACE
-                    elif meta.startswith(META_KEY_COMBINATION):
-                        english = NO_SPACE
-                        combo = meta[1:]
-                        key_combinations.append((text_length, combo))
-                        text_length += 1
-                    text_length -= len(old_text)
-                else:
-                    english = self._unescape_atom(atom)
-
-                # Check if the previous atom is a meta command that
-                # influences the next atom, namely this atom.
-                previous_meta = self._get_meta(previous_atom)
-                if previous_meta is not None:
-                    if previous_meta in META_STOPS:
-                        space = STOP_SPACE
-                        english = english.capitalize()
-                    elif previous_meta == META_CAPITALIZE:
-                        space = NO_SPACE
-                        english = english.capitalize()
-                    elif previous_meta.endswith(META_ATTACH_FLAG):
-                        space = NO_SPACE
-                    elif previous_meta.startswith(META_KEY_COMBINATION):
-                        space = NO_SPACE
-
-                new_text = space + english
-                text_length += len(new_text)
-                text.append(new_text)
-                previous_atom = atom
-
-        return (''.join(text), key_combinations)
-
-    def _get_meta(self, atom):
-        # Return the meta command, if any, without surrounding meta markups. 
-        if (atom is not None and
-            atom.startswith(META_START) and
-            atom.endswith(META_END)):
-            return atom[1:-1]
-        return None
+                    english = english.capitalize()
+                elif previous_meta.endswith(META_ATTACH_FLAG):
+                    space = NO_SPACE
+                elif previous_meta.startswith(META_KEY_COMBINATION):
+                    space = NO_SPACE
+
+            new_text = space + english
+            length += len(new_text)
+            text_length += len(new_text)
+            text.append(new_text)
+            previous_meta = atom_meta
 
-    def _unescape_atom(self, atom):
-        # Replace escaped meta markups with unescaped meta markups.
-        return atom.replace(META_ESC_START, META_START).replace(META_ESC_END,
-                                                                META_END)
+        rendering.length = length
+        rendering.text_length = text_length
+        rendering.previous_meta = previous_meta
 
     def _get_engine_command(self, translation):
         # Return the steno engine command, if any, represented by the
@@ -300,7 +591,3 @@ class Formatter:
             cmd.endswith(META_END)):
             return cmd[len(META_COMMAND) + 1:-1]
         return None
-
-    def _apply_glue(self, s):
-        # Mark the given string as a glue stroke.
-        return META_START + META_GLUE_FLAG + s + META_END
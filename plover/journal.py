@@ -0,0 +1,310 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""An append-only binary journal of strokes and translations.
+
+The journal replaces formatting a log line for every stroke and
+translation. Strokes and translations are timestamped and queued by
+the thread reading the machine, and a writer thread encodes and writes
+them in batches.
+
+A journal starts with a header holding the time it was created, and
+is followed by fixed size records:
+
+timestamp -- Microseconds since the journal was created, never less
+than the timestamp before it.
+
+key_mask -- The steno keys of a stroke, as a bitmask of
+plover.steno.STENO_KEY_BITS.
+
+translation_id -- The translation emitted or undone.
+
+kind -- STROKE, TRANSLATION, CORRECTION or DEFINITION.
+
+A DEFINITION record gives the text of a translation the first time its
+id is used. Its key_mask is the length of the text, which follows it:
+the RTF/CRE string and, unless the translation is untranslated, a NUL
+and the English, both UTF-8. An id is only defined for the rest of the
+session that used it, so a journal must be read in order.
+
+The translations a stroke causes follow it. Journals can be read
+quickly with JournalReader, which memory maps the file.
+
+"""
+
+import collections
+import mmap
+import os
+import struct
+import threading
+import time
+
+from plover.steno import STENO_KEY_BITS
+
+JOURNAL_MAGIC = 'PLVJ'
+JOURNAL_VERSION = 1
+HEADER = struct.Struct('<4sB3xd')
+RECORD = struct.Struct('<QIIB3x')
+
+STROKE = 1
+TRANSLATION = 2
+CORRECTION = 3
+DEFINITION = 4
+
+# Seconds between writes of the queued records.
+FLUSH_INTERVAL = 1.0
+
+# A journal at least this size when opened is moved aside, replacing
+# the one moved aside before.
+JOURNAL_MAX_BYTES = 100000000
+ROTATED_EXTENSION = '.1'
+
+_STENO_KEYS_BY_BIT = sorted(STENO_KEY_BITS, key=STENO_KEY_BITS.get)
+
+JournalRecord = collections.namedtuple('JournalRecord',
+                                       ['kind', 'timestamp', 'steno_keys',
+                                        'rtfcre', 'english'])
+
+
+def is_journal(path):
+    """Return True if the file at path is a journal."""
+    with open(path, 'rb') as f:
+        return f.read(len(JOURNAL_MAGIC)) == JOURNAL_MAGIC
+
+
+def read_strokes(path):
+    """Read the strokes in a journal.
+
+    Returns a list of strokes in the form read_stroke_log of
+    plover.machine.replay returns, so journals can be replayed.
+
+    """
+    reader = JournalReader(path)
+    try:
+        return [(record.timestamp, list(record.steno_keys))
+                for record in reader if record.kind == STROKE]
+    finally:
+        reader.close()
+
+
+class JournalReader :
+    """Iterates over the records of a journal.
+
+    Records are JournalRecords, with the timestamp in seconds since
+    the epoch and the steno keys in steno order. The DEFINITION records
+    are read but not returned. A record cut short at the end of the
+    file, as when writing was interrupted, ends the journal.
+
+    """
+
+    def __init__(self, path):
+        """Open a journal.
+
+        Arguments:
+
+        path -- The path of a journal written by JournalWriter.
+
+        Raises ValueError if the file is not a journal.
+
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError('Not a stroke journal: %s' % path)
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.start_time = HEADER.unpack_from(self._data)
+        if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION:
+            self._data.close()
+            raise ValueError('Not a stroke journal: %s' % path)
+        # The length of the whole records, set once they are all read.
+        self.valid_length = None
+
+    def iter_raw(self):
+        """Iterate over the records without decoding them.
+
+        Yields tuples of the kind, the timestamp in microseconds since
+        the journal was created, the key mask and the RTF/CRE and
+        English of the translation, or None for strokes.
+
+        """
+        data = self._data
+        end = len(data)
+        offset = HEADER.size
+        definitions = {}
+        unpack_from = RECORD.unpack_from
+        record_size = RECORD.size
+        while offset + record_size <= end:
+            timestamp, key_mask, translation_id, kind = unpack_from(data,
+                                                                    offset)
+            if kind == DEFINITION:
+                text_end = offset + record_size + key_mask
+                if text_end > end:
+                    break
+                text = data[offset + record_size:text_end].decode('utf-8')
+                rtfcre, sep, english = text.partition(u'\0')
+                definitions[translation_id] = (rtfcre,
+                                               english if sep else None)
+                offset = text_end
+                continue
+            offset += record_size
+            if kind == STROKE:
+                yield kind, timestamp, key_mask, None
+            else:
+                yield kind, timestamp, key_mask, definitions[translation_id]
+        self.valid_length = offset
+
+    def __iter__(self):
+        keys_by_mask = {}
+        start_time = self.start_time
+        for kind, timestamp, key_mask, translation in self.iter_raw():
+            steno_keys = keys_by_mask.get(key_mask)
+            if steno_keys is None:
+                steno_keys = tuple([key for key in _STENO_KEYS_BY_BIT
+                                    if key_mask & STENO_KEY_BITS[key]])
+                keys_by_mask[key_mask] = steno_keys
+            rtfcre, english = translation or (None, None)
+            yield JournalRecord(kind, start_time + timestamp / 1000000.0,
+                                steno_keys, rtfcre, english)
+
+    def close(self):
+        """Unmap the journal."""
+        self._data.close()
+
+
+class JournalWriter(threading.Thread):
+    """Appends strokes and translations to a journal.
+
+    Register on_steno_keys with the machine before the translator is
+    created, so that a stroke is journaled before its translations,
+    and on_translation with the translator. Both only timestamp and
+    queue what they are given; a background thread writes the queue
+    every flush interval, and when the journal is closed.
+
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL,
+                 max_bytes=JOURNAL_MAX_BYTES):
+        """Open a journal for appending, creating it if needed.
+
+        Arguments:
+
+        path -- The path of the journal.
+
+        flush_interval -- Seconds between writes of the queued records.
+
+        max_bytes -- A journal at least this size is moved aside to
+        path + ROTATED_EXTENSION and a new one started.
+
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.path = path
+        self.flush_interval = flush_interval
+        self._last_timestamp = 0
+        self.start_time = self._open(max_bytes)
+        self._queue = collections.deque()
+        self._translation_ids = {}
+        self._closing = threading.Event()
+        self.written_count = 0
+        self.start()
+
+    def _open(self, max_bytes):
+        # Returns the creation time of the journal.
+        if os.path.isfile(self.path):
+            if os.path.getsize(self.path) >= max_bytes:
+                rotated = self.path + ROTATED_EXTENSION
+                if os.path.exists(rotated):
+                    os.remove(rotated)
+                os.rename(self.path, rotated)
+            else:
+                try:
+                    reader = JournalReader(self.path)
+                except ValueError:
+                    # Empty, or not a journal; write over it.
+                    pass
+                else:
+                    for record in reader.iter_raw():
+                        self._last_timestamp = record[1]
+                    start_time = reader.start_time
+                    valid_length = reader.valid_length
+                    reader.close()
+                    self._file = open(self.path, 'r+b')
+                    # Drop any record cut short.
+                    self._file.truncate(valid_length)
+                    self._file.seek(valid_length)
+                    return start_time
+        start_time = time.time()
+        self._file = open(self.path, 'wb')
+        self._file.write(HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION,
+                                     start_time))
+        self._file.flush()
+        return start_time
+
+    def on_steno_keys(self, steno_keys):
+        """Queue a stroke. A machine callback.
+
+        Keys not in plover.steno.STENO_KEY_BITS, such as the function
+        keys of some machines, are left out.
+
+        """
+        key_mask = 0
+        for key in steno_keys:
+            key_mask |= STENO_KEY_BITS.get(key, 0)
+        self._queue.append((STROKE, time.time(), key_mask, None))
+
+    def on_translation(self, translation, overflow):
+        """Queue a translation. A translator callback."""
+        if translation.is_correction:
+            kind = CORRECTION
+        else:
+            kind = TRANSLATION
+        self._queue.append((kind, time.time(), 0,
+                            (translation.rtfcre, translation.english)))
+
+    def run(self):
+        """Overrides base class run method. Do not call directly."""
+        while not self._closing.isSet():
+            self._closing.wait(self.flush_interval)
+            self._write_queue()
+
+    def _write_queue(self):
+        queue = self._queue
+        if not queue:
+            return
+        start_time = self.start_time
+        translation_ids = self._translation_ids
+        last_timestamp = self._last_timestamp
+        pack = RECORD.pack
+        chunks = []
+        count = 0
+        while queue:
+            kind, timestamp, key_mask, translation = queue.popleft()
+            timestamp = max(last_timestamp,
+                            int((timestamp - start_time) * 1000000))
+            last_timestamp = timestamp
+            translation_id = 0
+            if translation is not None:
+                translation_id = translation_ids.get(translation)
+                if translation_id is None:
+                    translation_id = len(translation_ids) + 1
+                    translation_ids[translation] = translation_id
+                    rtfcre, english = translation
+                    text = rtfcre
+                    if english is not None:
+                        text += u'\0' + english
+                    text = text.encode('utf-8')
+                    chunks.append(pack(timestamp, len(text), translation_id,
+                                       DEFINITION))
+                    chunks.append(text)
+            chunks.append(pack(timestamp, key_mask, translation_id, kind))
+            count += 1
+        self._last_timestamp = last_timestamp
+        self._file.write(''.join(chunks))
+        self._file.flush()
+        self.written_count += count
+
+    def close(self):
+        """Write the queued records and close the journal."""
+        self._closing.set()
+        self.join()
+        self._write_queue()
+        self._file.close()
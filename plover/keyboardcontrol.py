@@ -23,6 +23,7 @@ http://tronche.com/gui/x/xlib/input/keyboard-encoding.html
 
 """
 
+import struct
 import sys
 import threading
 
@@ -35,6 +36,15 @@ but could not be found."
 
 keyboard_capture_instances = []
 
+# Every core event is 32 bytes. A key event's type and keycode are its
+# first two bytes and its modifiers are the 16 bits at offset 28, in the
+# byte order of the display, which python-xlib makes native.
+EVENT_SIZE = 32
+KEY_EVENT_STRUCT = struct.Struct('=BB26xH')
+SEND_EVENT_MASK = 0x80
+
+_event_field = rq.EventField(None)
+
 class KeyboardCapture(threading.Thread):
     """Listen to keyboard press and release events."""
     
@@ -51,7 +61,8 @@ class KeyboardCapture(threading.Thread):
         # Get references to the display.
         self.local_display = display.Display()
         self.record_display = display.Display()
-        
+        self.key_event_cache = KeyEventCache(self.local_display)
+
         
     def run(self):
         
@@ -67,7 +78,8 @@ class KeyboardCapture(threading.Thread):
                                    'core_replies': (0, 0),
                                    'ext_requests': (0, 0, 0, 0),
                                    'ext_replies': (0, 0, 0, 0),
-                                   'delivered_events': (0, 0),
+                                   'delivered_events': (X.MappingNotify,
+                                                        X.MappingNotify),
                                    'device_events': (X.KeyPress, X.KeyRelease),
                                    'errors': (0, 0),
                                    'client_started': False,
@@ -110,25 +122,33 @@ class KeyboardCapture(threading.Thread):
             # Not an event.
             return
         data = reply.data
-        while len(data):
-            event, data = rq.EventField(None).parse_binary_value(data, \
-                                       self.record_display.display, None, None)
-            keycode = event.detail
-            modifiers = event.state
-            keysym = self.local_display.keycode_to_keysym(keycode, modifiers)
-            key_event = XKeyEvent(keycode, modifiers, keysym)
+        key_event_cache = self.key_event_cache
+        # Unpack the fields needed from each event in place, rather than
+        # parsing every event into an object.
+        for offset in xrange(0, len(data) - EVENT_SIZE + 1, EVENT_SIZE):
+            event_type, keycode, modifiers = \
+                KEY_EVENT_STRUCT.unpack_from(data, offset)
+            event_type &= ~SEND_EVENT_MASK
+            if event_type == X.MappingNotify:
+                mapping_notify, rest = _event_field.parse_binary_value(
+                    data[offset:offset + EVENT_SIZE],
+                    self.record_display.display, None, None)
+                key_event_cache.mapping_changed(mapping_notify)
+                continue
             # Either ignore the event...
             if self.key_events_to_ignore:
                 ignore_keycode, ignore_event_type = self.key_events_to_ignore[0]
                 if (keycode == ignore_keycode and
-                    event.type == ignore_event_type):
+                    event_type == ignore_event_type):
                     self.key_events_to_ignore.pop(0)
                     continue
             # ...or pass it on to a callback method.
-            if event.type == X.KeyPress:
-                self.key_down(key_event)
-            elif event.type == X.KeyRelease:
-                self.key_up(key_event)
+            if event_type == X.KeyPress:
+                self.key_down(key_event_cache.get_key_event(keycode,
+                                                            modifiers))
+            elif event_type == X.KeyRelease:
+                self.key_up(key_event_cache.get_key_event(keycode,
+                                                          modifiers))
 
     def ignore_key_events(self, key_events):
         """A sequence of keycode, event type tuples to ignore.
@@ -344,6 +364,74 @@ class KeyboardEmulation:
         return (None, None)
 
 
+class KeyEventCache:
+    """The XKeyEvent of each keycode and modifiers, made on first use.
+
+    A chord presses many keys at once, and looking up the keysym and
+    making an event for each of them is slow next to a dictionary
+    lookup. Events are shared between key presses, so callbacks must
+    not change them.
+
+    A cache belongs to a display, and is cleared when the display's
+    keyboard mapping changes.
+
+    """
+
+    def __init__(self, display):
+        """Prepare to cache key events.
+
+        Argument:
+
+        display -- The Xlib.display.Display to look up keysyms with.
+
+        """
+        self.display = display
+        self._key_events = {}
+        self._mapping_changes = {}
+
+    def get_key_event(self, keycode, modifiers):
+        """Return the event for a keycode pressed with modifiers.
+
+        Arguments:
+
+        keycode -- The keycode that identifies a physical key.
+
+        modifiers -- An 8-bit mask of the active modifiers.
+
+        """
+        key_event = self._key_events.get((keycode, modifiers))
+        if key_event is None:
+            if self._mapping_changes:
+                self._refresh_mapping()
+            keysym = self.display.keycode_to_keysym(keycode, modifiers)
+            key_event = XKeyEvent(keycode, modifiers, keysym)
+            self._key_events[keycode, modifiers] = key_event
+        return key_event
+
+    def mapping_changed(self, mapping_notify):
+        """Forget the events made with the old keyboard mapping.
+
+        The display's keymap is refreshed when next needed. A
+        MappingNotify is recorded for every client it is delivered to,
+        so the keymap is only refreshed once for each change.
+
+        Argument:
+
+        mapping_notify -- An Xlib.protocol.event.MappingNotify event.
+
+        """
+        if mapping_notify.request != X.MappingKeyboard:
+            return
+        self._key_events.clear()
+        self._mapping_changes[mapping_notify.first_keycode,
+                              mapping_notify.count] = mapping_notify
+
+    def _refresh_mapping(self):
+        for mapping_notify in self._mapping_changes.values():
+            self.display.refresh_keyboard_mapping(mapping_notify)
+        self._mapping_changes.clear()
+
+
 class XKeyEvent:
     """A class to hold all the information about a key event."""
     
@@ -7,9 +7,10 @@ Each stenotype machine description must define a Stenotype class that
 has start_capture, stop_capture, and add_callback methods.
 
 """
-__all__ = ['geminipr', 'sidewinder', 'txbolt']
+__all__ = ['geminipr', 'replay', 'sidewinder', 'txbolt']
 
 supported = {'Microsoft Sidewinder X4' : 'plover.machine.sidewinder',
              'Gemini PR' : 'plover.machine.geminipr',
-             'TX Bolt': 'plover.machine.txbolt',}
+             'TX Bolt': 'plover.machine.txbolt',
+             'Stroke Replay': 'plover.machine.replay',}
 
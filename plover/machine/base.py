@@ -3,6 +3,8 @@
 
 """Base classes for machine types. Do not use directly."""
 
+import os
+import select
 import serial
 import threading
 from plover.exception import SerialPortException
@@ -50,15 +52,29 @@ class SerialStenotypeBase(StenotypeBase, threading.Thread):
     stenotype interface: start_capture, stop_capture, and
     add_callback.
 
+    The thread sleeps until data arrives on the serial port, passes it
+    to _on_data, and calls _on_idle when no data has arrived for
+    idle_timeout seconds. Subclasses decode the data in those methods
+    rather than reading the port themselves.
+
     """
 
     CONFIG_CLASS = serial.Serial
 
-    def __init__(self, **kwargs):
+    # Seconds without data after which _on_idle is called, or None to
+    # wait for data indefinitely.
+    IDLE_TIMEOUT = None
+
+    def __init__(self, idle_timeout=None, **kwargs):
         """Monitor the stenotype over a serial port.
 
-        Keyword arguments are the same as the keyword arguments for a
-        serial.Serial object.
+        Arguments:
+
+        idle_timeout -- Seconds without data after which _on_idle is
+        called. Defaults to the IDLE_TIMEOUT of the class.
+
+        Other keyword arguments are the same as the keyword arguments
+        for a serial.Serial object.
 
         """
         try:
@@ -70,9 +86,65 @@ class SerialStenotypeBase(StenotypeBase, threading.Thread):
         threading.Thread.__init__(self)
         StenotypeBase.__init__(self)
         self.finished = threading.Event()
-        
+        if idle_timeout is None:
+            idle_timeout = self.IDLE_TIMEOUT
+        self.idle_timeout = idle_timeout
+        # A pipe written to by stop_capture to wake the thread, where
+        # serial ports can be waited on with select. Elsewhere (Windows)
+        # reads block until the idle timeout.
+        if os.name == 'posix' and hasattr(self.serial_port, 'fileno'):
+            self._wake_read, self._wake_write = os.pipe()
+        else:
+            self._wake_read = self._wake_write = None
+            if idle_timeout is not None:
+                self.serial_port.timeout = idle_timeout
+
     def run(self):
-        """This method should be overridden by a subclass."""
+        """Overrides base class run method. Do not call directly."""
+        try:
+            while not self.finished.isSet():
+                data = self._read()
+                if self.finished.isSet():
+                    break
+                if data:
+                    self._on_data(data)
+                else:
+                    self._on_idle()
+        except (EnvironmentError, select.error, serial.SerialException,
+                ValueError):
+            # The port is closed under a blocked read when capture
+            # stops without a wake pipe.
+            if not self.finished.isSet():
+                raise
+
+    def _read(self):
+        """Wait for data and return it, or '' after the idle timeout."""
+        if self._wake_read is None:
+            data = self.serial_port.read(1)
+            if data:
+                data += self.serial_port.read(self.serial_port.inWaiting())
+            return data
+        port_fd = self.serial_port.fileno()
+        readable = select.select([port_fd, self._wake_read], [], [],
+                                 self.idle_timeout)[0]
+        if port_fd not in readable:
+            return ''
+        # A readable port with nothing waiting has been disconnected,
+        # which reading a byte reports.
+        return self.serial_port.read(self.serial_port.inWaiting() or 1)
+
+    def _on_data(self, data):
+        """Decode data received. Should be overridden by a subclass.
+
+        Arguments:
+
+        data -- The bytes (a string) received since the last call.
+
+        """
+        pass
+
+    def _on_idle(self):
+        """Called when no data has arrived for idle_timeout seconds."""
         pass
 
     def start_capture(self):
@@ -83,4 +155,13 @@ class SerialStenotypeBase(StenotypeBase, threading.Thread):
     def stop_capture(self):
         """Stop listening for output from the stenotype machine."""
         self.finished.set()
+        if self._wake_write is not None:
+            # Wait for the thread to stop reading before the port is
+            # closed under it.
+            os.write(self._wake_write, '\0')
+            if self.isAlive() and threading.currentThread() is not self:
+                self.join()
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+            self._wake_read = self._wake_write = None
         self.serial_port.close()
@@ -21,6 +21,86 @@ STENO_KEY_CHART = ("Fn","#","#","#","#","#","#",
 
 BYTES_PER_STROKE = 6
 
+# Bit of a packet byte marking the first byte of a packet.
+FIRST_BYTE_FLAG = 0x80
+
+
+def _get_keys_by_byte():
+    # For each byte of a packet, the steno keys of each of the 128
+    # values of its seven data bits, in STENO_KEY_CHART order.
+    keys_by_byte = []
+    for i in range(BYTES_PER_STROKE):
+        keys_by_value = []
+        for value in range(FIRST_BYTE_FLAG):
+            keys_by_value.append(tuple([STENO_KEY_CHART[i*7 + j-1]
+                                        for j in range(1,8)
+                                        if value & (0x80 >> j)]))
+        keys_by_byte.append(tuple(keys_by_value))
+    return tuple(keys_by_byte)
+
+KEYS_BY_BYTE = _get_keys_by_byte()
+
+
+class PacketDecoder :
+    """Converts a stream of Gemini PR bytes to steno strokes.
+
+    Bytes can arrive in any size of chunk: several packets at once, or
+    a packet split across chunks. A packet which is cut short (a byte
+    marked as the first of a packet arriving before six bytes have)
+    is dropped, and decoding resumes from the byte that cut it short,
+    so no complete packet after it is lost. Bytes before the first
+    byte of a packet are dropped as well. The number of bytes dropped
+    is kept in discarded_bytes.
+
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.discarded_bytes = 0
+
+    def decode(self, data):
+        """Decode the complete packets received so far.
+
+        Arguments:
+
+        data -- The bytes (a string) received since the last call. An
+        incomplete packet at the end is kept until the rest of it
+        arrives.
+
+        Returns a list of strokes, each a list of steno keys.
+
+        """
+        buffer = self.buffer
+        buffer.extend(data)
+        b0, b1, b2, b3, b4, b5 = KEYS_BY_BYTE
+        strokes = []
+        start = 0
+        end = len(buffer)
+        while True:
+            # Find the first byte of a packet.
+            while start < end and not buffer[start] & FIRST_BYTE_FLAG:
+                start += 1
+                self.discarded_bytes += 1
+            if end - start < BYTES_PER_STROKE:
+                break
+            packet = buffer[start:start + BYTES_PER_STROKE]
+            if ((packet[1] | packet[2] | packet[3] | packet[4] | packet[5]) &
+                FIRST_BYTE_FLAG):
+                # Cut short, so start again from the next first byte.
+                for i in range(1, BYTES_PER_STROKE):
+                    if packet[i] & FIRST_BYTE_FLAG:
+                        break
+                start += i
+                self.discarded_bytes += i
+                continue
+            strokes.append(list(b0[packet[0] & 0x7f] + b1[packet[1]] +
+                                b2[packet[2]] + b3[packet[3]] +
+                                b4[packet[4]] + b5[packet[5]]))
+            start += BYTES_PER_STROKE
+        del buffer[:start]
+        return strokes
+
+
 class Stenotype(plover.machine.base.SerialStenotypeBase):
     """Standard stenotype interface for a Gemini PR machine.
 
@@ -29,33 +109,13 @@ class Stenotype(plover.machine.base.SerialStenotypeBase):
     add_callback.
 
     """
-    
-    def run(self):
-        """Overrides base class run method. Do not call directly."""
-        while not self.finished.isSet() :
-
-            # Grab data from the serial port.
-            raw = self.serial_port.read(BYTES_PER_STROKE)
-            if not raw :
-                continue
-            
-            # XXX : work around for python 3.1 and python 2.6 differences
-            if isinstance(raw, str) :
-                raw = [ord(x) for x in raw]
-
-            # Make sure this is a valid steno stroke.
-            if not ((len(raw) == BYTES_PER_STROKE) and
-                    (raw[0] & 0x80) and
-                    (len([b for b in raw if b & 0x80]) == 1)):
-                serial_port.flushInput()
-                continue
-    
-            # Convert the raw to a list of steno keys.
-            steno_keys= []
-            for i, b in enumerate(raw):
-                for j in range(1,8):
-                    if (b & (0x80 >> j)):
-                        steno_keys.append(STENO_KEY_CHART[i*7 + j-1])
-                
-            # Notify all subscribers.
+
+    def __init__(self, **kwargs):
+        plover.machine.base.SerialStenotypeBase.__init__(self, **kwargs)
+        self._decoder = PacketDecoder()
+
+    def _on_data(self, data):
+        # Convert the packets to lists of steno keys and notify all
+        # subscribers.
+        for steno_keys in self._decoder.decode(data):
             self._notify(steno_keys)
@@ -0,0 +1,158 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Replays strokes from a stroke log as if written on a stenotype machine.
+
+The stroke log is either the journal Plover writes when stroke logging
+is enabled (see plover.journal) or a text log, as Plover used to write,
+in which each stroke is a line such as
+
+2012-03-01 09:30:02,125 Stroke(S- T- -E)
+
+Other lines, such as translations, are ignored. Strokes are replayed with
+the time between them as logged, sped up by a factor, or as fast as
+possible. This is useful to load test the rest of the steno pipeline, and
+to reproduce a user's session without a stenotype machine.
+
+"""
+
+import calendar
+import re
+import threading
+import time
+
+from plover import journal
+from plover.machine.base import StenotypeBase
+
+# A logged stroke: the time, to the millisecond, and the keys.
+STROKE_LOG_RE = re.compile(r'^(?:(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}) )?'
+                           r'Stroke\(([^)]*)\)\s*$')
+STROKE_LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Replay speed meaning as fast as possible.
+AS_FAST_AS_POSSIBLE = 0
+
+
+def read_stroke_log(log_file):
+    """Read the strokes in a stroke log.
+
+    Arguments:
+
+    log_file -- The path of a journal or text log written by Plover
+    with stroke logging enabled.
+
+    Returns a list of strokes, each a tuple of the time it was written
+    in seconds (or None if the line had no time) and a list of the
+    steno keys of the stroke.
+
+    """
+    if journal.is_journal(log_file):
+        return journal.read_strokes(log_file)
+    strokes = []
+    with open(log_file) as f:
+        for line in f:
+            match = STROKE_LOG_RE.search(line.rstrip('\r\n'))
+            if match is None:
+                continue
+            date, milliseconds, keys = match.groups()
+            if date is None:
+                timestamp = None
+            else:
+                # Only differences between times matter, so the time zone
+                # doesn't.
+                timestamp = (calendar.timegm(time.strptime(
+                                 date, STROKE_LOG_TIME_FORMAT)) +
+                             int(milliseconds) / 1000.0)
+            strokes.append((timestamp, keys.split()))
+    return strokes
+
+
+def write_stroke_log(log_file, strokes):
+    """Write strokes as a stroke log that can be replayed.
+
+    Arguments:
+
+    log_file -- The path to write the log to.
+
+    strokes -- A list of strokes, as returned by read_stroke_log.
+
+    """
+    with open(log_file, 'w') as f:
+        for timestamp, steno_keys in strokes:
+            if timestamp is None:
+                f.write('Stroke(%s)\n' % ' '.join(steno_keys))
+            else:
+                milliseconds = int(round(timestamp * 1000))
+                date = time.strftime(STROKE_LOG_TIME_FORMAT,
+                                     time.gmtime(milliseconds // 1000))
+                f.write('%s,%03d Stroke(%s)\n' % (date, milliseconds % 1000,
+                                                  ' '.join(steno_keys)))
+
+
+class Stenotype(StenotypeBase, threading.Thread):
+    """Stenotype interface replaying a stroke log.
+
+    This class implements the three methods necessary for a standard
+    stenotype interface: start_capture, stop_capture, and
+    add_callback.
+
+    """
+
+    def __init__(self, log_file=None, speed=1.0, strokes=None):
+        """Prepare to replay strokes.
+
+        Arguments:
+
+        log_file -- The path of a stroke log to replay. See
+        read_stroke_log.
+
+        speed -- How many times faster than logged to replay the
+        strokes. 1 replays them as they were written, and
+        AS_FAST_AS_POSSIBLE (0) doesn't wait between strokes.
+
+        strokes -- A list of strokes to replay instead of a log file,
+        as returned by read_stroke_log.
+
+        """
+        threading.Thread.__init__(self)
+        StenotypeBase.__init__(self)
+        self.daemon = True
+        if strokes is None:
+            if log_file is None:
+                raise ValueError('A stroke log or strokes must be given.')
+            strokes = read_stroke_log(log_file)
+        self.strokes = strokes
+        self.speed = float(speed)
+        if self.speed < 0:
+            raise ValueError('Replay speed must not be negative: %s' % speed)
+        self.finished = threading.Event()
+        self.replayed_count = 0
+
+    def run(self):
+        """Overrides base class run method. Do not call directly."""
+        start = time.time()
+        first_timestamp = None
+        for timestamp, steno_keys in self.strokes:
+            if self.finished.isSet():
+                break
+            if self.speed != AS_FAST_AS_POSSIBLE and timestamp is not None:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                due = start + (timestamp - first_timestamp) / self.speed
+                delay = due - time.time()
+                if delay > 0:
+                    # Wakes early if capture is stopped.
+                    self.finished.wait(delay)
+                    if self.finished.isSet():
+                        break
+            self._notify(steno_keys)
+            self.replayed_count += 1
+
+    def start_capture(self):
+        """Begin replaying strokes."""
+        self.finished.clear()
+        self.start()
+
+    def stop_capture(self):
+        """Stop replaying strokes."""
+        self.finished.set()
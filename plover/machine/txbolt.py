@@ -24,12 +24,79 @@ import plover.machine.base
 # seen. Additionally, if there is no activity then the machine will
 # send a zero byte every few seconds.
 
+# A stroke that doesn't end with the last set is only known to have
+# ended when the next stroke starts, so a stroke is also ended when no
+# bytes have arrived for this many seconds. The bytes of a stroke are
+# sent together, so this only needs to be longer than the gaps a USB
+# serial adapter can put between them.
+DEFAULT_STROKE_END_TIMEOUT = 0.03
+
+# The set of a byte is in its top two bits.
+KEY_SET_SHIFT = 6
+LAST_KEY_SET = 3
+
 STENO_KEY_CHART = ("S-", "T-", "K-", "P-", "W-", "H-",  # 00
                    "R-", "A-", "O-", "*", "-E", "-U",   # 01
                    "-F", "-R", "-P", "-B", "-L", "-G",  # 10
                    "-T", "-S", "-D", "-Z", "#")         # 11
 
 
+class StrokeDecoder :
+    """Converts a stream of TX Bolt bytes to steno strokes.
+
+    A stroke ends when a byte of the same or an earlier set than the
+    last arrives (including a zero byte), or with a byte of the last
+    set. Otherwise the stroke is only complete when flush is called,
+    after no bytes have arrived for a while.
+
+    """
+
+    def __init__(self):
+        self._pressed_keys = []
+        self._last_key_set = 0
+
+    def decode(self, data):
+        """Decode the strokes completed by the bytes received.
+
+        Arguments:
+
+        data -- The bytes (a string) received since the last call.
+
+        Returns a list of strokes, each a list of steno keys.
+
+        """
+        strokes = []
+        for byte in bytearray(data):
+            key_set = byte >> KEY_SET_SHIFT
+            if key_set <= self._last_key_set and self._pressed_keys:
+                strokes.append(self._pressed_keys)
+                self._pressed_keys = []
+            self._last_key_set = key_set
+            # The last set has five keys, its byte starting 110.
+            for i in xrange(5 if key_set == LAST_KEY_SET else 6):
+                if (byte >> i) & 1:
+                    self._pressed_keys.append(
+                        STENO_KEY_CHART[(key_set * 6) + i])
+            if key_set == LAST_KEY_SET and self._pressed_keys:
+                strokes.append(self._pressed_keys)
+                self._pressed_keys = []
+        return strokes
+
+    def flush(self):
+        """Return the keys of the stroke in progress, ending it.
+
+        Returns a list of steno keys, or None if no keys have been
+        pressed.
+
+        """
+        if not self._pressed_keys:
+            return None
+        steno_keys = self._pressed_keys
+        self._pressed_keys = []
+        self._last_key_set = 0
+        return steno_keys
+
+
 class Stenotype(plover.machine.base.SerialStenotypeBase):
     """TX Bolt interface.
 
@@ -37,42 +104,22 @@ class Stenotype(plover.machine.base.SerialStenotypeBase):
     stenotype interface: start_capture, stop_capture, and
     add_callback.
 
+    The idle_timeout argument is the stroke end timeout, see
+    DEFAULT_STROKE_END_TIMEOUT.
+
     """
 
+    IDLE_TIMEOUT = DEFAULT_STROKE_END_TIMEOUT
+
     def __init__(self, **kwargs):
         plover.machine.base.SerialStenotypeBase.__init__(self, **kwargs)
-        self._reset_stroke_state()
-    
-    def _reset_stroke_state(self):
-        self._pressed_keys = []
-        self._last_key_set = 0
-        self._last_byte = 0
-
-    def _finish_stroke(self):
-        self._notify(self._pressed_keys)
-        self._reset_stroke_state()
-
-    def run(self):
-        """Overrides base class run method. Do not call directly."""
-        while not self.finished.isSet():
-            # Grab data from the serial port.
-            raw = self.serial_port.read(self.serial_port.inWaiting())
-            
-            # XXX : work around for python 3.1 and python 2.6 differences
-            if isinstance(raw, str):
-                raw = [ord(x) for x in raw]
-
-            if not raw and len(self._pressed_keys) > 0:
-                self._finish_stroke()
-                continue
-
-            for byte in raw:
-                key_set = byte >> 6
-                if (byte == 0 and self._last_byte != 0) or (key_set < self._last_key_set):
-                    self._finish_stroke()
-                else:
-                    self._last_key_set = key_set
-                    self._last_byte = byte
-                    for i in xrange(6):
-                        if (byte >> i) & 1:
-                            self._pressed_keys.append(STENO_KEY_CHART[(key_set * 6) + i])
+        self._decoder = StrokeDecoder()
+
+    def _on_data(self, data):
+        for steno_keys in self._decoder.decode(data):
+            self._notify(steno_keys)
+
+    def _on_idle(self):
+        steno_keys = self._decoder.flush()
+        if steno_keys is not None:
+            self._notify(steno_keys)
@@ -22,6 +22,8 @@ conversion algorithm.
 
 """
 
+import threading
+
 STENO_KEY_NUMBERS = { 'S-':'1-', 
                       'T-': '2-',
                       'P-': '3-',
@@ -60,7 +62,48 @@ STENO_KEY_ORDER = {"#": -1,
 STENO_KEYS = tuple(STENO_KEY_ORDER.keys())
 
 
-class Stroke :
+# Each steno key as a bit, in steno order, so a set of keys is an int.
+_STENO_KEYS_IN_ORDER = tuple(sorted(STENO_KEY_ORDER, key=STENO_KEY_ORDER.get))
+STENO_KEY_BITS = dict((key, 1 << bit)
+                      for bit, key in enumerate(_STENO_KEYS_IN_ORDER))
+
+# Formatted steno keys and RTF/CRE string of each stroke seen, keyed
+# by (bitmask, dictionary format).
+_formatted_strokes = {}
+
+
+def _format_stroke(key_mask, dictionary_format):
+    """Order steno keys, convert numbers and build the RTF/CRE string.
+
+    Arguments:
+
+    key_mask -- The steno keys of a stroke, as a bitmask of
+    STENO_KEY_BITS.
+
+    dictionary_format -- As for Stroke.
+
+    Returns a tuple of the steno keys and the RTF/CRE string.
+
+    """
+    steno_keys = [key for key in _STENO_KEYS_IN_ORDER
+                  if key_mask & STENO_KEY_BITS[key]]
+
+    # Convert strokes involving the number bar to numbers.
+    if '#' in steno_keys:
+        numeral = False
+        for i, e in enumerate(steno_keys):
+            if e in STENO_KEY_NUMBERS:
+                steno_keys[i] = STENO_KEY_NUMBERS[e]
+                numeral = True
+        if numeral:
+            steno_keys.remove('#')
+
+    # Convert the list of steno keys to the RTF/CRE format.
+    rtfcre = dictionary_format.toRTFCRE(steno_keys)
+    return tuple(steno_keys), rtfcre
+
+
+class Stroke(object) :
     """A standardized data model for stenotype machine strokes.
 
     This class standardizes the representation of a stenotype chord
@@ -73,7 +116,16 @@ class Stroke :
     combines the keys into a single string (called RTFCRE for
     historical reasons) according to a particular dictionary format.
 
+    A stroke is created for every chord a machine sends, so it is
+    kept small: the keys are held as a bitmask (key_mask), which is
+    also what strokes are compared by, and the ordered keys and
+    RTF/CRE string are only worked out the first time a chord is
+    seen.
+
     """
+
+    __slots__ = ('key_mask', 'steno_keys', 'dictionary_format', 'rtfcre',
+                 'is_correction')
         
     def __init__(self, steno_keys, dictionary_format) :
         """Create a steno stroke by formatting steno keys.
@@ -91,27 +143,19 @@ class Stroke :
         toRTFCRE method that takes in a sequence and returns a string.
         
         """
-
-        # Remove duplicate keys and save local versions of the input
-        # parameters.
-        self.steno_keys = list(set(steno_keys))
+        # Duplicate keys set the same bit.
+        key_mask = 0
+        for key in steno_keys:
+            key_mask |= STENO_KEY_BITS[key]
+        self.key_mask = key_mask
         self.dictionary_format = dictionary_format
 
-        # Order the steno keys so comparisons can be made.
-        self.steno_keys.sort(key=lambda x: STENO_KEY_ORDER[x])
-                
-        # Convert strokes involving the number bar to numbers.
-        if '#' in self.steno_keys:
-            numeral = False
-            for i, e in enumerate(self.steno_keys):
-                if e in STENO_KEY_NUMBERS:
-                    self.steno_keys[i] = STENO_KEY_NUMBERS[e]
-                    numeral = True
-            if numeral:
-                self.steno_keys.remove('#')
-
-        # Convert the list of steno keys to the RTF/CRE format.
-        self.rtfcre = self.dictionary_format.toRTFCRE(self.steno_keys)
+        formatted = _formatted_strokes.get((key_mask, dictionary_format))
+        if formatted is None:
+            formatted = _format_stroke(key_mask, dictionary_format)
+            _formatted_strokes[(key_mask, dictionary_format)] = formatted
+        # The ordered keys are shared between strokes, so a tuple.
+        self.steno_keys, self.rtfcre = formatted
 
         # Determine if this stroke is a correction stroke.
         self.is_correction = (self.rtfcre == '*')
@@ -121,13 +165,17 @@ class Stroke :
             prefix = '*'
         else :
             prefix = ''
-        return '%sStroke(%s : %s)' % (prefix, self.rtfcre, self.steno_keys)
+        return '%sStroke(%s : %s)' % (prefix, self.rtfcre, 
+                                      list(self.steno_keys))
     
     def __eq__(self, other):
-        return isinstance(other, Stroke) and self.steno_keys==other.steno_keys
+        return isinstance(other, Stroke) and self.key_mask == other.key_mask
 
     def __ne__(self, other):
         return not self.__eq__(other)
+
+    def __hash__(self):
+        return self.key_mask
     
     def __repr__(self):
         return str(self)
@@ -221,6 +269,13 @@ class Translator :
     Translation comprises two or more Strokes, at least the first of
     which is a valid Translation in and of itself.
 
+    A new Stroke can only change the Translations whose Strokes, with
+    the new Stroke added, begin a longer dictionary entry. The
+    Translator keeps track of those (usually very few) open
+    Translations using a prefix index of the dictionary, so each
+    Stroke is translated by extending them rather than by translating
+    the whole FIFO again.
+
     For example, consider the case in which the first Stroke can be
     translated as 'cat'. In this case, a Translation object
     representing 'cat' will be emitted as soon as the Stroke is
@@ -239,7 +294,8 @@ class Translator :
                  steno_machine,
                  dictionary,
                  dictionary_format,
-                 max_number_of_strokes=None):
+                 max_number_of_strokes=None,
+                 metadata=None):
         """Prepare to translate steno keys into dictionary string values.
 
         Arguments:
@@ -261,23 +317,82 @@ class Translator :
         dictionary argument. This value should generally be left
         unchanged from its default of None.
 
+        metadata -- None, or precomputed facts about the dictionary
+        argument: an object with a max_strokes attribute (the longest
+        sequence of strokes in the dictionary) and an is_prefix method
+        (whether a string of strokes begins a longer entry). Saves
+        scanning every key of the dictionary.
+
         """
         self.steno_machine = steno_machine
         self.strokes = []
         self.translations = []
         self.overflow = None
-        self.dictionary = dictionary
         self.dictionary_format = dictionary_format
         self.subscribers = []
-        if max_number_of_strokes is None :
-            max_number_of_strokes = 0
-            delimiter = dictionary_format.STROKE_DELIMITER
-            for rtfcre in dictionary.keys() :
-                max_number_of_strokes = max(max_number_of_strokes, 
-                                            len(rtfcre.split(delimiter)))
-        self.max_number_of_strokes = max_number_of_strokes
+        # Held while the FIFO is translated and while the dictionary is
+        # swapped, so a stroke is translated with one dictionary.
+        self._lock = threading.Lock()
+        self.set_dictionary(dictionary, max_number_of_strokes, metadata)
         self.steno_machine.add_callback(self.consume_steno_keys)
 
+    def set_dictionary(self, dictionary, max_number_of_strokes=None,
+                       metadata=None):
+        """Translate using a different dictionary from now on.
+
+        Arguments:
+
+        dictionary -- A dictionary that maps strings in RTF/CRE format
+        to English or meta command strings.
+
+        max_number_of_strokes -- As for the constructor. If None, the
+        longest sequence of strokes found in the dictionary argument
+        (but at least one, so an empty dictionary can be used until a
+        real one is available).
+
+        metadata -- As for the constructor.
+
+        A dictionary may also provide a has_prefix method, taking a
+        string and returning whether any key starts with it, which is
+        used in preference to metadata. Without either, the keys are
+        indexed to find which stroke sequences begin a longer entry.
+
+        Can be called from another thread while strokes are being
+        translated. The dictionary is prepared first, then swapped in
+        between strokes.
+
+        """
+        delimiter = self.dictionary_format.STROKE_DELIMITER
+        longest = 1
+        has_prefix = getattr(dictionary, 'has_prefix', None)
+        if metadata is not None :
+            longest = max(longest, metadata.max_strokes)
+        if has_prefix is not None :
+            is_prefix = lambda rtfcre: has_prefix(rtfcre + delimiter)
+            if max_number_of_strokes is None and metadata is None :
+                for rtfcre in dictionary.keys() :
+                    longest = max(longest, rtfcre.count(delimiter) + 1)
+        elif metadata is not None :
+            is_prefix = metadata.is_prefix
+        else :
+            prefixes = set()
+            for rtfcre in dictionary.keys() :
+                end = rtfcre.find(delimiter)
+                while end != -1 :
+                    prefixes.add(rtfcre[:end])
+                    end = rtfcre.find(delimiter, end + 1)
+                longest = max(longest, rtfcre.count(delimiter) + 1)
+            is_prefix = prefixes.__contains__
+        if max_number_of_strokes is None :
+            max_number_of_strokes = longest
+        with self._lock :
+            self.dictionary = dictionary
+            self.max_number_of_strokes = max_number_of_strokes
+            self._is_prefix = is_prefix
+            # Translations so far used the old dictionary, so the whole
+            # FIFO is translated again on the next stroke.
+            self._open_translations = None
+
     def consume_steno_keys(self, steno_keys):
         """Process the raw output from a Stenotype object.
 
@@ -304,41 +419,36 @@ class Translator :
         stroke -- The Stroke object to process.
 
         """
-        # If stroke buffer is full, discard all strokes of oldest
-        # translation to make room for the new stroke.
-        if stroke.is_correction and len(self.strokes) > 0:
-            self.strokes.pop()
-        self.overflow = None
-        if len(self.strokes) >= self.max_number_of_strokes:
-            self.overflow = self.translations.pop(0)
-            for s0 in self.overflow.strokes:
-                s1 = self.strokes.pop(0) 
-                if s0 != s1:
-                    raise(RuntimeError("Steno stroke buffers out of sync."))
-        if not stroke.is_correction:
-            self.strokes.append(stroke)
-
-        # Convert Strokes to Translations.  Strokes are converted
-        # oldest to newest and each Translation is constructed to use
-        # as many Strokes as possible. If a Translation with a proper
-        # dictionary entry can't be constructed, then a Translation
-        # containing only the first Stroke is created.
-        new_translations = []
-        n = 0 
-        while n != len(self.strokes):
-            unused = self.strokes[n:]
-            for i in range(len(unused),0,-1):
-                longest_translation = Translation(unused[:i], self.dictionary)
-                if longest_translation.english != None:
-                    break
+        with self._lock :
+            # If stroke buffer is full, discard all strokes of oldest
+            # translation to make room for the new stroke.
+            if stroke.is_correction and len(self.strokes) > 0:
+                self.strokes.pop()
+            self.overflow = None
+            if len(self.strokes) >= self.max_number_of_strokes:
+                self.overflow = self.translations.pop(0)
+                for s0 in self.overflow.strokes:
+                    s1 = self.strokes.pop(0) 
+                    if s0 != s1:
+                        raise(RuntimeError(
+                            "Steno stroke buffers out of sync."))
+                # The remaining translations are unchanged, as translation
+                # is greedy from the oldest stroke.
+                if self._open_translations is not None:
+                    self._open_translations = [
+                        (index - 1, rtfcre, length) for index, rtfcre, length
+                        in self._open_translations if index > 0]
+            if not stroke.is_correction:
+                self.strokes.append(stroke)
+
+            # Update translation buffer, but keep track of previous state.
+            old_translations = self.translations
+            if stroke.is_correction or self._open_translations is None:
+                new_translations = self._translate_strokes()
             else:
-                longest_translation = Translation(unused[0:1], self.dictionary)
-            new_translations.append(longest_translation)
-            n += len(longest_translation)
-
-        # Update translation buffer, but keep track of previous state.
-        old_translations = self.translations
-        self.translations = new_translations
+                new_translations = self._add_stroke(old_translations,
+                                                    len(self.strokes))
+            self.translations = new_translations
 
         # Compare old translations to the new translations and
         # reconcile them by emitting one or more tokens, where a token
@@ -366,6 +476,60 @@ class Translator :
                 for t in new_translations[len(old_translations):] :
                     self._emit_translation(t)
 
+    def _translate_strokes(self):
+        """Translate the whole Stroke FIFO from scratch.
+
+        Returns the list of Translations.
+
+        """
+        self._open_translations = []
+        translations = []
+        for end in range(1, len(self.strokes) + 1):
+            translations = self._add_stroke(translations, end)
+        return translations
+
+    def _add_stroke(self, translations, end):
+        """Extend translations of strokes before end by the stroke at end - 1.
+
+        Strokes are converted oldest to newest and each Translation is
+        constructed to use as many Strokes as possible. If a Translation
+        with a proper dictionary entry can't be constructed, then a
+        Translation containing only the first Stroke is created.
+
+        Only an open Translation (one whose strokes begin a longer
+        dictionary entry) can grow to include the new stroke. The oldest
+        one that does replaces itself and all newer Translations. If
+        none does, the new stroke is translated by itself.
+
+        Arguments:
+
+        translations -- The Translations of strokes before end - 1.
+
+        end -- The number of strokes in the FIFO to translate.
+
+        Returns the new list of Translations.
+
+        """
+        stroke = self.strokes[end - 1]
+        delimiter = self.dictionary_format.STROKE_DELIMITER
+        is_prefix = self._is_prefix
+        open_translations = []
+        for index, rtfcre, length in self._open_translations:
+            rtfcre = rtfcre + delimiter + stroke.rtfcre
+            length += 1
+            if is_prefix(rtfcre):
+                open_translations.append((index, rtfcre, length))
+            if self.dictionary.get(rtfcre, None) is not None:
+                self._open_translations = open_translations
+                return translations[:index] + \
+                       [Translation(self.strokes[end - length:end],
+                                    self.dictionary)]
+
+        if is_prefix(stroke.rtfcre):
+            open_translations.append((len(translations), stroke.rtfcre, 1))
+        self._open_translations = open_translations
+        return translations + [Translation([stroke], self.dictionary)]
+
     def add_callback(self, callback) :
         """Subscribes a function to receive new trasnlations.
 
@@ -0,0 +1,88 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test translating many lines of english to chords across processes."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fly.translation import wordstochords
+
+# Made up chords, so that none are categorized and choices are random.
+DUMMY_DICT = {u"TWE": u"we",
+              u"TWAOE": u"we",
+              u"TPOF": u"of",
+              u"TWA": u"was",
+              u"TWAS": u"was",
+              u"TWUZ": u"was",
+              u"TKOG": u"dog",
+              u"TKAUG": u"dog",
+              u"TP-PL": u"{.}"}
+
+LINES = ["We was of dog.\n",
+         "was was was was\n",
+         "dog's of we\n",
+         "Unknown words\n"]
+
+
+class BulkTranslationTest(unittest.TestCase):
+
+    """Bulk translation gives the same chords however many processes."""
+
+    def setUp(self):
+        self.translator = wordstochords.WordToChordTranslator(DUMMY_DICT)
+        self.lines = LINES * wordstochords.BULK_CHUNK_LINES
+
+    def test_same_as_serial(self):
+
+        """Translating in several processes matches translating in one."""
+
+        serial = self.translator.translate_many(self.lines, processes=1)
+        parallel = self.translator.translate_many(self.lines, processes=3)
+        self.assertEquals(parallel, serial)
+        self.assertEquals(len(serial), len(self.lines))
+
+        # Translated afresh, rather than from remembered words.
+        translator = wordstochords.WordToChordTranslator(DUMMY_DICT)
+        self.assertEquals(translator.translate_many(self.lines, processes=2),
+                          serial)
+
+    def test_lines_translate_the_same_way(self):
+
+        """A line's chords are random but repeatable."""
+
+        chord_line = self.translator.translate_line(LINES[0])
+        self.assertEquals(len(chord_line.split(" ")), 5)
+        translator = wordstochords.WordToChordTranslator(DUMMY_DICT)
+        for i in range(10):
+            self.assertEquals(translator.translate_line(LINES[0]), chord_line)
+
+        self.assertTrue(self.translator.translate_line("dog's\n") in
+                        [u"TKOG/A*ES", u"TKAUG/A*ES"])
+
+    def test_from_file(self):
+
+        """A lesson file translates the same in bulk as line by line."""
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            lesson_path = os.path.join(temp_dir, "lesson.les")
+            with open(lesson_path, 'w') as f:
+                f.writelines(self.lines)
+            self.assertEquals(
+                    self.translator.translate_from_file(lesson_path, 2),
+                    [self.translator.translate_line(line)
+                     for line in self.lines])
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -115,6 +115,22 @@ class ChordHolderTest(unittest.TestCase):
         canon_chord = chord_holder.get_canon_chord(self.cat_dict)
         self.assertTrue(canon_chord in chord_list)
 
+    def test_known_canon_chord(self):
+        
+        """A canon chord worked out in advance is used without looking at
+        categories."""
+
+        chord_list = ["KR", # alternative
+                      "AUL", # canon
+                     ]
+
+        chord_holder = wordstochords.ChordHolder(chord_list, canon_offset=0)
+        self.assertEquals(chord_holder.get_canon_chord(self.cat_dict), "KR")
+
+        # Adding a chord means it must be worked out again.
+        chord_holder.add_chord("PARD")
+        self.assertEquals(chord_holder.get_canon_chord(self.cat_dict), "AUL")
+
 
 if __name__ == '__main__':
     unittest.main()
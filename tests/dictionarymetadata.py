@@ -0,0 +1,129 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test the stroke counts and prefixes cached beside json dicts."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from fly.plover import steno
+from fly.plover.dictionary import eclipse
+from fly.utils import dictionarymetadata
+from fly.utils import dictionaryregistry
+
+DUMMY_DICT = {u"WE": u"we",
+              u"-F": u"of",
+              u"KAT": u"cat",
+              u"KAT/A/LOG": u"catalogue",
+              u"KAT/A/STROEF": u"catastrophe",
+              u"TKOG/-S": u"dogs"}
+
+
+class DummyMachine(object):
+
+    """Stands in for a steno machine, which the translator listens to."""
+
+    def add_callback(self, callback):
+        pass
+
+
+class UnscannableDict(dict):
+
+    """Dictionary whose keys can't be listed, to show they aren't."""
+
+    def keys(self):
+        raise AssertionError("Keys of the dictionary were scanned.")
+
+    iterkeys = keys
+
+
+class DictionaryMetadataTest(unittest.TestCase):
+
+    """Metadata describes the chords, and is worked out once."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dict_path = os.path.join(self.temp_dir, "dummy_dict.json")
+        with open(self.dict_path, 'w') as f:
+            json.dump(DUMMY_DICT, f)
+        self.metadata_path = dictionarymetadata.get_metadata_path(
+                self.dict_path)
+
+    def tearDown(self):
+        dictionaryregistry.release(self.dict_path)
+        shutil.rmtree(self.temp_dir)
+
+    def test_metadata(self):
+
+        """Stroke counts and prefixes are found."""
+
+        metadata = dictionarymetadata.load_metadata(DUMMY_DICT)
+        self.assertEquals(metadata.max_strokes, 3)
+        self.assertEquals(metadata.entries_per_length, {1: 3, 2: 1, 3: 2})
+        self.assertEquals(len(metadata), len(DUMMY_DICT))
+        self.assertTrue(metadata.is_prefix("KAT"))
+        self.assertTrue(metadata.is_prefix("KAT/A"))
+        self.assertFalse(metadata.is_prefix("KAT/A/LOG"))
+        self.assertFalse(metadata.is_prefix("WE"))
+        self.assertEquals(metadata.get_first_strokes(),
+                          frozenset([u"KAT", u"TKOG"]))
+
+    def test_empty_dictionary(self):
+
+        """An empty dictionary (used until the real one loads) works."""
+
+        metadata = dictionarymetadata.load_metadata({})
+        self.assertEquals(metadata.max_strokes, 1)
+        self.assertFalse(metadata.is_prefix("KAT"))
+        self.assertEquals(len(metadata), 0)
+
+    def test_metadata_cached(self):
+
+        """Metadata of a shared dict is written to disk, and read back until
+        the dict changes."""
+
+        dictionary = dictionaryregistry.get_dict(self.dict_path)
+        metadata = dictionaryregistry.get_metadata(dictionary)
+        self.assertTrue(metadata is dictionaryregistry.get_metadata(dictionary))
+        self.assertTrue(os.path.exists(self.metadata_path))
+
+        # An empty dictionary shows the metadata came from the file.
+        cached = dictionarymetadata.load_metadata({}, self.dict_path)
+        self.assertEquals(cached.max_strokes, 3)
+        self.assertTrue(cached.is_prefix("TKOG"))
+
+        with open(self.dict_path, 'w') as f:
+            json.dump({"TKOG": "dog"}, f)
+        # Make sure the change is visible even on coarse mtime filesystems.
+        mtime = os.path.getmtime(self.dict_path) + 10
+        os.utime(self.dict_path, (mtime, mtime))
+        rebuilt = dictionarymetadata.load_metadata({u"TKOG": u"dog"},
+                                                   self.dict_path)
+        self.assertEquals(rebuilt.max_strokes, 1)
+
+    def test_translator_uses_metadata(self):
+
+        """The translator needn't scan the dictionary's keys."""
+
+        metadata = dictionarymetadata.load_metadata(DUMMY_DICT)
+        dictionary = UnscannableDict(DUMMY_DICT)
+        translator = steno.Translator(DummyMachine(), dictionary, eclipse,
+                                      metadata=metadata)
+        self.assertEquals(translator.max_number_of_strokes, 3)
+
+        for keys in (['K-', 'A-', '-T'], ['A-']):
+            translator.consume_stroke(steno.Stroke(keys, eclipse))
+        self.assertEquals([t.english for t in translator.translations],
+                          [u"cat", None])
+
+
+if __name__ == '__main__':
+    unittest.main()
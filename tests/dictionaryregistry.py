@@ -0,0 +1,71 @@
+# Copyright (c) 2012 Pragma Nolint. 
+# See LICENSE.txt for details.
+
+"""Test the shared dictionary registry."""
+
+# Hack so that all modules can be imported from Fly, 
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import os
+import unittest
+
+from fly.utils import dictionaryregistry
+from fly.utils import files as fileutils
+
+
+class DictionaryRegistryTest(unittest.TestCase):
+
+    """Each dictionary file is loaded once and shared read-only."""
+
+    def setUp(self):
+        data_dir = fileutils.get_test_data_directory()
+        self.dummy_dict_path = os.path.join(data_dir, "dummy_dict.json")
+        dictionaryregistry.release(self.dummy_dict_path)
+
+    def tearDown(self):
+        dictionaryregistry.release(self.dummy_dict_path)
+
+    def test_same_instance_shared(self):
+
+        """Asking for the same file twice returns the same object."""
+
+        first = dictionaryregistry.get_dict(self.dummy_dict_path)
+        # A different spelling of the same path.
+        other_path = os.path.join(os.path.dirname(self.dummy_dict_path), 
+                                  "..", "data", "dummy_dict.json")
+        second = dictionaryregistry.get_dict(other_path)
+
+        self.assertTrue(first is second)
+        self.assertTrue(first["-F"] == "of")
+        self.assertTrue(dictionaryregistry.is_loaded(self.dummy_dict_path))
+
+    def test_read_only(self):
+
+        """Shared dictionaries can't be modified, but can be copied."""
+
+        shared = dictionaryregistry.get_dict(self.dummy_dict_path)
+        self.assertRaises(TypeError, shared.__setitem__, "TK", "did")
+        self.assertRaises(TypeError, shared.pop, "-F")
+        self.assertRaises(TypeError, shared.update, {"TK": "did"})
+
+        copy = dict(shared)
+        copy["TK"] = "did"
+        self.assertFalse("TK" in shared)
+
+    def test_release(self):
+
+        """A released dictionary is loaded again next time."""
+
+        first = dictionaryregistry.get_dict(self.dummy_dict_path)
+        dictionaryregistry.release(self.dummy_dict_path)
+        self.assertFalse(dictionaryregistry.is_loaded(self.dummy_dict_path))
+
+        second = dictionaryregistry.get_dict(self.dummy_dict_path)
+        self.assertFalse(first is second)
+        self.assertEquals(first, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,9 @@ import sys, os
 sys.path.append(os.path.dirname(os.getcwd()))
 
 import os
+import json
+import shutil
+import tempfile
 import unittest
 
 from fly.utils import dictionaryreader as dictreader 
@@ -33,6 +36,72 @@ class DictionaryReaderUtilsTest(unittest.TestCase):
         self.assertTrue(d["-F"] == "of")
 
 
+class DictionaryCacheTest(unittest.TestCase):
+
+    """Parsed dicts are cached beside their source until it changes."""
+
+    def setUp(self):
+
+        """Copy the dummy dict somewhere the cache can be written."""
+
+        self.temp_dir = tempfile.mkdtemp()
+        data_dir = fileutils.get_test_data_directory()
+        self.dict_path = os.path.join(self.temp_dir, "dummy_dict.json")
+        shutil.copy(os.path.join(data_dir, "dummy_dict.json"), self.dict_path)
+        self.cache_path = dictreader.get_cache_path(self.dict_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_cache_written(self):
+
+        """Loading a dict writes a cache with the same contents."""
+
+        d = dictreader.load_dict(self.dict_path)
+        self.assertTrue(os.path.exists(self.cache_path))
+
+        stamp = dictreader.get_source_stamp(self.dict_path)
+        cached = dictreader.read_cache(self.cache_path, stamp)
+        self.assertEquals(cached, d)
+        self.assertEquals(dictreader.load_dict(self.dict_path), d)
+
+    def test_cache_not_used(self):
+
+        """No cache is written when caching is turned off."""
+
+        d = dictreader.load_dict(self.dict_path, use_cache=False)
+        self.assertFalse(os.path.exists(self.cache_path))
+        self.assertTrue(d["WA"] == "was")
+
+    def test_cache_rebuilt_when_source_changes(self):
+
+        """A changed source file is parsed again rather than read from cache."""
+
+        dictreader.load_dict(self.dict_path)
+        with open(self.dict_path, 'w') as f:
+            json.dump({"-F": "of", "TK": "did"}, f)
+        # Make sure the change is visible even on coarse mtime filesystems.
+        mtime = os.path.getmtime(self.dict_path) + 10
+        os.utime(self.dict_path, (mtime, mtime))
+
+        d = dictreader.load_dict(self.dict_path)
+        self.assertEquals(d, {"-F": "of", "TK": "did"})
+
+        stamp = dictreader.get_source_stamp(self.dict_path)
+        self.assertEquals(dictreader.read_cache(self.cache_path, stamp), d)
+
+    def test_corrupt_cache_ignored(self):
+
+        """An unreadable cache is ignored and replaced."""
+
+        dictreader.load_dict(self.dict_path)
+        with open(self.cache_path, 'wb') as f:
+            f.write("not a cache")
+
+        d = dictreader.load_dict(self.dict_path)
+        self.assertTrue(d["-F"] == "of")
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,355 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""A fake Gemini PR or TX Bolt stenotype machine on a pty, and tests of it.
+
+The fake machine holds the master side of a pseudo-terminal pair. The slave
+side is a serial port that plover's serial machines open by its path, like a
+real machine's port. Strokes written to the fake machine are encoded in the
+machine's protocol, at a given rate, in bursts, and with malformed data
+between them if asked.
+
+Other tests and the benchmarks use it, see benchmarks/serialmachines.py.
+"""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import ConfigParser
+import difflib
+import pty
+import random
+import threading
+import time
+import tty
+import unittest
+
+from fly.plover import config as conf
+from fly.plover.machine import geminipr
+from fly.plover.machine import txbolt
+
+# Keys both protocols have, in steno order.
+STENO_KEYS = ("#", "S-", "T-", "K-", "P-", "W-", "H-", "R-", "A-", "O-", "*",
+              "-E", "-U", "-F", "-R", "-P", "-B", "-L", "-G", "-T", "-S", "-D",
+              "-Z")
+
+GEMINI_PR = "Gemini PR"
+TX_BOLT = "TX Bolt"
+
+
+def open_pty():
+
+    """Return the master and slave file descriptors of a raw pty, and the
+    slave's name."""
+
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    name = os.ttyname(slave)
+    return master, slave, name
+
+
+def get_random_strokes(random_generator, count):
+
+    """Return strokes of one to six random keys, each in steno order.
+
+    @type random_generator: random.Random
+    @type count: int
+    @rtype: list of list of str
+    """
+
+    strokes = []
+    for i in range(count):
+        keys = set(random_generator.sample(STENO_KEYS,
+                                           random_generator.randint(1, 6)))
+        strokes.append([key for key in STENO_KEYS if key in keys])
+    return strokes
+
+
+class GeminiPrEncoder(object):
+
+    """Encodes strokes as Gemini PR packets."""
+
+    def encode(self, steno_keys):
+
+        """Return the packet of a stroke, each key on the first of its bits.
+
+        @type steno_keys: list of str
+        @rtype: str
+        """
+
+        packet = [geminipr.FIRST_BYTE_FLAG, 0, 0, 0, 0, 0]
+        for key in steno_keys:
+            bit = geminipr.STENO_KEY_CHART.index(key)
+            packet[bit // 7] |= 0x80 >> (bit % 7 + 1)
+        return "".join(chr(b) for b in packet)
+
+    def get_malformed(self, random_generator, steno_keys):
+
+        """Return the start of a packet, cut short.
+
+        @rtype: str
+        """
+
+        return self.encode(steno_keys)[:random_generator.randint(1, 5)]
+
+
+class TxBoltEncoder(object):
+
+    """Encodes strokes as TX Bolt bytes, a byte for each set with keys.
+
+    Like a TX Bolt machine, sends a zero byte before a stroke which would
+    otherwise run on from the last one.
+    """
+
+    def __init__(self):
+        self.last_key_set = txbolt.LAST_KEY_SET
+
+    def encode(self, steno_keys):
+
+        """Return the bytes of a stroke.
+
+        @type steno_keys: list of str
+        @rtype: str
+        """
+
+        bytes_by_set = {}
+        for key in steno_keys:
+            index = txbolt.STENO_KEY_CHART.index(key)
+            key_set = index // 6
+            bytes_by_set[key_set] = (
+                bytes_by_set.get(key_set, key_set << txbolt.KEY_SET_SHIFT) |
+                1 << (index % 6))
+        key_sets = sorted(bytes_by_set)
+        data = "".join(chr(bytes_by_set[key_set]) for key_set in key_sets)
+        if key_sets[0] > self.last_key_set:
+            data = "\0" + data
+        self.last_key_set = key_sets[-1]
+        return data
+
+    def get_malformed(self, random_generator, steno_keys):
+
+        """Return the zero bytes a machine sends while idle, which end any
+        stroke in progress.
+
+        @rtype: str
+        """
+
+        self.last_key_set = txbolt.LAST_KEY_SET
+        return "\0" * random_generator.randint(1, 3)
+
+
+class FakeStenotype(object):
+
+    """The machine end of a pty, writing strokes in a machine's protocol."""
+
+    def __init__(self, protocol=GEMINI_PR):
+
+        """
+        @param protocol: GEMINI_PR or TX_BOLT
+        @type protocol: str
+        """
+
+        if protocol == GEMINI_PR:
+            self.encoder = GeminiPrEncoder()
+        elif protocol == TX_BOLT:
+            self.encoder = TxBoltEncoder()
+        else:
+            raise ValueError("Unknown protocol: %s" % protocol)
+        self.protocol = protocol
+        self.master, self.slave, self.port = open_pty()
+        self.malformed_count = 0
+
+    def get_serial_params(self, **options):
+
+        """Return the arguments to open the port with, read from a plover
+        config as a user's would be.
+
+        @param options: other options for the machine's config section,
+                        such as timeout or idle_timeout
+        @return: keyword arguments for a L{plover.machine.base.
+                 SerialStenotypeBase}
+        @rtype: dict
+        """
+
+        config = ConfigParser.RawConfigParser()
+        config.add_section(self.protocol)
+        config.set(self.protocol, conf.SERIAL_PORT_OPTION, self.port)
+        for option, value in options.items():
+            config.set(self.protocol, option, str(value))
+        params = conf.get_serial_params(self.protocol, config).__dict__
+        params.update(conf.get_idle_timeout_params(self.protocol, config))
+        return params
+
+    def write(self, data):
+
+        """Write bytes as the machine, waiting until the port takes all of
+        them."""
+
+        while data:
+            written = os.write(self.master, data)
+            data = data[written:]
+
+    def write_strokes(self, strokes, strokes_per_second=None, burst_size=1,
+                      malformed_rate=0.0, random_generator=None):
+
+        """Write strokes as the machine.
+
+        @param strokes: keys of each stroke
+        @param strokes_per_second: average rate to write at, or None for as
+                                   fast as the port takes them
+        @param burst_size: strokes written together, then a pause
+        @param malformed_rate: chance of malformed data before each stroke,
+                               which shouldn't lose the stroke
+        @param random_generator: chooses which strokes get malformed data
+
+        @type strokes: list of list of str
+        @type strokes_per_second: float
+        @type burst_size: int
+        @type malformed_rate: float
+        @type random_generator: random.Random
+        """
+
+        if random_generator is None:
+            random_generator = random.Random(0)
+        start = time.time()
+        for i in range(0, len(strokes), burst_size):
+            if strokes_per_second:
+                delay = start + i / float(strokes_per_second) - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            data = []
+            for steno_keys in strokes[i:i + burst_size]:
+                if malformed_rate and random_generator.random() < \
+                        malformed_rate:
+                    data.append(self.encoder.get_malformed(random_generator,
+                                                           steno_keys))
+                    self.malformed_count += 1
+                data.append(self.encoder.encode(steno_keys))
+            self.write("".join(data))
+
+    def close(self):
+
+        """Close both ends of the pty."""
+
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class StrokeRecorder(object):
+
+    """Machine callback keeping the strokes it is called with."""
+
+    def __init__(self):
+        self.strokes = []
+        self.timestamps = []
+        self.condition = threading.Condition()
+
+    def __call__(self, steno_keys):
+        with self.condition:
+            self.strokes.append(steno_keys)
+            self.timestamps.append(time.time())
+            self.condition.notifyAll()
+
+    def wait_for(self, count, timeout):
+
+        """Wait until count strokes have been recorded, or no more have come
+        for timeout seconds.
+
+        @return: True if count strokes were recorded
+        @rtype: bool
+        """
+
+        with self.condition:
+            while len(self.strokes) < count:
+                recorded = len(self.strokes)
+                self.condition.wait(timeout)
+                if len(self.strokes) == recorded:
+                    break
+            return len(self.strokes) >= count
+
+
+def count_lost(expected, received):
+
+    """Return how many strokes expected were not received, in order.
+
+    @type expected: list of list of str
+    @type received: list of list of str
+    @rtype: int
+    """
+
+    matcher = difflib.SequenceMatcher(
+        None, [frozenset(steno_keys) for steno_keys in expected],
+        [frozenset(steno_keys) for steno_keys in received], autojunk=False)
+    return len(expected) - sum(block.size
+                               for block in matcher.get_matching_blocks())
+
+
+class FakeStenotypeTest(unittest.TestCase):
+
+    """Plover's serial machines read the fake machine's port."""
+
+    def run_machine(self, protocol, machine_class, strokes, **kwargs):
+        machine = FakeStenotype(protocol)
+        try:
+            stenotype = machine_class(**machine.get_serial_params(
+                timeout=0.05, idle_timeout=0.02))
+            recorder = StrokeRecorder()
+            stenotype.add_callback(recorder)
+            stenotype.start_capture()
+            try:
+                machine.write_strokes(strokes, **kwargs)
+                recorder.wait_for(len(strokes), 1)
+            finally:
+                stenotype.stop_capture()
+        finally:
+            machine.close()
+        return machine, stenotype, recorder
+
+    def test_gemini_pr(self):
+
+        """Strokes written in bursts with malformed packets between them all
+        arrive."""
+
+        strokes = get_random_strokes(random.Random(1), 500)
+        machine, stenotype, recorder = self.run_machine(
+            GEMINI_PR, geminipr.Stenotype, strokes, burst_size=50,
+            malformed_rate=0.2)
+        self.assertTrue(machine.malformed_count > 0)
+        self.assertEquals(count_lost(strokes, recorder.strokes), 0)
+        self.assertEquals(len(recorder.strokes), len(strokes))
+        self.assertEquals(stenotype.idle_timeout, 0.02)
+
+    def test_tx_bolt(self):
+
+        """Strokes written with zero bytes between them all arrive."""
+
+        strokes = get_random_strokes(random.Random(2), 500)
+        machine, stenotype, recorder = self.run_machine(
+            TX_BOLT, txbolt.Stenotype, strokes, burst_size=50,
+            malformed_rate=0.2)
+        self.assertTrue(machine.malformed_count > 0)
+        self.assertEquals(count_lost(strokes, recorder.strokes), 0)
+        self.assertEquals(len(recorder.strokes), len(strokes))
+
+    def test_rate(self):
+
+        """Strokes are written no faster than the rate asked for."""
+
+        strokes = get_random_strokes(random.Random(3), 20)
+        start = time.time()
+        machine, stenotype, recorder = self.run_machine(
+            GEMINI_PR, geminipr.Stenotype, strokes, strokes_per_second=100)
+        self.assertTrue(recorder.timestamps[-1] - start >= 0.19)
+        self.assertEquals(count_lost(strokes, recorder.strokes), 0)
+
+    def test_count_lost(self):
+        self.assertEquals(count_lost([["S-"], ["T-"], ["K-"]],
+                                     [["S-"], ["K-"]]), 1)
+        self.assertEquals(count_lost([["S-"], ["T-"]], []), 2)
+        self.assertEquals(count_lost([["S-", "T-"]], [["T-", "S-"]]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
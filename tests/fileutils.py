@@ -50,14 +50,13 @@ class FileUtilsTest(unittest.TestCase):
         self.assertTrue(os.path.exists(path))
         self.assertTrue(os.path.isfile(path))
 
-    def test_get_level_dict_path(self):
+    def test_get_level_store_path(self):
 
-        """Check all level dicts exist and are files."""
+        """Check the level store exists and is a file."""
 
-        for i in range(6):
-            path = fileutils.get_level_dict_path(i + 1)
-            self.assertTrue(os.path.exists(path))
-            self.assertTrue(os.path.isfile(path))
+        path = fileutils.get_level_store_path()
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(os.path.isfile(path))
 
     def test_get_lessons_directory(self):
 
@@ -0,0 +1,155 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test decoding Gemini PR packets, from bytes and through a serial port."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import random
+import threading
+import time
+import unittest
+
+from fly.plover.machine import geminipr
+from fly.tests.fakestenotype import GeminiPrEncoder, open_pty
+
+
+# Keys on more than one bit of a packet (such as "#") are put on the first.
+encode = GeminiPrEncoder().encode
+
+
+def decode_bit_by_bit(packet):
+
+    """Decode a packet as the machine used to, a bit at a time."""
+
+    steno_keys = []
+    for i, b in enumerate(bytearray(packet)):
+        for j in range(1, 8):
+            if b & (0x80 >> j):
+                steno_keys.append(geminipr.STENO_KEY_CHART[i*7 + j-1])
+    return steno_keys
+
+
+def random_packet(random_generator):
+
+    """Return a valid packet with random keys."""
+
+    return chr(0x80 | random_generator.randint(0, 0x7f)) + \
+           "".join(chr(random_generator.randint(0, 0x7f)) for i in range(5))
+
+
+class PacketDecoderTest(unittest.TestCase):
+
+    """Packets are decoded from any chunks, resyncing on broken ones."""
+
+    def setUp(self):
+        self.decoder = geminipr.PacketDecoder()
+
+    def test_same_as_bit_by_bit(self):
+
+        """Lookup tables decode packets as bit by bit decoding does."""
+
+        random_generator = random.Random(1)
+        packets = [random_packet(random_generator) for i in range(500)]
+        self.assertEquals(self.decoder.decode("".join(packets)),
+                          [decode_bit_by_bit(p) for p in packets])
+
+    def test_packet_split_across_reads(self):
+
+        """Part of a packet is kept until the rest arrives."""
+
+        packet = encode(["K-", "A-", "-T"])
+        self.assertEquals(self.decoder.decode(packet[:2]), [])
+        self.assertEquals(self.decoder.decode(packet[2:] + packet[:1]),
+                          [["K-", "A-", "-T"]])
+        self.assertEquals(self.decoder.decode(packet[1:]),
+                          [["K-", "A-", "-T"]])
+
+    def test_resync(self):
+
+        """Broken packets and stray bytes are dropped, and the packets after
+        them kept."""
+
+        cat = encode(["K-", "A-", "-T"])
+        the = encode(["-T"])
+        stream = "\x01\x02" + cat + cat[:3] + the + cat[:5] + cat + "\x03"
+        self.assertEquals(self.decoder.decode(stream),
+                          [["K-", "A-", "-T"], ["-T"], ["K-", "A-", "-T"]])
+        self.assertEquals(self.decoder.discarded_bytes, 2 + 3 + 5 + 1)
+
+
+class RecordingStenotype(geminipr.Stenotype):
+
+    """Gemini PR machine which records the strokes it decodes."""
+
+    def __init__(self, expected, **kwargs):
+        geminipr.Stenotype.__init__(self, **kwargs)
+        self.strokes = []
+        self.expected = expected
+        self.received = threading.Event()
+        self.add_callback(self.on_stroke)
+
+    def on_stroke(self, steno_keys):
+        self.strokes.append(steno_keys)
+        if len(self.strokes) >= self.expected:
+            self.received.set()
+
+
+class SerialPortTest(unittest.TestCase):
+
+    """Packets written to a pty are decoded by the machine reading it."""
+
+    def test_stream(self):
+
+        """Every packet in a stream is decoded, in order."""
+
+        random_generator = random.Random(2)
+        packets = [random_packet(random_generator) for i in range(2000)]
+        master, slave, name = open_pty()
+        try:
+            machine = RecordingStenotype(len(packets), port=name,
+                                         timeout=0.05)
+            machine.start_capture()
+            try:
+                # Garbage first, which the machine resyncs from.
+                os.write(master, "\x05" + packets[0][:4])
+                data = "".join(packets)
+                while data:
+                    written = os.write(master, data[:4096])
+                    data = data[written:]
+                machine.received.wait(10)
+            finally:
+                machine.stop_capture()
+        finally:
+            os.close(master)
+            os.close(slave)
+        self.assertEquals(machine.strokes,
+                          [decode_bit_by_bit(p) for p in packets])
+        self.assertFalse(machine.isAlive())
+
+    def test_idle(self):
+
+        """The machine sleeps while nothing is written."""
+
+        master, slave, name = open_pty()
+        try:
+            machine = RecordingStenotype(1, port=name)
+            machine.start_capture()
+            try:
+                start = os.times()
+                time.sleep(0.5)
+                end = os.times()
+            finally:
+                machine.stop_capture()
+        finally:
+            os.close(master)
+            os.close(slave)
+        self.assertTrue(end[0] + end[1] - start[0] - start[1] < 0.1)
+        self.assertFalse(machine.isAlive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test the english to chords index cached beside json dicts."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from fly.utils import dictionaryregistry
+from fly.utils import inverseindex
+from fly.translation import chordcategories
+from fly.translation import wordstochords
+
+DUMMY_DICT = {u"WE": u"we",
+              u"-F": u"of",
+              u"WA": u"was",
+              u"WAS": u"was",
+              u"WUZ": u"was",
+              u"KA*EUT/KWRA": u"ca\xf1on"}
+
+
+class InverseIndexTest(unittest.TestCase):
+
+    """All chords of a word are found, from a cached or in memory index."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dict_path = os.path.join(self.temp_dir, "dummy_dict.json")
+        with open(self.dict_path, 'w') as f:
+            json.dump(DUMMY_DICT, f)
+        self.index_path = inverseindex.get_index_path(self.dict_path)
+
+    def tearDown(self):
+        dictionaryregistry.release(self.dict_path)
+        shutil.rmtree(self.temp_dir)
+
+    def check_lookups(self, index):
+        self.assertEquals(index.lookup_chords("was"), [u"WA", u"WAS", u"WUZ"])
+        self.assertEquals(index.lookup_chords(u"we"), [u"WE"])
+        self.assertEquals(index.lookup_chords("ca\xc3\xb1on"),
+                          [u"KA*EUT/KWRA"])
+        self.assertEquals(index.lookup_chords("dog"), [])
+        self.assertEquals(len(index), 4)
+
+    def test_in_memory_index(self):
+
+        """A dictionary that wasn't loaded from a file is indexed in memory."""
+
+        index = dictionaryregistry.get_inverse_index(dict(DUMMY_DICT))
+        self.check_lookups(index)
+        self.assertFalse(os.path.exists(self.index_path))
+
+    def test_index_cached(self):
+
+        """The index of a shared dict is written to disk, and read back."""
+
+        dictionary = dictionaryregistry.get_dict(self.dict_path)
+        index = dictionaryregistry.get_inverse_index(dictionary)
+        self.assertTrue(index is
+                        dictionaryregistry.get_inverse_index(dictionary))
+        # Loaded lazily.
+        self.assertFalse(os.path.exists(self.index_path))
+        self.check_lookups(index)
+        self.assertTrue(os.path.exists(self.index_path))
+
+        # An empty dictionary shows the index came from the file.
+        cached_index = inverseindex.InverseIndex({}, self.dict_path)
+        cached_index.load()
+        self.assertEquals(len(cached_index), 4)
+
+    def test_rebuilt_when_source_changes(self):
+
+        """A changed json dict gets a new index."""
+
+        inverseindex.InverseIndex(DUMMY_DICT, self.dict_path).load()
+        with open(self.dict_path, 'w') as f:
+            json.dump({"TKOG": "dog"}, f)
+        # Make sure the change is visible even on coarse mtime filesystems.
+        mtime = os.path.getmtime(self.dict_path) + 10
+        os.utime(self.dict_path, (mtime, mtime))
+
+        index = inverseindex.InverseIndex({u"TKOG": u"dog"}, self.dict_path)
+        self.assertEquals(index.lookup_chords("dog"), [u"TKOG"])
+        self.assertEquals(index.lookup_chords("was"), [])
+
+    def test_canon_chords(self):
+
+        """The canon chord of each word is worked out once and cached, until
+        the categorization dict changes."""
+
+        category_path = os.path.join(self.temp_dir, "word_category.json")
+        with open(category_path, 'w') as f:
+            json.dump({"WA": "misstroke", "WAS": "brief", "WUZ": "canon"}, f)
+        categories = {u"WA": u"misstroke", u"WAS": u"brief", u"WUZ": u"canon"}
+        index = inverseindex.InverseIndex(DUMMY_DICT, self.dict_path,
+                                          categories, category_path)
+
+        position = index.find("was")
+        self.assertEquals(index.get_chords(position)[
+                          index.get_canon_offset(position)], u"WUZ")
+        self.assertEquals(index.get_canon_offset(index.find("we")),
+                          chordcategories.NO_CANON_CHORD)
+        canon_path = inverseindex.get_canon_path(self.dict_path)
+        self.assertTrue(os.path.exists(canon_path))
+
+        # Read back from the cache, even with no categories to hand.
+        cached_index = inverseindex.InverseIndex(DUMMY_DICT, self.dict_path,
+                                                 {}, category_path)
+        self.assertEquals(cached_index.get_canon_offset(position), 2)
+
+        # Worked out again when the categories change.
+        with open(category_path, 'w') as f:
+            json.dump({"WA": "canon"}, f)
+        mtime = os.path.getmtime(category_path) + 10
+        os.utime(category_path, (mtime, mtime))
+        index = inverseindex.InverseIndex(DUMMY_DICT, self.dict_path,
+                                          {u"WA": u"canon"}, category_path)
+        self.assertEquals(index.get_canon_offset(position), 0)
+
+    def test_translator_uses_index(self):
+
+        """Words translate to chords via the index."""
+
+        translator = wordstochords.WordToChordTranslator(DUMMY_DICT)
+        self.assertEquals(translator.translate_word("we"), u"WE")
+        self.assertTrue(translator.translate_word("Was") in
+                        [u"WA", u"WAS", u"WUZ"])
+
+
+if __name__ == '__main__':
+    unittest.main()
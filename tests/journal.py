@@ -0,0 +1,154 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test writing and reading plover's binary journal of strokes."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import shutil
+import tempfile
+import unittest
+
+from fly.plover import journal
+from fly.plover.machine import replay
+
+
+class FakeTranslation(object):
+
+    """What the journal reads of a plover.steno.Translation."""
+
+    def __init__(self, rtfcre, english, is_correction=False):
+        self.rtfcre = rtfcre
+        self.english = english
+        self.is_correction = is_correction
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "plover.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_session(self, writer=None):
+        if writer is None:
+            writer = journal.JournalWriter(self.path)
+        writer.on_steno_keys(["K-", "A-", "-T"])
+        writer.on_translation(FakeTranslation("KAT", u"cat"), None)
+        writer.on_steno_keys(["*"])
+        writer.on_translation(FakeTranslation("KAT", u"cat", True), None)
+        # Machine keys plover doesn't have are left out.
+        writer.on_steno_keys(["Fn", "S-", "-T"])
+        writer.on_translation(FakeTranslation("ST", None), None)
+        writer.on_steno_keys(["T-", "-E"])
+        writer.on_translation(FakeTranslation("TE", u"caf\xe9"), None)
+        writer.close()
+        return writer
+
+    def read(self):
+        reader = journal.JournalReader(self.path)
+        try:
+            return [(record.kind, record.steno_keys, record.rtfcre,
+                     record.english) for record in reader]
+        finally:
+            reader.close()
+
+    def test_read_back(self):
+
+        """Records are read back in order, translations after their
+        strokes."""
+
+        writer = self.write_session()
+        self.assertEquals(writer.written_count, 8)
+        self.assertEquals(self.read(), [
+            (journal.STROKE, ("K-", "A-", "-T"), None, None),
+            (journal.TRANSLATION, (), "KAT", u"cat"),
+            (journal.STROKE, ("*",), None, None),
+            (journal.CORRECTION, (), "KAT", u"cat"),
+            (journal.STROKE, ("S-", "-T"), None, None),
+            (journal.TRANSLATION, (), "ST", None),
+            (journal.STROKE, ("T-", "-E"), None, None),
+            (journal.TRANSLATION, (), "TE", u"caf\xe9")])
+
+    def test_timestamps(self):
+
+        """Timestamps are in seconds since the epoch, and never go back."""
+
+        writer = self.write_session()
+        reader = journal.JournalReader(self.path)
+        timestamps = [record.timestamp for record in reader]
+        reader.close()
+        self.assertEquals(timestamps, sorted(timestamps))
+        self.assertTrue(writer.start_time <= timestamps[0] <
+                        writer.start_time + 1)
+
+    def test_append(self):
+
+        """A second session is appended, redefining translation ids."""
+
+        self.write_session()
+        writer = journal.JournalWriter(self.path)
+        writer.on_steno_keys(["T-", "-E"])
+        writer.on_translation(FakeTranslation("TE", u"tea"), None)
+        writer.close()
+        records = self.read()
+        self.assertEquals(len(records), 10)
+        self.assertEquals(records[-1], (journal.TRANSLATION, (), "TE", u"tea"))
+        self.assertEquals(records[1], (journal.TRANSLATION, (), "KAT", u"cat"))
+
+    def test_cut_short(self):
+
+        """A record cut short is ignored, then dropped when the journal is
+        next written."""
+
+        self.write_session()
+        with open(self.path, "ab") as f:
+            f.write(journal.RECORD.pack(0, 1, 0, journal.STROKE)[:7])
+        self.assertEquals(len(self.read()), 8)
+        writer = journal.JournalWriter(self.path)
+        writer.on_steno_keys(["-Z"])
+        writer.close()
+        records = self.read()
+        self.assertEquals(len(records), 9)
+        self.assertEquals(records[-1], (journal.STROKE, ("-Z",), None, None))
+
+    def test_rotate(self):
+
+        """A journal too big is moved aside."""
+
+        self.write_session()
+        size = os.path.getsize(self.path)
+        writer = journal.JournalWriter(self.path, max_bytes=size)
+        writer.close()
+        self.assertEquals(self.read(), [])
+        self.assertEquals(os.path.getsize(self.path + journal.ROTATED_EXTENSION),
+                          size)
+
+    def test_not_a_journal(self):
+
+        """Other files are not read as journals."""
+
+        text_log = os.path.join(self.directory, "plover.log")
+        with open(text_log, "w") as f:
+            f.write("2012-03-01 09:30:02,125 Stroke(K- A- -T)\n")
+        self.assertFalse(journal.is_journal(text_log))
+        self.assertRaises(ValueError, journal.JournalReader, text_log)
+
+    def test_replay(self):
+
+        """The replay machine reads strokes from a journal."""
+
+        self.write_session()
+        strokes = replay.read_stroke_log(self.path)
+        self.assertEquals([steno_keys for timestamp, steno_keys in strokes],
+                          [["K-", "A-", "-T"], ["*"], ["S-", "-T"],
+                           ["T-", "-E"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test reading recorded key events, without an X server."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import unittest
+
+from Xlib import X, XK
+from Xlib.ext import record
+from Xlib.protocol import event
+
+from fly.plover import keyboardcontrol
+
+
+class FakeDisplay(object):
+
+    """Looks up keysyms in a keymap, counting the lookups."""
+
+    def __init__(self):
+        self.keymap = {38: XK.XK_a, 39: XK.XK_s}
+        self.lookups = 0
+        self.refreshes = []
+        # What EventField needs to parse events.
+        self.display = self
+        self.event_classes = event.event_class
+
+    def keycode_to_keysym(self, keycode, index):
+        self.lookups += 1
+        return self.keymap.get(keycode, X.NoSymbol)
+
+    def get_resource_class(self, class_name):
+        # Windows in parsed events are left as ids.
+        return None
+
+    def refresh_keyboard_mapping(self, mapping_notify):
+        self.refreshes.append((mapping_notify.first_keycode,
+                               mapping_notify.count))
+
+
+class FakeReply(object):
+
+    """A reply from the RECORD extension holding events."""
+
+    category = record.FromServer
+    client_swapped = False
+
+    def __init__(self, events):
+        self.data = "".join(e._binary for e in events)
+
+
+def key_event(event_class, keycode, modifiers=0):
+    return event_class(detail=keycode, time=0, root=0, window=0, child=0,
+                       root_x=0, root_y=0, event_x=0, event_y=0,
+                       state=modifiers, same_screen=1)
+
+
+def mapping_notify(first_keycode=38, count=1, request=X.MappingKeyboard):
+    return event.MappingNotify(request=request, first_keycode=first_keycode,
+                               count=count)
+
+
+class RecordingCapture(keyboardcontrol.KeyboardCapture):
+
+    """KeyboardCapture with a fake display, recording the events it passes
+    on."""
+
+    def __init__(self):
+        # Not calling KeyboardCapture.__init__, which connects to X.
+        self.local_display = self.record_display = FakeDisplay()
+        self.key_event_cache = keyboardcontrol.KeyEventCache(
+            self.local_display)
+        self.key_events_to_ignore = []
+        self.events = []
+        self.key_down = lambda e: self.events.append(("down", e))
+        self.key_up = lambda e: self.events.append(("up", e))
+
+
+class KeyboardCaptureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.capture = RecordingCapture()
+        self.display = self.capture.local_display
+
+    def get_events(self):
+        return [(direction, e.keycode, e.modifiers, e.keystring)
+                for direction, e in self.capture.events]
+
+    def test_burst(self):
+
+        """A chord's key events are all passed on, in order."""
+
+        keycodes = range(24, 36)
+        self.capture.process_events(FakeReply(
+            [key_event(event.KeyPress, keycode) for keycode in keycodes] +
+            [key_event(event.KeyRelease, keycode, X.ShiftMask)
+             for keycode in keycodes]))
+        self.assertEquals([e[:3] for e in self.get_events()],
+                          [("down", keycode, 0) for keycode in keycodes] +
+                          [("up", keycode, X.ShiftMask)
+                           for keycode in keycodes])
+
+    def test_keysyms_cached(self):
+
+        """Keysyms are looked up once for each keycode and modifiers."""
+
+        self.capture.process_events(FakeReply(
+            [key_event(event.KeyPress, 38), key_event(event.KeyRelease, 38),
+             key_event(event.KeyPress, 38), key_event(event.KeyRelease, 38),
+             key_event(event.KeyPress, 38, X.ShiftMask)]))
+        self.assertEquals(self.display.lookups, 2)
+        self.assertEquals([e[3] for e in self.get_events()], ["a"] * 5)
+
+    def test_mapping_notify(self):
+
+        """A keyboard mapping change refreshes the keymap once, and keysyms
+        are looked up again."""
+
+        self.capture.process_events(FakeReply(
+            [key_event(event.KeyPress, 38)]))
+        self.display.keymap[38] = XK.XK_q
+        # One for each client it was delivered to.
+        self.capture.process_events(FakeReply(
+            [mapping_notify(), mapping_notify(),
+             mapping_notify(request=X.MappingModifier)]))
+        self.assertEquals(self.display.refreshes, [])
+        self.capture.process_events(FakeReply(
+            [key_event(event.KeyRelease, 38)]))
+        self.assertEquals(self.display.refreshes, [(38, 1)])
+        self.assertEquals([e[3] for e in self.get_events()], ["a", "q"])
+
+    def test_ignore_key_events(self):
+
+        """Events sent by KeyboardEmulation are ignored once each."""
+
+        self.capture.ignore_key_events([(39, X.KeyPress),
+                                        (39, X.KeyRelease)])
+        self.capture.process_events(FakeReply(
+            [key_event(event.KeyPress, 39), key_event(event.KeyRelease, 39),
+             key_event(event.KeyPress, 39)]))
+        self.assertEquals(self.get_events(), [("down", 39, 0, "s")])
+
+
+if __name__ == '__main__':
+    unittest.main()
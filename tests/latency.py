@@ -0,0 +1,89 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test timing chords from the machine to the screen."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import tempfile
+import time
+import unittest
+
+from fly.utils import latency
+
+
+class LatencyRecorderTest(unittest.TestCase):
+
+    """Latencies are recorded for each stage and summarised."""
+
+    def setUp(self):
+        self.recorder = latency.LatencyRecorder()
+
+    def test_percentiles(self):
+
+        """Percentiles are of the latencies recorded."""
+
+        self.assertEquals(self.recorder.get_percentiles(
+                              latency.MODEL_STAGE), None)
+        for i in range(1, 101):
+            self.recorder.add(latency.MODEL_STAGE, i / 1000.)
+        self.assertEquals(self.recorder.get_percentiles(latency.MODEL_STAGE),
+                          (0.05, 0.095, 0.099))
+        self.assertEquals(self.recorder.get_count(latency.MODEL_STAGE), 100)
+
+    def test_only_recent_kept(self):
+
+        """The oldest latencies are replaced by new ones."""
+
+        recorder = latency.LatencyRecorder(samples_kept=2)
+        for i in (5, 1, 2):
+            recorder.add(latency.TOTAL_STAGE, i)
+        self.assertEquals(recorder.get_percentiles(latency.TOTAL_STAGE),
+                          (1, 2, 2))
+
+    def test_chord_through_every_stage(self):
+
+        """A chord passing through plover and the game loop is timed at
+        every stage."""
+
+        recorder = self.recorder
+        recorder.on_steno_keys(["K-", "A-", "-T"])
+        recorder.on_translation(None, None)
+        stroke_timestamp = recorder.record_queued()
+        queued = time.time()
+        started = time.time()
+        recorder.record_model(queued, stroke_timestamp, started, time.time())
+        recorder.record_displayed()
+        # Nothing pending, so nothing more recorded.
+        recorder.record_displayed()
+
+        for stage in latency.STAGES:
+            self.assertEquals(recorder.get_count(stage), 1)
+        total = recorder.get_percentiles(latency.TOTAL_STAGE)[0]
+        self.assert_(total >= 0)
+
+    def test_report(self):
+
+        """The report has a line for each stage recorded."""
+
+        self.recorder.add(latency.QUEUE_STAGE, 0.0125)
+        lines = self.recorder.get_report().split("\n")
+        self.assertEquals(len(lines), 2)
+        self.assertEquals(lines[1].split(),
+                          ["queue", "1", "12.50", "12.50", "12.50"])
+
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            self.recorder.write_report(path)
+            with open(path) as f:
+                self.assertEquals(f.read(), self.recorder.get_report() + "\n")
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
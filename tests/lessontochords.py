@@ -0,0 +1,102 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test generating the chords file of a lesson."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from fly.lessons.helpers import tochords
+
+DUMMY_DICT = {u"WE": u"we",
+              u"-F": u"of",
+              u"WAS": u"was",
+              u"TKOG": u"dog",
+              u"TP-PL": u"{.}"}
+
+LINES = ["<random_word><word>\n",
+         "we was\n",
+         "of dog.\n"]
+
+
+class LessonToChordsTest(unittest.TestCase):
+
+    """Chords are streamed to the chords file, which is only replaced when
+    all are written."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.lesson_path = os.path.join(self.temp_dir, "lesson.les")
+        self.chords_path = os.path.join(self.temp_dir, "lesson.chd")
+        self.lines = LINES * tochords.PROGRESS_LINES
+        with open(self.lesson_path, 'w') as f:
+            f.writelines(self.lines)
+        self.chord_helper = tochords.LessonToChords(DUMMY_DICT, processes=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_chords_file(self):
+
+        """Each line of the lesson has a line of chords."""
+
+        progress = []
+        chords_path = self.chord_helper.get_chords_file_path(
+                self.lesson_path, progress.append)
+        self.assertEquals(chords_path, self.chords_path)
+
+        with open(chords_path) as f:
+            chords = f.read()
+        self.assertEquals(chords, '\n'.join(
+                self.chord_helper.translator.translate_from_file(
+                    self.lesson_path)))
+        self.assertEquals(chords.split('\n')[:3],
+                          ["", "WE WAS", "-F TKOG TP-PL"])
+
+        self.assertEquals(progress, sorted(progress))
+        self.assertTrue(len(progress) > 1)
+        self.assertEquals(progress[-1], 1.0)
+        self.assertEquals(sorted(os.listdir(self.temp_dir)),
+                          ["lesson.chd", "lesson.les"])
+
+    def test_processes(self):
+
+        """Translating across several processes writes the same chords."""
+
+        self.chord_helper.generate_chords(self.lesson_path, self.chords_path)
+        with open(self.chords_path) as f:
+            expected = f.read()
+        chord_helper = tochords.LessonToChords(DUMMY_DICT, processes=2)
+        self.assertEquals(chord_helper.processes, 2)
+        chord_helper.generate_chords(self.lesson_path, self.chords_path)
+        with open(self.chords_path) as f:
+            self.assertEquals(f.read(), expected)
+
+    def test_cancel(self):
+
+        """Cancelling leaves the existing chords file alone."""
+
+        with open(self.chords_path, 'w') as f:
+            f.write("old chords")
+        cancel_event = threading.Event()
+        cancel_event.set()
+
+        self.assertRaises(tochords.GenerationCancelledError,
+                          self.chord_helper.generate_chords, self.lesson_path,
+                          self.chords_path, None, cancel_event)
+        with open(self.chords_path) as f:
+            self.assertEquals(f.read(), "old chords")
+        self.assertEquals(sorted(os.listdir(self.temp_dir)),
+                          ["lesson.chd", "lesson.les"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# Copyright (c) 2012 Pragma Nolint. 
+# See LICENSE.txt for details.
+
+"""Test the store that holds the chords of all difficulty levels."""
+
+# Hack so that all modules can be imported from Fly, 
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import unittest
+
+from fly.utils import leveldictstore
+
+
+def setUpLevelDicts():
+
+    """Make six small nested level dicts, easiest first."""
+
+    one = {"S": "is", "T": "it"}
+    two = dict(one, **{"TKO": "do"})
+    three = dict(two, **{"SKWRAOEUS": "juice"})
+    four = dict(three, **{"HEL/HRO": "hello"})
+    five = dict(four)
+    six = dict(five, **{"KAP": "Cap"})
+    return [one, two, three, four, five, six]
+
+
+class LevelDictionaryStoreTest(unittest.TestCase):
+
+    """Every chord is stored once, each level is a view onto the store."""
+
+    def setUp(self):
+        self.level_dicts = setUpLevelDicts()
+        self.store = leveldictstore.LevelDictionaryStore.from_level_dicts(
+                                                            self.level_dicts)
+
+    def test_chords_stored_once(self):
+
+        """The store has one entry per chord, not one per level."""
+
+        self.assertEquals(len(self.store), len(self.level_dicts[-1]))
+
+    def test_level_views_match_level_dicts(self):
+
+        """Each level view contains exactly the chords of that level."""
+
+        for level, level_dict in enumerate(self.level_dicts, 1):
+            self.assertEquals(self.store.get_level_dict(level), level_dict)
+
+    def test_minimum_level(self):
+
+        """Chords are tagged with the first level they appear in."""
+
+        view = self.store.get_level_view(3)
+        levels = dict((self.store.get_chord(offset), 
+                       self.store.levels[offset]) for offset in view)
+        self.assertEquals(levels, {"S": 1, "T": 1, "TKO": 2, 
+                                   "SKWRAOEUS": 3})
+
+    def test_round_trip(self):
+
+        """A store written out as a dict reads back the same."""
+
+        store_dict = self.store.to_dict()
+        store = leveldictstore.LevelDictionaryStore.from_dict(store_dict)
+        for level in range(1, 7):
+            self.assertEquals(store.get_level_dict(level), 
+                              self.store.get_level_dict(level))
+
+    def test_invalid_level(self):
+
+        """Levels outside 1 to 6 are rejected."""
+
+        self.assertRaises(ValueError, self.store.get_level_view, 0)
+        self.assertRaises(ValueError, self.store.get_level_view, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
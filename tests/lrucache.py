@@ -0,0 +1,89 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test the least recently used cache."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import unittest
+
+from fly.utils import lrucache
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    """The least recently used entry is evicted, and use is counted."""
+
+    def setUp(self):
+        self.cache = lrucache.LRUCache(2)
+
+    def test_get_and_put(self):
+
+        """Values put in are got back, and missing keys give the default."""
+
+        self.cache.put("the", "-T")
+        self.assertEquals(self.cache.get("the"), "-T")
+        self.assertEquals(self.cache.get("of"), None)
+        self.assertEquals(self.cache.get("of", "-F"), "-F")
+        self.cache.put("the", "TH-E")
+        self.assertEquals(self.cache.get("the"), "TH-E")
+        self.assertTrue("the" in self.cache)
+        self.assertEquals(len(self.cache), 1)
+
+    def test_least_recently_used_evicted(self):
+
+        """A full cache drops the entry used longest ago."""
+
+        self.cache.put("the", "-T")
+        self.cache.put("of", "-F")
+        self.cache.get("the")
+        self.cache.put("a", "AEU")
+
+        self.assertFalse("of" in self.cache)
+        self.assertTrue("the" in self.cache)
+        self.assertTrue("a" in self.cache)
+        self.assertEquals(len(self.cache), 2)
+
+    def test_put_marks_used(self):
+
+        """Putting a new value for a cached key makes it the most recently
+        used."""
+
+        self.cache.put("the", "-T")
+        self.cache.put("of", "-F")
+        self.cache.put("the", "TH-E")
+        self.cache.put("a", "AEU")
+
+        self.assertFalse("of" in self.cache)
+        self.assertEquals(self.cache.get("the"), "TH-E")
+        self.assertTrue("a" in self.cache)
+
+    def test_stats(self):
+
+        """Hits, misses and evictions are counted."""
+
+        self.cache.put("the", "-T")
+        self.cache.get("the")
+        self.cache.get("the")
+        self.cache.get("of")
+        self.cache.put("of", "-F")
+        self.cache.put("a", "AEU")
+        self.assertEquals(self.cache.get_stats(),
+                          {"hits": 2, "misses": 1, "evictions": 1, "size": 2})
+
+        self.cache.clear()
+        self.assertEquals(len(self.cache), 0)
+        self.assertEquals(self.cache.get("a"), None)
+
+    def test_invalid_size(self):
+
+        """A cache must be able to hold something."""
+
+        self.assertRaises(ValueError, lrucache.LRUCache, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,412 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test plover's formatter renders translations incrementally, typing what
+rendering the whole translation buffer again would."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import random
+import unittest
+
+from fly.plover import formatting
+from fly.plover import orthography
+from fly.plover import steno
+from fly.plover.dictionary import eclipse
+from fly.tests.stenotranslator import DummyMachine
+
+STROKE_KEYS = [['K-', 'A-', '-T'],
+               ['A-'],
+               ['-L', '-G'],
+               ['S-', '-T'],
+               ['T-', '-E'],
+               ['P-', 'H-'],
+               ['-D'],
+               ['-Z']]
+CORRECTION_KEYS = ['*']
+
+ENGLISH = ["cat", "walk", "try", "{^ed}", "{^ing}", "{^s}", "{^er}",
+           "{.}", "{,}", "{-|}", "{&a}", "{&b}", "{^-^}", "{in^}",
+           "{^ish}", "{#Return}", "{PLOVER:SUSPEND}", "\\{brace\\}",
+           "hello {.} world", "{^}"]
+
+NUMBER_OF_STROKES = 200
+
+
+class RecordingOutput(object):
+
+    """Records everything the formatter sends, and the text it leaves."""
+
+    def __init__(self):
+        self.sent = []
+        self.text = ''
+
+    def send_backspaces(self, number_of_backspaces):
+        self.sent.append(('backspaces', number_of_backspaces))
+        if number_of_backspaces:
+            self.text = self.text[:-number_of_backspaces]
+
+    def send_string(self, s):
+        self.sent.append(('string', s))
+        self.text += s
+
+    def send_key_combination(self, c):
+        self.sent.append(('combination', c))
+
+
+class BruteForceFormatter(object):
+
+    """Renders the whole translation buffer for every translation, as
+    plover's formatter used to.
+
+    A copy of the formatter before it rendered incrementally, sharing only
+    its constants, so that it checks the rendering of the formatter as well
+    as the working out of what changed.
+    """
+
+    def __init__(self, translator, text_output=None):
+        self.translator = translator
+        self.text_output = text_output
+        self.keystrokes = ''
+        self.key_combos = []
+        self.translator.add_callback(self.consume_translation)
+
+    def consume_translation(self, translation, overflow):
+        if self._get_engine_command(translation):
+            return
+
+        num_backspaces = 0
+        non_backspaces = ''
+        if overflow:
+            tBuffer = [overflow] + self.translator.translations
+        else:
+            tBuffer = self.translator.translations
+        new_keystrokes, new_key_combos = self._translations_to_string(tBuffer)
+        old_length = len(self.keystrokes)
+        new_length = len(new_keystrokes)
+        for i in range(min(old_length, new_length)):
+            if self.keystrokes[i] != new_keystrokes[i]:
+                num_backspaces += old_length - i
+                non_backspaces = new_keystrokes[i:]
+                break
+        else:
+            if old_length > new_length:
+                num_backspaces += old_length - new_length
+            else:
+                non_backspaces = new_keystrokes[old_length:]
+
+        skip_count = new_length - len(non_backspaces)
+        while new_key_combos and self.key_combos:
+            if new_key_combos[0] == self.key_combos[0]:
+                skip_count += 1
+                new_key_combos.pop(0)
+                self.key_combos.pop(0)
+            else:
+                break
+
+        self.text_output.send_backspaces(num_backspaces)
+        prev_i = 0
+        for i, combo in new_key_combos:
+            i -= skip_count
+            skip_count += 1
+            self.text_output.send_string(non_backspaces[prev_i:i])
+            self.text_output.send_key_combination(combo)
+            prev_i = i
+        self.text_output.send_string(non_backspaces[prev_i:])
+
+        self.keystrokes, self.key_combos = self._translations_to_string(
+                                               self.translator.translations)
+
+    def _translations_to_string(self, translations):
+        text_length = 0
+        text = []
+        key_combinations = []
+        previous_atom = None
+        for translation in translations:
+            if self._get_engine_command(translation):
+                continue
+            if translation.english is not None:
+                to_atomize = translation.english
+                if to_atomize.isdigit():
+                    to_atomize = self._apply_glue(to_atomize)
+                atoms = formatting.META_RE.findall(to_atomize)
+            else:
+                to_atomize = translation.rtfcre
+                if to_atomize.isdigit():
+                    to_atomize = self._apply_glue(to_atomize)
+                atoms = [to_atomize]
+            for atom in atoms:
+                atom = atom.strip()
+                if text:
+                    space = formatting.SPACE
+                else:
+                    space = formatting.NO_SPACE
+                meta = self._get_meta(atom)
+                if meta is not None:
+                    meta = self._unescape_atom(meta)
+                    english = meta
+                    space = formatting.NO_SPACE
+                    old_text = ''
+                    if meta == formatting.META_ED_SUFFIX:
+                        if text:
+                            old_text = text.pop()
+                            english = orthography.add_ed_suffix(old_text)
+                    elif meta == formatting.META_ER_SUFFIX:
+                        if text:
+                            old_text = text.pop()
+                            english = orthography.add_er_suffix(old_text)
+                    elif meta == formatting.META_ING_SUFFIX:
+                        if text:
+                            old_text = text.pop()
+                            english = orthography.add_ing_suffix(old_text)
+                    elif (meta in formatting.META_COMMAS or
+                          meta in formatting.META_STOPS):
+                        pass
+                    elif meta == formatting.META_PLURALIZE:
+                        if text:
+                            old_text = text.pop()
+                            english = orthography.pluralize_with_s(old_text)
+                    elif meta.startswith(formatting.META_GLUE_FLAG):
+                        english = meta[1:]
+                        previous_meta = self._get_meta(previous_atom)
+                        if (previous_meta is None or
+                            not previous_meta.startswith(
+                                formatting.META_GLUE_FLAG)):
+                            space = formatting.SPACE
+                    elif meta.startswith(formatting.META_ATTACH_FLAG):
+                        english = meta[1:]
+                        if english.endswith(formatting.META_ATTACH_FLAG):
+                            english = english[:-1]
+                    elif meta.endswith(formatting.META_ATTACH_FLAG):
+                        space = formatting.SPACE
+                        english = meta[:-1]
+                    elif meta == formatting.META_CAPITALIZE:
+                        english = formatting.NO_SPACE
+                    elif meta.startswith(formatting.META_KEY_COMBINATION):
+                        english = formatting.NO_SPACE
+                        combo = meta[1:]
+                        key_combinations.append((text_length, combo))
+                        text_length += 1
+                    text_length -= len(old_text)
+                else:
+                    english = self._unescape_atom(atom)
+
+                previous_meta = self._get_meta(previous_atom)
+                if previous_meta is not None:
+                    if previous_meta in formatting.META_STOPS:
+                        space = formatting.STOP_SPACE
+                        english = english.capitalize()
+                    elif previous_meta == formatting.META_CAPITALIZE:
+                        space = formatting.NO_SPACE
+                        english = english.capitalize()
+                    elif previous_meta.endswith(formatting.META_ATTACH_FLAG):
+                        space = formatting.NO_SPACE
+                    elif previous_meta.startswith(
+                            formatting.META_KEY_COMBINATION):
+                        space = formatting.NO_SPACE
+
+                new_text = space + english
+                text_length += len(new_text)
+                text.append(new_text)
+                previous_atom = atom
+
+        return (''.join(text), key_combinations)
+
+    def _get_meta(self, atom):
+        if (atom is not None and
+            atom.startswith(formatting.META_START) and
+            atom.endswith(formatting.META_END)):
+            return atom[1:-1]
+        return None
+
+    def _unescape_atom(self, atom):
+        return atom.replace(formatting.META_ESC_START,
+                            formatting.META_START).replace(
+                                formatting.META_ESC_END, formatting.META_END)
+
+    def _get_engine_command(self, translation):
+        cmd = translation.english
+        if (cmd and
+            cmd.startswith(formatting.META_START + formatting.META_COMMAND) and
+            cmd.endswith(formatting.META_END)):
+            return cmd[len(formatting.META_COMMAND) + 1:-1]
+        return None
+
+    def _apply_glue(self, s):
+        return (formatting.META_START + formatting.META_GLUE_FLAG + s +
+                formatting.META_END)
+
+
+def make_dictionary(strokes, random_generator):
+
+    """Make a dictionary of random entries of up to three strokes."""
+
+    dictionary = {}
+    for i in range(30):
+        length = random_generator.randint(1, 3)
+        entry = [random_generator.choice(strokes) for j in range(length)]
+        rtfcre = eclipse.STROKE_DELIMITER.join([s.rtfcre for s in entry])
+        dictionary[rtfcre] = random_generator.choice(ENGLISH)
+    return dictionary
+
+
+class FormatterTest(unittest.TestCase):
+
+    """Incremental rendering types what brute force rendering does."""
+
+    def setUp(self):
+        self.strokes = [steno.Stroke(keys, eclipse) for keys in STROKE_KEYS]
+        self.correction = steno.Stroke(CORRECTION_KEYS, eclipse)
+
+    def get_stroke_stream(self, random_generator):
+        stream = []
+        for i in range(NUMBER_OF_STROKES):
+            if random_generator.random() < 0.15:
+                stream.append(self.correction)
+            else:
+                stream.append(random_generator.choice(self.strokes))
+        return stream
+
+    def format(self, formatter_class, dictionary, stroke_stream,
+               max_number_of_strokes=None):
+
+        """Return the output of formatter and every overflowed translation."""
+
+        translator = steno.Translator(DummyMachine(), dictionary, eclipse,
+                                      max_number_of_strokes)
+        output = RecordingOutput()
+        formatter_class(translator, output)
+        overflowed = []
+        translator.add_callback(lambda translation, overflow:
+                                overflow and overflowed.append(overflow))
+        for stroke in stroke_stream:
+            translator.consume_stroke(stroke)
+        return output, overflowed + translator.translations
+
+    def test_same_as_brute_force(self):
+
+        """Without overflow, the same is sent as by brute force."""
+
+        random_generator = random.Random(3)
+        for i in range(10):
+            dictionary = make_dictionary(self.strokes, random_generator)
+            stream = self.get_stroke_stream(random_generator)
+            expected, translations = self.format(BruteForceFormatter,
+                                                 dictionary, stream, 1000)
+            actual, translations = self.format(formatting.Formatter,
+                                               dictionary, stream, 1000)
+            self.assertEquals(actual.sent, expected.sent)
+
+    def test_overflow_keeps_context(self):
+
+        """The text typed is that of every translation made, even once
+        translations have overflowed. The old formatter lost the context of
+        what overflowed, so this is checked against rendering every
+        translation rather than against it."""
+
+        random_generator = random.Random(4)
+        for i in range(10):
+            dictionary = make_dictionary(self.strokes, random_generator)
+            stream = self.get_stroke_stream(random_generator)
+            output, translations = self.format(formatting.Formatter,
+                                               dictionary, stream)
+            formatter = BruteForceFormatter(steno.Translator(
+                DummyMachine(), {}, eclipse))
+            text, key_combinations = \
+                formatter._translations_to_string(translations)
+            self.assertEquals(output.text, text)
+
+    def test_undo_after_overflow(self):
+
+        """Undoing the last translation doesn't leave the space before it,
+        as rendering the buffer without what overflowed used to."""
+
+        kat = self.strokes[0]
+        dictionary = {kat.rtfcre: "walk"}
+        stream = [kat, kat, kat, self.correction]
+        expected, translations = self.format(BruteForceFormatter, dictionary,
+                                             stream, 1)
+        self.assertEquals(expected.text, "walk walk ")
+        actual, translations = self.format(formatting.Formatter, dictionary,
+                                           stream, 1)
+        self.assertEquals(actual.text, "walk walk")
+
+    def test_suffix_changes_overflowed_word(self):
+
+        """A suffix can change a word that has overflowed."""
+
+        kat, a = self.strokes[0], self.strokes[1]
+        dictionary = {kat.rtfcre: "walk", a.rtfcre: "{^ed}"}
+        output, translations = self.format(formatting.Formatter, dictionary,
+                                           [kat, a, self.correction, a], 1)
+        self.assertEquals(output.text, "walked")
+
+
+class AtomCacheTest(unittest.TestCase):
+
+    """Dictionary entries are parsed into atoms once, and counted."""
+
+    def test_parse_atoms(self):
+
+        """Meta commands are split from text and unescaped."""
+
+        self.assertEquals(formatting.parse_atoms("hello {.} \\{world\\}"),
+                          ((None, "hello"), (".", "."),
+                           (None, "{world}")))
+        self.assertEquals(formatting.parse_atoms("{^\\}^}"),
+                          (("^\\}^", "^}^"),))
+        self.assertEquals(formatting.parse_atoms("42"), (("&42", "&42"),))
+
+    def test_hits_and_misses(self):
+
+        """Entries are parsed when first got, and kept."""
+
+        cache = formatting.AtomCache()
+        atoms = cache.get_atoms("{^ing}")
+        self.assertEquals(atoms, (("^ing", "^ing"),))
+        self.assert_(cache.get_atoms("{^ing}") is atoms)
+        self.assertEquals(cache.get_stats(), {"hits": 1, "misses": 1,
+                                              "evictions": 0, "size": 1})
+
+    def test_bounded(self):
+
+        """A full cache drops an entry to make room."""
+
+        cache = formatting.AtomCache(2)
+        for english in ("a", "b", "c"):
+            cache.get_atoms(english)
+        self.assertEquals(cache.get_stats(), {"hits": 0, "misses": 3,
+                                              "evictions": 1, "size": 2})
+        self.assertRaises(ValueError, formatting.AtomCache, 0)
+
+    def test_preload(self):
+
+        """Preloaded entries are hits, up to the size of the cache."""
+
+        cache = formatting.AtomCache(2)
+        cache.preload(["the", "of", "and"])
+        self.assertEquals(cache.get_stats()["size"], 2)
+        cache.get_atoms("the")
+        self.assertEquals(cache.get_stats()["hits"], 1)
+
+    def test_formatter_uses_cache(self):
+
+        """A formatter fills its cache as it renders."""
+
+        kat = steno.Stroke(STROKE_KEYS[0], eclipse)
+        translator = steno.Translator(DummyMachine(), {kat.rtfcre: "cat"},
+                                      eclipse)
+        output = RecordingOutput()
+        cache = formatting.AtomCache()
+        formatting.Formatter(translator, output, atom_cache=cache)
+        for i in range(3):
+            translator.consume_stroke(kat)
+        self.assertEquals(output.text, "cat cat cat")
+        self.assertEquals(cache.get_stats()["misses"], 1)
+        self.assertEquals(cache.get_stats()["hits"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
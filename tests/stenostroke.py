@@ -0,0 +1,79 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test the plover steno stroke."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import unittest
+
+from fly.plover import steno
+from fly.plover.dictionary import dcat
+from fly.plover.dictionary import eclipse
+
+
+class StrokeTest(unittest.TestCase):
+
+    """Strokes are ordered, formatted and compared by their keys."""
+
+    def test_keys_are_ordered(self):
+
+        """Keys come out in steno order whatever order they went in."""
+
+        stroke = steno.Stroke(["-T", "A-", "K-", "-T"], eclipse)
+        self.assertEquals(list(stroke.steno_keys), ["K-", "A-", "-T"])
+        self.assertEquals(stroke.rtfcre, "KAT")
+        self.assertEquals(str(stroke), "Stroke(KAT : ['K-', 'A-', '-T'])")
+
+    def test_number_bar(self):
+
+        """The number bar turns keys with a number into numbers."""
+
+        stroke = steno.Stroke(["T-", "#", "-P"], eclipse)
+        self.assertEquals(list(stroke.steno_keys), ["2-", "-7"])
+        self.assertEquals(stroke.rtfcre, "2-7")
+
+        # Without a number key, the bar is kept.
+        stroke = steno.Stroke(["#", "-R"], eclipse)
+        self.assertEquals(list(stroke.steno_keys), ["#", "-R"])
+
+    def test_correction(self):
+
+        """Only the asterisk on its own is a correction."""
+
+        self.assertTrue(steno.Stroke(["*"], eclipse).is_correction)
+        self.assertFalse(steno.Stroke(["*", "-S"], eclipse).is_correction)
+
+    def test_equality(self):
+
+        """Strokes with the same keys are equal and hash the same."""
+
+        stroke = steno.Stroke(["S-", "-S"], eclipse)
+        same = steno.Stroke(["-S", "S-"], eclipse)
+        other = steno.Stroke(["S-"], eclipse)
+        self.assertEquals(stroke, same)
+        self.assertFalse(stroke != same)
+        self.assertNotEqual(stroke, other)
+        self.assertNotEqual(stroke, "S-S")
+        self.assertEquals(len(set([stroke, same, other])), 2)
+
+    def test_formats_are_kept_apart(self):
+
+        """A stroke is formatted by its own dictionary format."""
+
+        self.assertEquals(steno.Stroke(["K-", "-T"], eclipse).rtfcre, "K-T")
+        self.assertEquals(steno.Stroke(["K-", "-T"], dcat).rtfcre,
+                          dcat.toRTFCRE(["K-", "-T"]))
+
+    def test_unknown_key(self):
+
+        """Keys which aren't steno keys are refused."""
+
+        self.assertRaises(KeyError, steno.Stroke, ["K-", "pwr"], eclipse)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,264 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test plover's translator translates strokes incrementally, exactly as
+translating every stroke in its buffer again would."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import random
+import threading
+import unittest
+
+from fly.plover import steno
+from fly.plover.dictionary import eclipse
+
+STROKE_KEYS = [['K-', 'A-', '-T'],
+               ['A-'],
+               ['-L', '-G'],
+               ['S-', '-T'],
+               ['T-', '-E'],
+               ['P-', 'H-']]
+CORRECTION_KEYS = ['*']
+
+NUMBER_OF_STROKES = 400
+
+
+class DummyMachine(object):
+
+    """Stands in for a steno machine, which the translator listens to."""
+
+    def add_callback(self, callback):
+        pass
+
+
+class PrefixDict(dict):
+
+    """Dictionary which knows its own prefixes, like a string table."""
+
+    def has_prefix(self, prefix):
+        for key in self:
+            if key.startswith(prefix):
+                return True
+        return False
+
+
+class BruteForceTranslator(steno.Translator):
+
+    """Translates the whole stroke buffer after every stroke, as plover's
+    translator used to."""
+
+    def consume_stroke(self, stroke):
+        if stroke.is_correction and len(self.strokes) > 0:
+            self.strokes.pop()
+        self.overflow = None
+        if len(self.strokes) >= self.max_number_of_strokes:
+            self.overflow = self.translations.pop(0)
+            for s0 in self.overflow.strokes:
+                s1 = self.strokes.pop(0)
+                if s0 != s1:
+                    raise(RuntimeError("Steno stroke buffers out of sync."))
+        if not stroke.is_correction:
+            self.strokes.append(stroke)
+
+        new_translations = []
+        n = 0
+        while n != len(self.strokes):
+            unused = self.strokes[n:]
+            for i in range(len(unused), 0, -1):
+                longest_translation = steno.Translation(unused[:i],
+                                                        self.dictionary)
+                if longest_translation.english != None:
+                    break
+            else:
+                longest_translation = steno.Translation(unused[0:1],
+                                                        self.dictionary)
+            new_translations.append(longest_translation)
+            n += len(longest_translation)
+
+        old_translations = self.translations
+        self.translations = new_translations
+        for i in range(min(len(old_translations), len(new_translations))):
+            if old_translations[i] != new_translations[i]:
+                for t in old_translations[i:]:
+                    t.is_correction = True
+                    self._emit_translation(t)
+                for t in new_translations[i:]:
+                    self._emit_translation(t)
+                break
+        else:
+            if len(old_translations) > len(new_translations):
+                for t in old_translations[len(new_translations):]:
+                    t.is_correction = True
+                    self._emit_translation(t)
+            else:
+                for t in new_translations[len(old_translations):]:
+                    self._emit_translation(t)
+
+
+class BlockingDict(dict):
+
+    """Dictionary whose lookups wait to be released once blocked, so a
+    stroke can be held part way through being translated."""
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.looked_up = threading.Event()
+        self.released = threading.Event()
+        self.released.set()
+
+    def get(self, key, default=None):
+        self.looked_up.set()
+        self.released.wait()
+        return dict.get(self, key, default)
+
+
+def make_dictionary(strokes, random_generator, dictionary_class=dict):
+
+    """Make a dictionary of random entries of up to four strokes."""
+
+    dictionary = dictionary_class()
+    for i in range(25):
+        length = random_generator.randint(1, 4)
+        entry = [random_generator.choice(strokes) for j in range(length)]
+        rtfcre = eclipse.STROKE_DELIMITER.join([s.rtfcre for s in entry])
+        dictionary[rtfcre] = "entry%s" % i
+    return dictionary
+
+
+class TranslatorTest(unittest.TestCase):
+
+    """Incremental translation emits what brute force translation does."""
+
+    def setUp(self):
+        self.strokes = [steno.Stroke(keys, eclipse) for keys in STROKE_KEYS]
+        self.correction = steno.Stroke(CORRECTION_KEYS, eclipse)
+
+    def translate(self, translator_class, dictionary, stroke_stream,
+                  max_number_of_strokes=None, new_dictionary=None):
+
+        """Return everything translator emits and holds for the strokes."""
+
+        emitted = []
+        translator = translator_class(DummyMachine(), dictionary, eclipse,
+                                      max_number_of_strokes)
+
+        def record(translation, overflow):
+            emitted.append((translation.rtfcre, translation.english,
+                            translation.is_correction,
+                            overflow and overflow.rtfcre))
+        translator.add_callback(record)
+
+        for i, stroke in enumerate(stroke_stream):
+            if new_dictionary is not None and i == len(stroke_stream) // 2:
+                translator.set_dictionary(new_dictionary,
+                                          max_number_of_strokes)
+            translator.consume_stroke(stroke)
+            emitted.append([t.rtfcre for t in translator.translations])
+        return emitted
+
+    def check_same_as_brute_force(self, seed, dictionary_class=dict,
+                                  max_number_of_strokes=None,
+                                  change_dictionary=False):
+        random_generator = random.Random(seed)
+        dictionary = make_dictionary(self.strokes, random_generator,
+                                     dictionary_class)
+        new_dictionary = None
+        if change_dictionary:
+            new_dictionary = make_dictionary(self.strokes, random_generator,
+                                             dictionary_class)
+        stroke_stream = []
+        for i in range(NUMBER_OF_STROKES):
+            if random_generator.random() < 0.1:
+                stroke_stream.append(self.correction)
+            else:
+                stroke_stream.append(random_generator.choice(self.strokes))
+
+        expected = self.translate(BruteForceTranslator, dictionary,
+                                  stroke_stream, max_number_of_strokes,
+                                  new_dictionary)
+        actual = self.translate(steno.Translator, dictionary, stroke_stream,
+                                max_number_of_strokes, new_dictionary)
+        self.assertEquals(actual, expected)
+
+    def test_random_streams(self):
+
+        """Random strokes translate the same as by brute force."""
+
+        for seed in range(20):
+            self.check_same_as_brute_force(seed)
+
+    def test_short_buffer(self):
+
+        """Overflowing a buffer shorter than some entries is handled."""
+
+        for seed in range(20):
+            self.check_same_as_brute_force(seed, max_number_of_strokes=2)
+
+    def test_dictionary_with_prefixes(self):
+
+        """A dictionary that knows its prefixes isn't indexed."""
+
+        for seed in range(5):
+            self.check_same_as_brute_force(seed, PrefixDict)
+
+    def test_change_dictionary(self):
+
+        """Strokes are translated again with a new dictionary."""
+
+        for seed in range(10):
+            self.check_same_as_brute_force(seed, change_dictionary=True)
+
+    def test_longest_entry_wins(self):
+
+        """A longer entry replaces the shorter ones it starts with."""
+
+        kat, a, lg = self.strokes[:3]
+        dictionary = {kat.rtfcre: "cat",
+                      "%s/%s/%s" % (kat.rtfcre, a.rtfcre, lg.rtfcre):
+                          "catalogue"}
+        emitted = self.translate(steno.Translator, dictionary, [kat, a, lg])
+        self.assertEquals(emitted[-1], ["KAT/A/-LG"])
+        self.assertEquals(emitted[-2], ("KAT/A/-LG", "catalogue", False,
+                                        None))
+
+    def test_change_dictionary_while_translating(self):
+
+        """A dictionary set from another thread while a stroke is being
+        translated is only swapped in once the stroke is translated."""
+
+        kat, a = self.strokes[:2]
+        old_dictionary = BlockingDict({kat.rtfcre: "cat"})
+        new_dictionary = {kat.rtfcre: "kit", a.rtfcre: "a"}
+        translator = steno.Translator(DummyMachine(), old_dictionary, eclipse,
+                                      10)
+        old_dictionary.released.clear()
+
+        translating = threading.Thread(target=translator.consume_stroke,
+                                       args=(kat,))
+        translating.daemon = True
+        translating.start()
+        try:
+            old_dictionary.looked_up.wait()
+            swapping = threading.Thread(target=translator.set_dictionary,
+                                        args=(new_dictionary, 10))
+            swapping.daemon = True
+            swapping.start()
+            swapping.join(0.1)
+            self.assertTrue(swapping.is_alive())
+        finally:
+            old_dictionary.released.set()
+        translating.join()
+        swapping.join()
+        self.assertEquals([t.english for t in translator.translations],
+                          ["cat"])
+        translator.consume_stroke(a)
+        self.assertEquals([t.english for t in translator.translations],
+                          ["kit", "a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test the memory mapped string table dictionary."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from fly.utils import dictionaryreader
+from fly.utils import stringtable
+from fly.translation import wordstochords
+
+DUMMY_DICT = {u"WE": u"we",
+              u"-F": u"of",
+              u"WA": u"was",
+              u"WAS": u"was",
+              u"WUZ": u"was",
+              u"KA*EUT/KWRA": u"ca\xf1on",
+              u"TP-PL": u"{.}"}
+
+
+class StringTableTest(unittest.TestCase):
+
+    """A string table looks up like the dict it was built from."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dict_path = os.path.join(self.temp_dir, "dummy_dict.json")
+        with open(self.dict_path, 'w') as f:
+            json.dump(DUMMY_DICT, f)
+        self.table = stringtable.load_table(self.dict_path)
+
+    def tearDown(self):
+        self.table.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_lookup(self):
+
+        """Chords look up the same as in the dict."""
+
+        for chord, english in DUMMY_DICT.iteritems():
+            self.assertEquals(self.table[chord], english)
+            self.assertTrue(chord in self.table)
+        self.assertEquals(self.table.get("WE"), u"we")
+        self.assertEquals(self.table.get("TKOG"), None)
+        self.assertEquals(self.table.get("TKOG", "dog"), "dog")
+        self.assertFalse("TKOG" in self.table)
+        self.assertRaises(KeyError, self.table.__getitem__, "TKOG")
+
+    def test_iteration(self):
+
+        """Iterating gives every entry, in chord order."""
+
+        self.assertEquals(len(self.table), len(DUMMY_DICT))
+        self.assertEquals(dict(self.table.iteritems()), DUMMY_DICT)
+        self.assertEquals(self.table.keys(), sorted(DUMMY_DICT))
+        self.assertEquals(self.table.max_strokes, 2)
+
+    def test_has_prefix(self):
+
+        """Prefixes of chords are found, so the translator knows which
+        strokes begin a longer chord."""
+
+        self.assertTrue(self.table.has_prefix("KA*EUT/"))
+        self.assertTrue(self.table.has_prefix("W"))
+        self.assertTrue(self.table.has_prefix("WAS"))
+        self.assertFalse(self.table.has_prefix("WE/"))
+        self.assertFalse(self.table.has_prefix("Z"))
+
+    def test_rebuilt_when_source_changes(self):
+
+        """A changed json dict gets a new table."""
+
+        with open(self.dict_path, 'w') as f:
+            json.dump({"TKOG": "dog"}, f)
+        # Make sure the change is visible even on coarse mtime filesystems.
+        mtime = os.path.getmtime(self.dict_path) + 10
+        os.utime(self.dict_path, (mtime, mtime))
+
+        table = stringtable.load_table(self.dict_path)
+        self.assertEquals(dict(table.iteritems()), {u"TKOG": u"dog"})
+        self.assertEquals(table.source_stamp,
+                          dictionaryreader.get_source_stamp(self.dict_path))
+        table.close()
+
+    def test_invalid_table_replaced(self):
+
+        """A file that isn't a table is rejected, and rebuilt on load."""
+
+        table_path = stringtable.get_table_path(self.dict_path)
+        with open(table_path, 'wb') as f:
+            f.write("not a table")
+        self.assertRaises(stringtable.StringTableError,
+                          stringtable.StringTable, table_path)
+
+        table = stringtable.load_table(self.dict_path)
+        self.assertEquals(table["-F"], u"of")
+        table.close()
+
+    def test_word_to_chord_translation(self):
+
+        """Words translate to chords straight from the table."""
+
+        translator = wordstochords.WordToChordTranslator(self.table)
+        self.assertEquals(translator.translate_word("we"), u"WE")
+        self.assertTrue(translator.translate_word("was") in
+                        [u"WA", u"WAS", u"WUZ"])
+
+
+if __name__ == '__main__':
+    unittest.main()
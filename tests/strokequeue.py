@@ -0,0 +1,87 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test the queue of translations from plover to the game loop."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import threading
+import unittest
+
+from fly.translation import strokequeue
+
+
+class DummyTranslation(object):
+
+    """Stands in for a plover translation."""
+
+    def __init__(self, rtfcre, english, is_correction=False):
+        self.rtfcre = rtfcre
+        self.english = english
+        self.is_correction = is_correction
+
+
+class StrokeQueueTest(unittest.TestCase):
+
+    """Translations are drained in order, and dropped only when full."""
+
+    def test_drain_in_order(self):
+
+        """Every translation pushed is drained once, oldest first."""
+
+        queue = strokequeue.StrokeQueue()
+        overflow = DummyTranslation("-T", "the")
+        queue.push(DummyTranslation("KAT", "cat"), None)
+        queue.push(DummyTranslation("KAT", "cat", True), overflow)
+        queue.push(DummyTranslation("KAT/A/LOG", "catalogue"), None)
+
+        events = queue.drain()
+        self.assertEquals([(e.chord, e.translation, e.is_correction)
+                           for e in events],
+                          [("KAT", "cat", False), ("KAT", "cat", True),
+                           ("KAT/A/LOG", "catalogue", False)])
+        self.assert_(events[1].overflow is overflow)
+        self.assert_(events[0].timestamp <= events[2].timestamp)
+        self.assertEquals(queue.drain(), [])
+        self.assertEquals(queue.get_dropped_count(), 0)
+
+    def test_oldest_dropped_when_full(self):
+
+        """A full queue drops its oldest translation, and counts it."""
+
+        queue = strokequeue.StrokeQueue(2)
+        for word in ("the", "of", "and"):
+            queue.push(DummyTranslation("-", word), None)
+        self.assertEquals(len(queue), 2)
+        self.assertEquals([e.translation for e in queue.drain()],
+                          ["of", "and"])
+        self.assertEquals(queue.get_dropped_count(), 1)
+        self.assertRaises(ValueError, strokequeue.StrokeQueue, 0)
+
+    def test_push_from_thread(self):
+
+        """Translations pushed from another thread while draining are all
+        drained, in order."""
+
+        queue = strokequeue.StrokeQueue(100000)
+        count = 20000
+
+        def push():
+            for i in xrange(count):
+                queue.push(DummyTranslation("-", i), None)
+
+        thread = threading.Thread(target=push)
+        thread.start()
+        drained = []
+        while thread.is_alive():
+            drained.extend(queue.drain())
+        thread.join()
+        drained.extend(queue.drain())
+        self.assertEquals([e.translation for e in drained], range(count))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test replaying a stroke log through plover as if from a machine."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import ConfigParser
+import shutil
+import tempfile
+import time
+import unittest
+
+from fly.plover import config as conf
+from fly.plover.machine import replay
+
+STROKE_LOG = """2012-03-01 09:30:02,125 Stroke(K- A- -T)
+2012-03-01 09:30:02,125 Translation(KAT : cat)
+2012-03-01 09:30:02,375 Stroke(*)
+2012-03-01 09:30:03,000 Stroke(S- -T)
+"""
+
+
+class StrokeReplayTest(unittest.TestCase):
+
+    """Logged strokes are read and replayed in order, at the speed asked."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.directory, "plover.log")
+        with open(self.log_file, "w") as f:
+            f.write(STROKE_LOG)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def replay(self, machine):
+        replayed = []
+        machine.add_callback(lambda steno_keys: 
+                             replayed.append((time.time(), steno_keys)))
+        machine.start_capture()
+        machine.join(10)
+        return replayed
+
+    def test_read_stroke_log(self):
+
+        """Only strokes are read, with the time between them."""
+
+        strokes = replay.read_stroke_log(self.log_file)
+        self.assertEquals([keys for timestamp, keys in strokes],
+                          [["K-", "A-", "-T"], ["*"], ["S-", "-T"]])
+        self.assertAlmostEquals(strokes[1][0] - strokes[0][0], 0.25)
+        self.assertAlmostEquals(strokes[2][0] - strokes[0][0], 0.875)
+
+    def test_write_stroke_log(self):
+
+        """A written log reads back the same."""
+
+        strokes = replay.read_stroke_log(self.log_file)
+        strokes.append((None, ["-Z"]))
+        log_file = os.path.join(self.directory, "written.log")
+        replay.write_stroke_log(log_file, strokes)
+        self.assertEquals(replay.read_stroke_log(log_file), strokes)
+
+    def test_as_fast_as_possible(self):
+
+        """Strokes are replayed in order without waiting."""
+
+        start = time.time()
+        machine = replay.Stenotype(self.log_file, replay.AS_FAST_AS_POSSIBLE)
+        replayed = self.replay(machine)
+        self.assertEquals([keys for t, keys in replayed],
+                          [["K-", "A-", "-T"], ["*"], ["S-", "-T"]])
+        self.assert_(time.time() - start < 0.5)
+        self.assertEquals(machine.replayed_count, 3)
+
+    def test_speed(self):
+
+        """The time between strokes is as logged, divided by speed."""
+
+        machine = replay.Stenotype(self.log_file, speed=5)
+        replayed = self.replay(machine)
+        self.assertEquals(len(replayed), 3)
+        elapsed = replayed[-1][0] - replayed[0][0]
+        self.assert_(0.875 / 5 - 0.01 <= elapsed < 0.875 / 5 + 0.15, elapsed)
+
+    def test_stop_capture(self):
+
+        """Stopping capture stops replay without waiting for the next
+        stroke."""
+
+        strokes = [(0, ["S-"]), (60, ["-T"])]
+        machine = replay.Stenotype(strokes=strokes)
+        replayed = []
+        machine.add_callback(replayed.append)
+        machine.start_capture()
+        time.sleep(0.05)
+        machine.stop_capture()
+        machine.join(1)
+        self.assertFalse(machine.is_alive())
+        self.assertEquals(replayed, [["S-"]])
+
+    def test_arguments(self):
+
+        """A log or strokes are needed, and speed can't be negative."""
+
+        self.assertRaises(ValueError, replay.Stenotype)
+        self.assertRaises(ValueError, replay.Stenotype, self.log_file, -1)
+
+    def test_config(self):
+
+        """Replay arguments are read from the configuration."""
+
+        config = ConfigParser.RawConfigParser()
+        params = conf.get_replay_params(config)
+        self.assertEquals(params["log_file"],
+                          os.path.join(conf.CONFIG_DIR,
+                                       "plover" + conf.JOURNAL_EXTENSION))
+        self.assertEquals(params["speed"], 1.0)
+
+        config.add_section(conf.REPLAY_CONFIG_SECTION)
+        config.set(conf.REPLAY_CONFIG_SECTION, conf.REPLAY_LOG_FILE_OPTION,
+                   self.log_file)
+        config.set(conf.REPLAY_CONFIG_SECTION, conf.REPLAY_SPEED_OPTION, "0")
+        self.assertEquals(conf.get_replay_params(config),
+                          {"log_file": self.log_file, "speed": 0.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
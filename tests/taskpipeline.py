@@ -0,0 +1,93 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test the pipeline that loads Fly in the background."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import threading
+import unittest
+
+from fly.utils import taskpipeline
+
+TIMEOUT = 5
+
+
+class TaskPipelineTest(unittest.TestCase):
+
+    """Tasks run after their dependencies, and report weighted progress."""
+
+    def setUp(self):
+        self.pipeline = taskpipeline.TaskPipeline()
+
+    def test_dependencies_run_first(self):
+
+        """A task can use the results of the tasks it depends on."""
+
+        pipeline = self.pipeline
+        pipeline.add_task("words", lambda progress: ["we", "of"])
+        pipeline.add_task("count",
+                          lambda progress: len(pipeline.get_result("words")),
+                          depends_on=("words",))
+        pipeline.start()
+
+        self.assertEquals(pipeline.get_result("count", TIMEOUT), 2)
+        self.assertTrue(pipeline.all_done())
+        self.assertEquals(pipeline.get_progress(), 1.0)
+
+    def test_weighted_progress(self):
+
+        """Progress is weighted, and partial progress of a task counts."""
+
+        release = threading.Event()
+        halfway = threading.Event()
+
+        def slow_task(progress):
+            progress(0.5)
+            halfway.set()
+            release.wait(TIMEOUT)
+
+        self.pipeline.add_task("quick", lambda progress: None, weight=1)
+        self.pipeline.add_task("slow", slow_task, weight=3)
+        self.pipeline.start()
+        halfway.wait(TIMEOUT)
+        self.pipeline.get_result("quick", TIMEOUT)
+
+        self.assertFalse(self.pipeline.is_done("slow"))
+        self.assertEquals(self.pipeline.get_progress(), 2.5 / 4)
+        self.assertEquals(self.pipeline.get_progress(["quick"]), 1.0)
+
+        release.set()
+        self.pipeline.get_result("slow", TIMEOUT)
+        self.assertEquals(self.pipeline.get_progress(), 1.0)
+
+    def test_failure_raised_to_caller(self):
+
+        """Failures are raised where the result is used, and stop tasks
+        depending on the failed one."""
+
+        def failing_task(progress):
+            raise IOError("Missing dictionary")
+
+        self.pipeline.add_task("load", failing_task)
+        self.pipeline.add_task("use", lambda progress: True,
+                               depends_on=("load",))
+        self.pipeline.start()
+
+        self.assertRaises(IOError, self.pipeline.get_result, "load", TIMEOUT)
+        self.assertRaises(taskpipeline.TaskFailedError,
+                          self.pipeline.get_result, "use", TIMEOUT)
+
+    def test_unknown_dependency(self):
+
+        """Dependencies must be added before the tasks that need them."""
+
+        self.assertRaises(ValueError, self.pipeline.add_task, "use",
+                          lambda progress: True, depends_on=("load",))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test the cache of fonts and rendered text."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+# Draw without opening a window.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import unittest
+
+import pygame
+
+from fly.gui import genericelements
+from fly.gui import textcache
+
+
+class TextCacheTest(unittest.TestCase):
+
+    """Fonts and text are rendered once, and use of the caches is counted."""
+
+    def setUp(self):
+        pygame.font.init()
+        textcache.clear()
+        self.stats = textcache.get_stats()
+
+    def tearDown(self):
+        textcache.clear()
+
+    def get_new_stats(self):
+
+        """Return the counts since the test started."""
+
+        stats = textcache.get_stats()
+        for name in ("font_hits", "font_misses", "text_hits", "text_misses",
+                     "text_evictions"):
+            stats[name] -= self.stats[name]
+        return stats
+
+    def test_render_once(self):
+
+        """The same text is rendered once and its surface shared."""
+
+        first = textcache.render("the", 16, (0, 0, 0))
+        second = textcache.render("the", 16, [0, 0, 0])
+        self.assertTrue(first is second)
+        stats = self.get_new_stats()
+        self.assertEquals(stats["text_hits"], 1)
+        self.assertEquals(stats["text_misses"], 1)
+        self.assertEquals(stats["texts"], 1)
+
+    def test_text_differs(self):
+
+        """Text in another colour or without antialiasing is rendered
+        again, but in the same font."""
+
+        first = textcache.render("the", 16, (0, 0, 0))
+        self.assertFalse(first is textcache.render("the", 16, (255, 0, 0)))
+        self.assertFalse(first is textcache.render("the", 16, (0, 0, 0),
+                                                   antialias=False))
+        stats = self.get_new_stats()
+        self.assertEquals(stats["text_misses"], 3)
+        self.assertEquals(stats["font_misses"], 1)
+        self.assertEquals(stats["font_hits"], 2)
+        self.assertEquals(stats["fonts"], 1)
+
+    def test_font_size_rounded(self):
+
+        """Sizes which aren't whole share the font of the size rounded
+        down."""
+
+        font = textcache.get_font(16)
+        self.assertTrue(textcache.get_font(16.5) is font)
+        self.assertFalse(textcache.get_font(17) is font)
+        self.assertEquals(self.get_new_stats()["fonts"], 2)
+
+    def test_evictions(self):
+
+        """Texts beyond the size of the cache evict the least recently
+        used."""
+
+        for i in range(textcache.TEXT_CACHE_SIZE + 1):
+            textcache.render(str(i), 16, (0, 0, 0))
+        stats = self.get_new_stats()
+        self.assertEquals(stats["text_evictions"], 1)
+        self.assertEquals(stats["texts"], textcache.TEXT_CACHE_SIZE)
+
+    def test_static_screen(self):
+
+        """Drawing a screen again without changing it does no font work."""
+
+        screen = pygame.Surface((400, 300))
+        elements = [genericelements.Caption((0, 0), 20, (200, 20),
+                                            "the\nof"),
+                    genericelements.KeyboardKey((0, 60), (40, 40), "q", "S-"),
+                    genericelements.DisplayPanel((0, 100), (200, 30),
+                                                 "Speed"),
+                    genericelements.Button((0, 140), (100, 30), "Options")]
+        for element in elements:
+            element.blit_on(screen)
+        drawn = self.get_new_stats()
+        for element in elements:
+            element.blit_on(screen)
+        stats = self.get_new_stats()
+        self.assertEquals(stats["text_misses"], drawn["text_misses"])
+        self.assertEquals(stats["font_misses"], drawn["font_misses"])
+        self.assertEquals(stats["font_hits"], drawn["font_hits"])
+        self.assertTrue(stats["text_hits"] > drawn["text_hits"])
+
+
+if __name__ == "__main__":
+    unittest.main()
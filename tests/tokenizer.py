@@ -0,0 +1,72 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test splitting lesson text into words and punctuation."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import unittest
+
+from fly.translation import tokenizer
+from fly.translation.tokenizer import WORD, PUNCTUATION, OPENING_QUOTE, \
+                                      CLOSING_QUOTE
+
+
+class TokenizerTest(unittest.TestCase):
+
+    """Punctuation is split from words, and directives are skipped."""
+
+    def test_words_and_punctuation(self):
+
+        """Punctuation attached to words is split out."""
+
+        self.assertEquals(list(tokenizer.tokenize_line(
+                                 "For transient sorrows, simple wiles;\n")),
+                          [("For", WORD), ("transient", WORD),
+                           ("sorrows", WORD), (",", PUNCTUATION),
+                           ("simple", WORD), ("wiles", WORD),
+                           (";", PUNCTUATION)])
+        self.assertEquals(list(tokenizer.tokenize_line("well-to-do maid's")),
+                          [("well", WORD), ("-", PUNCTUATION), ("to", WORD),
+                           ("-", PUNCTUATION), ("do", WORD),
+                           ("maid's", WORD)])
+        self.assertEquals(list(tokenizer.tokenize_line("salt & 1...")),
+                          [("salt", WORD), ("&", PUNCTUATION), ("1", WORD),
+                           (".", PUNCTUATION), (".", PUNCTUATION),
+                           (".", PUNCTUATION)])
+
+    def test_quotes(self):
+
+        """Quotes at the start of a word open, others close."""
+
+        self.assertEquals(list(tokenizer.tokenize_line('He said "Hi."')),
+                          [("He", WORD), ("said", WORD),
+                           ('"', OPENING_QUOTE), ("Hi", WORD),
+                           (".", PUNCTUATION), ('"', CLOSING_QUOTE)])
+        self.assertEquals([tokenizer.get_dictionary_form(token, kind) for
+                           token, kind in tokenizer.tokenize_line('"Hi?"')],
+                          ['{"^}', "Hi", "{?}", '{^"}'])
+
+    def test_directives_skipped(self):
+
+        """Anything with angle brackets is left out."""
+
+        self.assertEquals(list(tokenizer.tokenize_line(
+                                 "<random_word><word>\n")), [])
+        self.assertEquals(list(tokenizer.tokenize_line("a <b>bold</b> x,<y")),
+                          [("a", WORD)])
+
+    def test_sentence_index(self):
+
+        """Tokens of many lines know which line they are from."""
+
+        self.assertEquals(list(tokenizer.tokenize(["One two.", "", "Three"])),
+                          [("One", WORD, 0), ("two", WORD, 0),
+                           (".", PUNCTUATION, 0), ("Three", WORD, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Test decoding TX Bolt bytes, and ending strokes when the port is idle."""
+
+# Hack so that all modules can be imported from Fly,
+# but this can be run just by calling it as a script.
+import sys, os
+sys.path.append(os.path.dirname(os.getcwd()))
+
+import threading
+import time
+import unittest
+
+from fly.plover.machine import txbolt
+from fly.tests.fakestenotype import TxBoltEncoder, open_pty
+
+
+def encode(steno_keys):
+
+    """Return the bytes of a stroke, a byte for each set with keys."""
+
+    return TxBoltEncoder().encode(steno_keys)
+
+
+class StrokeDecoderTest(unittest.TestCase):
+
+    """Strokes end where the protocol says they do."""
+
+    def setUp(self):
+        self.decoder = txbolt.StrokeDecoder()
+
+    def test_earlier_set_ends_stroke(self):
+
+        """A byte of the same or an earlier set starts a new stroke."""
+
+        self.assertEquals(self.decoder.decode(encode(["S-", "A-"]) +
+                                              encode(["T-"]) +
+                                              encode(["K-"])),
+                          [["S-", "A-"], ["T-"]])
+        self.assertEquals(self.decoder.flush(), ["K-"])
+        self.assertEquals(self.decoder.flush(), None)
+
+    def test_zero_byte_ends_stroke(self):
+
+        """A zero byte ends a stroke, and is ignored between strokes."""
+
+        self.assertEquals(self.decoder.decode("\0" + encode(["A-", "-F"]) +
+                                              "\0\0" + encode(["-R"])),
+                          [["A-", "-F"]])
+        self.assertEquals(self.decoder.flush(), ["-R"])
+
+    def test_last_set_ends_stroke(self):
+
+        """A stroke with keys in the last set ends with its last byte."""
+
+        self.assertEquals(self.decoder.decode(encode(["S-", "-T", "#"])),
+                          [["S-", "-T", "#"]])
+        self.assertEquals(self.decoder.flush(), None)
+
+    def test_split_across_reads(self):
+
+        """The bytes of a stroke can arrive in separate reads."""
+
+        data = encode(["K-", "A-", "-P"])
+        self.assertEquals(self.decoder.decode(data[:1]), [])
+        self.assertEquals(self.decoder.decode(data[1:]), [])
+        self.assertEquals(self.decoder.decode(data[:1]),
+                          [["K-", "A-", "-P"]])
+
+
+class RecordingStenotype(txbolt.Stenotype):
+
+    """TX Bolt machine which records when it ends strokes."""
+
+    def __init__(self, **kwargs):
+        txbolt.Stenotype.__init__(self, **kwargs)
+        self.strokes = []
+        self.received = threading.Event()
+        self.add_callback(self.on_stroke)
+
+    def on_stroke(self, steno_keys):
+        self.strokes.append((time.time(), steno_keys))
+        self.received.set()
+
+
+class IdleTimeoutTest(unittest.TestCase):
+
+    """A pty stands in for the machine's serial port."""
+
+    def setUp(self):
+        self.master, self.slave, name = open_pty()
+        self.machine = RecordingStenotype(port=name, idle_timeout=0.1)
+        self.machine.start_capture()
+
+    def tearDown(self):
+        self.machine.stop_capture()
+        os.close(self.master)
+        os.close(self.slave)
+        self.assertFalse(self.machine.isAlive())
+
+    def test_idle_timeout_ends_stroke(self):
+
+        """A stroke is ended once no bytes arrive for the idle timeout."""
+
+        written = time.time()
+        os.write(self.master, encode(["S-", "T-", "A-"]))
+        self.assertTrue(self.machine.received.wait(2))
+        ended, steno_keys = self.machine.strokes[0]
+        self.assertEquals(steno_keys, ["S-", "T-", "A-"])
+        self.assertTrue(0.1 <= ended - written < 0.5)
+
+    def test_last_set_ends_stroke_at_once(self):
+
+        """A stroke ending with the last set doesn't wait for the timeout."""
+
+        written = time.time()
+        os.write(self.master, encode(["S-", "-T"]))
+        self.assertTrue(self.machine.received.wait(2))
+        ended, steno_keys = self.machine.strokes[0]
+        self.assertEquals(steno_keys, ["S-", "-T"])
+        self.assertTrue(ended - written < 0.1)
+
+    def test_idle(self):
+
+        """The machine sleeps between idle timeouts while nothing is
+        written."""
+
+        start = os.times()
+        time.sleep(0.5)
+        end = os.times()
+        self.assertTrue(end[0] + end[1] - start[0] - start[1] < 0.1)
+        self.assertEquals(self.machine.strokes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
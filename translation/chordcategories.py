@@ -0,0 +1,50 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Categories of steno chords, and choosing which chord to teach for a word.
+
+A word can usually be written with several chords. Each chord is given a
+category in word_category.json (see data/generation/categoriser.py), and
+the chord taught is the one in the most preferred category.
+"""
+
+CANON = "canon"
+ALTERNATIVE = "alternative"
+BRIEF = "brief"
+MISSTROKE = "misstroke"
+UNKNOWN = "unknown"
+
+# Most preferred first.
+CATEGORY_PREFERENCE = (CANON, ALTERNATIVE, UNKNOWN, BRIEF, MISSTROKE)
+
+# Returned when no chord can be preferred, so any may be used.
+NO_CANON_CHORD = -1
+
+
+def get_canon_offset(chord_list, categorization_dict):
+
+    """Find canon chord if possible, or nearest alternative.
+
+    @param chord_list: steno chords for one word
+    @param categorization_dict: dict used to categorize chords.
+        For example (dummy data only) {"PARD": "unknown",
+                                       "AUL": "canon"}
+
+    @type chord_list: list of str
+    @type categorization_dict: dict of str: str
+
+    @return: offset in chord_list of the chord to use, or NO_CANON_CHORD if
+             none of the chords has a known category
+    @rtype: int
+    """
+
+    category_offsets = {}
+    for offset, chord in enumerate(chord_list):
+        category = categorization_dict.get(chord)
+        if category is not None:
+            category_offsets[category] = offset
+
+    for category in CATEGORY_PREFERENCE:
+        if category in category_offsets:
+            return category_offsets[category]
+    return NO_CANON_CHORD
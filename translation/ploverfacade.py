@@ -13,9 +13,10 @@ from fly.plover.dictionary import eclipse as dictionary_module
 from fly.plover.machine import base
 
 # Won't register as instance of sidewinder.Stenotype if from fly
+from plover.machine import replay
 from plover.machine import sidewinder
 
-from fly.utils import dictionaryreader, files as fileutils
+from fly.utils import dictionaryregistry
 
 
 class PloverControl(object):
@@ -26,24 +27,54 @@ class PloverControl(object):
         self.dictionary = None
         self.running = False
         self.machine_init = {}
+        self.latency_recorder = None
 
-    def set_up_steno(self, translation_callback_function):
+    def set_up_steno(self, translation_callback_function, 
+                     load_dictionary=True, latency_recorder=None):
 
         """Start a steno machine that will intercept keystrokes and translate.
 
         @param translation_callback_function: function that uses translation.
             Should take a translation object L{plover.steno.Translation} and
             an overflow.
+        @param load_dictionary: if False, start translating without a
+            dictionary (chords only, no english). Call L{set_dictionary}
+            when it has been loaded.
+        @param latency_recorder: if given, times each chord through plover
+
         @type translation_callback_function: function
+        @type load_dictionary: bool
+        @type latency_recorder: L{fly.utils.latency.LatencyRecorder}
         """
        
         machine_module = self.get_machine_module()
         self.steno_machine = machine_module.Stenotype(**self.machine_init)
         self.translation_callback_function = translation_callback_function
+        self.latency_recorder = latency_recorder
+        if latency_recorder:
+            # Before the translator, so chords are timed as they arrive.
+            self.steno_machine.add_callback(latency_recorder.on_steno_keys)
+
+        if load_dictionary:
+            self.dictionary = dictionaryregistry.get_plover_dict()
+            self.translator = self.create_translator(self.dictionary)
+        else:
+            self.translator = self.create_translator({})
+
+    def set_dictionary(self, dictionary):
+
+        """Translate with dictionary from now on.
+
+        Can be called from a worker thread while the machine is running:
+        the translator swaps the dictionary in between strokes.
+
+        @param dictionary: steno to english dictionary
+        @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+        """
 
-        dict_filename = fileutils.get_plover_dict_path()
-        self.dictionary = dictionaryreader.load_dict(dict_filename)
-        self.translator = self.create_translator(self.dictionary)
+        self.translator.set_dictionary(
+                dictionary, metadata=dictionaryregistry.get_metadata(dictionary))
+        self.dictionary = dictionary
 
     def get_machine_module(self):
 
@@ -66,6 +97,10 @@ class PloverControl(object):
                       base.SerialStenotypeBase):
             serial_params = conf.get_serial_params(machine_type, config)
             self.machine_init.update(serial_params.__dict__)
+            self.machine_init.update(conf.get_idle_timeout_params(
+                machine_type, config))
+        elif issubclass(machine_module.Stenotype, replay.Stenotype):
+            self.machine_init.update(conf.get_replay_params(config))
 
         return machine_module
 
@@ -74,7 +109,7 @@ class PloverControl(object):
         """Get plover's dictionary.
 
         @return: steno to english dictionary
-        @rtype: dict
+        @rtype: dict or L{fly.utils.stringtable.StringTable}
         """
 
         if not self.dictionary:
@@ -87,14 +122,18 @@ class PloverControl(object):
         """Create a steno translator and return it. Add callback function.
 
         @param dictionary: steno to english dictionary
-        @type dictionary: dict
+        @type dictionary: dict or L{fly.utils.stringtable.StringTable}
 
         @return: plover translator object
         @rtype: L{plover.steno.Translator}
         """
 
+        # Precomputed metadata saves the translator a scan of every key.
+        metadata = dictionaryregistry.get_metadata(dictionary)
         translator = steno.Translator(self.steno_machine, dictionary, 
-                                      dictionary_module)
+                                      dictionary_module, metadata=metadata)
+        if self.latency_recorder:
+            translator.add_callback(self.latency_recorder.on_translation)
         translator.add_callback(self.translation_callback_function)
         return translator
 
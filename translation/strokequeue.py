@@ -0,0 +1,99 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Hands translations from plover's machine thread to the game loop.
+
+Plover calls back from the thread reading the steno machine, and the game
+loop looks for input once a frame. Students writing quickly can write more
+than one chord in a frame, so every translation is queued and the game loop
+takes all of them, in order, each frame.
+"""
+
+import collections
+import threading
+import time
+
+# How many translations are held before the oldest are dropped. Far more
+# than can be written in a frame, so only reached if the game loop stalls.
+STROKE_QUEUE_SIZE = 256
+
+StrokeEvent = collections.namedtuple("StrokeEvent", ["chord", "translation",
+                                                     "overflow", "timestamp",
+                                                     "is_correction",
+                                                     "stroke_timestamp"])
+
+
+class StrokeQueue(object):
+
+    """Bounded first in first out queue of L{StrokeEvent}s.
+
+    Safe for one thread to push while another drains. The lock is only held
+    to add an event or to take all of them, never while they are handled.
+    When the queue is full the oldest event is dropped, and counted.
+    """
+
+    def __init__(self, max_size=STROKE_QUEUE_SIZE):
+
+        """
+        @param max_size: most events held before the oldest are dropped
+        @type max_size: int
+        """
+
+        if max_size < 1:
+            raise ValueError("Queue must hold at least one event, not %s" %
+                             max_size)
+        self.events = collections.deque(maxlen=max_size)
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def push(self, translation, overflow, stroke_timestamp=None):
+
+        """Queue a translation from plover.
+
+        Has the signature of a plover translator callback, so can be
+        registered with one directly.
+
+        @param translation: translation of the chord written
+        @param overflow: translation that no longer fits in plover's
+                         buffer, or None
+        @param stroke_timestamp: time the machine sent the chord, if known
+
+        @type translation: L{plover.steno.Translation}
+        @type overflow: L{plover.steno.Translation}
+        @type stroke_timestamp: float
+        """
+
+        event = StrokeEvent(translation.rtfcre, translation.english,
+                            overflow, time.time(), translation.is_correction,
+                            stroke_timestamp)
+        with self.lock:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+
+    def drain(self):
+
+        """Take every queued event.
+
+        @return: events in the order they were pushed
+        @rtype: list of L{StrokeEvent}
+        """
+
+        with self.lock:
+            if not self.events:
+                return []
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+    def get_dropped_count(self):
+
+        """Return how many events were dropped because the queue was full.
+
+        @rtype: int
+        """
+
+        return self.dropped
+
+    def __len__(self):
+        return len(self.events)
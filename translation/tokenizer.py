@@ -0,0 +1,107 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Split lesson text into words and punctuation.
+
+Lines are split on white space, and punctuation is split from the words it
+is attached to. Text containing a directive (in angle brackets) is skipped.
+Each line is tokenized in a single pass by one compiled regular expression.
+
+For example 'He said "Hello, world."' gives
+
+    ("He", WORD), ("said", WORD), ('"', OPENING_QUOTE), ("Hello", WORD),
+    (",", PUNCTUATION), ("world", WORD), (".", PUNCTUATION),
+    ('"', CLOSING_QUOTE)
+
+Anything without a letter or number in it (such as "&") is PUNCTUATION.
+"""
+
+import re
+
+WORD = "word"
+PUNCTUATION = "punctuation"
+OPENING_QUOTE = "opening quote"
+CLOSING_QUOTE = "closing quote"
+
+# How quotes and punctuation appear in the plover dict.
+OPENING_QUOTE_ENTRY = r'{"^}'
+CLOSING_QUOTE_ENTRY = r'{^"}'
+PUNCTUATION_ENTRY = "{%s}"
+
+# Characters split from the words they are attached to.
+SPLIT_CHARACTERS = r'\-.,?;!:"'
+
+# Alternatives are tried in order at each position. A directive is tried
+# first so that the whole of any text containing one is skipped.
+TOKEN_PATTERN = re.compile(r"""
+    (?P<directive>\S*[<>]\S*)
+   |(?P<opening_quote>(?<!\S)")
+   |(?P<closing_quote>")
+   |(?P<punctuation>[%(split)s])
+   |(?P<word>[^\s%(split)s]*\w[^\s%(split)s]*)
+   |(?P<symbol>[^\s%(split)s]+)
+   """ % {'split': SPLIT_CHARACTERS}, re.VERBOSE)
+
+KINDS = {'opening_quote': OPENING_QUOTE,
+         'closing_quote': CLOSING_QUOTE,
+         'punctuation': PUNCTUATION,
+         'word': WORD,
+         'symbol': PUNCTUATION}
+
+
+def tokenize_line(line):
+
+    """Yield each word or punctuation mark in line.
+
+    @param line: line of english text
+    @type line: str
+
+    @return: (token, kind) where kind is one of WORD, PUNCTUATION,
+             OPENING_QUOTE or CLOSING_QUOTE
+    @rtype: tuple (str, str)
+    """
+
+    kinds = KINDS
+    for match in TOKEN_PATTERN.finditer(line):
+        kind = kinds.get(match.lastgroup)
+        if kind is not None:
+            yield match.group(), kind
+
+
+def tokenize(lines):
+
+    """Yield each word or punctuation mark in lines of text.
+
+    @param lines: lines of english text, such as an open lesson file
+    @type lines: iterable of str
+
+    @return: (token, kind, sentence index) where sentence index is the
+             index of the line the token is in. See L{tokenize_line}.
+    @rtype: tuple (str, str, int)
+    """
+
+    for sentence_index, line in enumerate(lines):
+        for token, kind in tokenize_line(line):
+            yield token, kind, sentence_index
+
+
+def get_dictionary_form(token, kind):
+
+    """Return token as it appears as a translation in the plover dict.
+
+    @param token: word or punctuation mark
+    @param kind: kind of token, see L{tokenize_line}
+
+    @type token: str
+    @type kind: str
+
+    @rtype: str
+    """
+
+    if kind == WORD:
+        return token
+    if kind == OPENING_QUOTE:
+        return OPENING_QUOTE_ENTRY
+    if kind == CLOSING_QUOTE:
+        return CLOSING_QUOTE_ENTRY
+    return PUNCTUATION_ENTRY % token
@@ -8,38 +8,51 @@
 import sys, os
 sys.path.append(os.path.dirname(os.getcwd()))
 
-import re, random, types
+import re, random, types, zlib
+import multiprocessing
 
 from fly.data import alphabetdict as alphabet
-from fly.translation import ploverfacade
-from fly.utils import dictionaryreader
-from fly.utils import files as fileutils
+from fly.translation import chordcategories
+from fly.translation import tokenizer
+from fly.translation.chordcategories import CANON, ALTERNATIVE, BRIEF, \
+                                            MISSTROKE, UNKNOWN
+from fly.utils import dictionaryregistry
+from fly.utils import lrucache
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Number of words whose chords are remembered by a translator. Lessons
+# repeat common words so often that most lookups are for remembered words.
+TRANSLATION_CACHE_SIZE = 4096
 
-CANON = "canon"
-ALTERNATIVE = "alternative"
-BRIEF = "brief"
-MISSTROKE = "misstroke"
-UNKNOWN = "unknown"
+# Number of lines each process translates at a time in bulk translation.
+BULK_CHUNK_LINES = 256
+
+# Translator used by the worker processes of a bulk translation. Set before
+# the workers are forked, so they share its dictionary and index.
+_bulk_translator = None
 
 
 class ChordHolder(object):
 
     """Store all steno chords for a word, and retrieve several ways."""
 
-    def __init__(self, chord_or_list):
+    def __init__(self, chord_or_list, canon_offset=None):
 
         """
         @param chord: steno chord/list of steno chords
+        @param canon_offset: offset of the canon chord in the list, if it is
+                             already known. See L{get_canon_chord}.
+
         @type chord: str (or list of str)
+        @type canon_offset: int
         """
         if type(chord_or_list) is types.ListType:
             self.chord_list = chord_or_list
         else:
             self.chord_list = [chord_or_list]
+        self.canon_offset = canon_offset
 
     def add_chord(self, new_chord):
 
@@ -50,72 +63,65 @@ class ChordHolder(object):
         """
 
         self.chord_list.append(new_chord)
+        # The canon chord may have changed.
+        self.canon_offset = None
 
-    def get_random_chord(self):
+    def get_random_chord(self, random_generator=random):
 
         """All chords represent same english word. Return a chord randomly.
+
+        @param random_generator: source of the random choice
+        @type random_generator: random.Random
         
         @return: steno chord
         @rtype: str
         """
 
-        return random.choice(self.chord_list)
+        return random_generator.choice(self.chord_list)
+
+    def get_canon_offset(self, categorization_dict):
 
-    def get_canon_chord(self, categorization_dict):
+        """Return offset of the canon chord in the chord list.
+
+        See L{fly.translation.chordcategories.get_canon_offset}.
+
+        @param categorization_dict: dict used to categorize chords.
+        @type categorization_dict: dict of str: str
+
+        @rtype: int
+        """
+
+        if self.canon_offset is None:
+            self.canon_offset = chordcategories.get_canon_offset(
+                    self.chord_list, categorization_dict)
+        return self.canon_offset
+
+    def get_canon_chord(self, categorization_dict, random_generator=random):
 
         """Return canon chord if possible, or nearest alternative.
+
+        See L{fly.translation.chordcategories.get_canon_offset}. If no chord
+        has a known category, a random chord is returned.
         
         @param categorization_dict: dict used to categorize chords.
             For example (dummy data only) {"PARD": "unknown", 
                                            "AUL": "canon"}
+        @param random_generator: source of the random chord, if needed
+
         @type categorization_dict: dict of str: str
+        @type random_generator: random.Random
         
         @return: steno chord
         @rtype: str
         """
 
-        chord_categories = {}
-        for chord in self.chord_list:
-            if chord in categorization_dict:
-                chord_category = categorization_dict[chord]
-                chord_categories[chord_category] = chord
-            else:
-                logger.info("Uncategorized chord: %s."
-                            " Please run fly.data.generation.categoriser to "
-                            "categorize uncategorized words." % chord)
-
-        if not chord_categories:
-            logger.info("No categorization found for any chords, "
-                        "returning random.")
-            return self.get_random_chord()
-        
-        if CANON in chord_categories:
-            return chord_categories[CANON]
-
-        if ALTERNATIVE in chord_categories:
-            return chord_categories[ALTERNATIVE]
-
-        if UNKNOWN in chord_categories:
-            logger.info("No 'canon' or 'alternative' found! Using chord with "
-                        "'unknown' category %s" % chord_categories[UNKNOWN])
-            return chord_categories[UNKNOWN]
-
-        if BRIEF in chord_categories:
-            logger.info("No 'canon', 'alternative' or 'unknown' found! Using "
-                        "chord with 'brief' "
-                        "category %s" % chord_categories[BRIEF])
-            return chord_categories[BRIEF]
-
-        if MISSTROKE in chord_categories:
-            logger.info("No 'canon', 'alternative', 'unknown' or 'brief' "
-                        "found! Run out of options. Using chord "
-                        "with 'misstroke' "
-                        "category %s" % chord_categories[MISSTROKE])
-            return chord_categories[MISSTROKE]
-
-        logger.info("Unexpected categories found: %s. Returning random "
-                    "chord." % chord_categories)
-        return self.get_random_chord()
+        canon_offset = self.get_canon_offset(categorization_dict)
+        if canon_offset == chordcategories.NO_CANON_CHORD:
+            logger.debug("No categorization found for any of %s, returning "
+                         "random. Please run fly.data.generation.categoriser "
+                         "to categorize uncategorized words.", self)
+            return self.get_random_chord(random_generator)
+        return self.chord_list[canon_offset]
                 
     def get_easiest_chord(self):
 
@@ -149,6 +155,39 @@ class ChordHolder(object):
         return ", ".join(self.chord_list)
 
 
+class ReverseLookupDict(object):
+
+    """Inverse dict over an L{fly.utils.inverseindex.InverseIndex}, so that
+    a L{ChordHolder} is only created for the words that are looked up."""
+
+    def __init__(self, index):
+
+        """
+        @param index: english to chords index of the plover dict
+        @type index: L{fly.utils.inverseindex.InverseIndex}
+        """
+
+        self.index = index
+
+    def load(self):
+
+        """Read or build the index now, rather than when first used."""
+
+        self.index.load()
+        if self.index.categorization_dict is not None:
+            self.index.load_canon()
+
+    def __contains__(self, english):
+        return self.index.find(english) is not None
+
+    def __getitem__(self, english):
+        position = self.index.find(english)
+        if position is None:
+            raise KeyError(english)
+        return ChordHolder(self.index.get_chords(position),
+                           self.index.get_canon_offset(position))
+
+
 class WordToChordTranslator(object):
 
     """
@@ -157,16 +196,20 @@ class WordToChordTranslator(object):
     stored so words that all chords can be recovered.
     """
 
-    def __init__(self, dictionary):
+    def __init__(self, dictionary, cache_size=TRANSLATION_CACHE_SIZE):
 
         """
         @param dictionary: steno to english dictionary
-        @type dictionary: dict
+        @param cache_size: number of words whose chords are remembered
+
+        @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+        @type cache_size: int
         """
 
         self.inverse_dict = self.__get_inverse_dict(dictionary)
-        cat_dict_path = fileutils.get_categorization_dict_path()
-        self.categorization_dict = dictionaryreader.load_dict(cat_dict_path)
+        self.categorization_dict = dictionaryregistry.get_categorization_dict()
+        self.handler = self.__create_handler_chain()
+        self.cache = lrucache.LRUCache(cache_size)
     
     def __get_inverse_dict(self, dictionary):
 
@@ -177,131 +220,195 @@ class WordToChordTranslator(object):
 
         @return: dict of {english: chord holder with all steno representations
                  of english word}
-        @rtype: {str: L{ChordHolder}}
+        @rtype: L{ReverseLookupDict}
         """
 
-        inverse_dict = {}
-        for key, value in dictionary.iteritems():
-            if value in inverse_dict:
-                chord_holder = inverse_dict[value]
-                chord_holder.add_chord(key)
-            else:
-                inverse_dict[value] = ChordHolder(key)
-        return inverse_dict
+        # The index (cached on disk for the shared plover dict) also knows
+        # the canon chord of every word.
+        return ReverseLookupDict(dictionaryregistry.get_inverse_index(
+                                 dictionary))
+
+    def __create_handler_chain(self):
+
+        """Link up the handlers which try each way of translating a word.
+
+        @return: first handler in the chain
+        @rtype: L{WordCaseHandler}
+        """
+
+        first_try_handler = WordAsIs(self.inverse_dict)
+        second_try_handler = WordLowerCase(self.inverse_dict)
+        third_try_handler = WordPunctuationWithCaret(self.inverse_dict)
+        fourth_try_handler = WordEndsApostropheEss(self.inverse_dict, 
+                                                   self.categorization_dict)
+        fifth_try_handler = WordIsMrOrMrs(self.inverse_dict)
+        default_handler = WordUndefined(self.inverse_dict)
+        
+        first_try_handler.successor = second_try_handler
+        second_try_handler.successor = third_try_handler
+        third_try_handler.successor = fourth_try_handler
+        fourth_try_handler.successor = fifth_try_handler
+        fifth_try_handler.successor = default_handler
+        return first_try_handler
 
-    def translate_from_file(self, testFile):
+    def translate_from_file(self, testFile, processes=1):
 
         """Give a file containing english words, translate to steno chords.
 
         @param testFile: path to file containing english words
+        @param processes: number of processes to translate with, see
+                          L{translate_many}
+
         @type testFile: str
+        @type processes: int
 
         @return: list of steno chords
         @rtype: list of str
         """
 
         with open(testFile) as f:
-            data = f.readlines()
-        chord_list = []
+            return self.translate_many(f, processes)
 
-        for line in data:
-            chord_line = []
-            for word in self.yield_word(line):
-                chord = self.translate_word(word)
-                chord_line.append(chord)
-            chord_list.append(' '.join(chord_line))
+    def translate_line(self, line):
 
-        return chord_list
-    
-    @classmethod
-    def yield_word(cls, line):
+        """Translate a line of english words to steno chords.
 
-        """Yield each word or punctuation mark in line.
+        Where a word could be any of several chords, the choice is random but
+        seeded by the line, so a line always translates the same way.
 
         @param line: line of english words
         @type line: str
 
-        @return: word or punctuation such as "?" or ":"
+        @return: steno chords for line, separated by spaces
         @rtype: str
         """
 
-        words = line.split(" ")
-        for word in words:
-            if word.find("<") != -1 or word.find(">") != -1:
-                continue
-            word = word.strip()
-            words_or_punctuation = re.split("([-.,?;!:\"])", word)
-            words_or_punctuation = [w for w in words_or_punctuation if w != '']
-            for i, word_or_punctuation in enumerate(words_or_punctuation):
-                if word_or_punctuation == "\"":
-                    yield cls.__parse_quotes(i)
-                elif cls.__is_punctuation(word_or_punctuation):
-                    yield "{%s}" % word_or_punctuation
-                else:
-                    yield word_or_punctuation
-    
-    @staticmethod
-    def __parse_quotes(i):
-        
-        """Special case for double quotation marks.
-        Must figure out whether quote is opening or closing.
+        if isinstance(line, unicode):
+            seed = zlib.crc32(line.encode('utf-8'))
+        else:
+            seed = zlib.crc32(line)
+        random_generator = random.Random(seed)
+        return ' '.join([self.translate_word(word, random_generator)
+                         for word in self.yield_word(line)])
 
-        @param i: index of split for double quote mark
-        @type i: int
+    def translate_many(self, lines, processes=None):
 
-        @return: right or left double quote as appears in plover dict
-        @rtype: str
+        """Translate many lines of english words to steno chords.
+
+        Lines are translated in chunks across a pool of worker processes.
+        The workers are forked, so share the dictionary and index rather
+        than each loading its own. The result is the same whatever the
+        number of processes.
+
+        @param lines: lines of english words
+        @param processes: number of processes to translate with. If None, one
+                          per CPU. Where processes can't be forked, or there
+                          are too few lines to be worth it, lines are
+                          translated in this process.
+
+        @type lines: iterable of str
+        @type processes: int
+
+        @return: steno chords for each line, see L{translate_line}
+        @rtype: list of str
         """
 
-        if i == 0:
-            return r'{"^}'
-        else:
-            return r'{^"}'
+        global _bulk_translator
+
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if processes <= 1 or not hasattr(os, 'fork'):
+            return [self.translate_line(line) for line in lines]
+        lines = list(lines)
+        if len(lines) <= BULK_CHUNK_LINES:
+            return [self.translate_line(line) for line in lines]
+
+        chunks = [lines[start:start + BULK_CHUNK_LINES]
+                  for start in xrange(0, len(lines), BULK_CHUNK_LINES)]
+        # Load the index before forking, so workers don't each build it.
+        self.inverse_dict.load()
+        _bulk_translator = self
+        pool = multiprocessing.Pool(processes)
+        try:
+            chord_chunks = pool.map(_translate_chunk, chunks, 1)
+        finally:
+            pool.terminate()
+            pool.join()
+            _bulk_translator = None
 
+        chord_list = []
+        for chord_chunk in chord_chunks:
+            chord_list.extend(chord_chunk)
+        return chord_list
+    
     @staticmethod
-    def __is_punctuation(word_or_punctuation):
+    def yield_word(line):
 
-        """Figure out whether word_or_punctuation is word or punctuation.
+        """Yield each word or punctuation mark in line.
 
-        @param word_or_punctuation: english word or punctuation mark
-        @type word_or_punctuation: str
+        Punctuation is given as it appears in the plover dict, see
+        L{fly.translation.tokenizer}.
 
-        @rtype: bool
+        @param line: line of english words
+        @type line: str
+
+        @return: word or punctuation such as "{?}" or "{:}"
+        @rtype: str
         """
 
-        if re.search('\w+', word_or_punctuation):
-            return False
-        return True
+        get_dictionary_form = tokenizer.get_dictionary_form
+        for token, kind in tokenizer.tokenize_line(line):
+            yield get_dictionary_form(token, kind)
 
-    def translate_word(self, word):
+    def translate_word(self, word, random_generator=random):
 
         """Translate english word into steno chord equivalent.
 
         @param word: english word to translate
+        @param random_generator: source of the random chord, if word has no
+                                 canon chord
+
         @type word: str
+        @type random_generator: random.Random
 
         @return: random steno chord corresponding to word
         @rtype: str
         """
 
-        first_try_handler = WordAsIs(self.inverse_dict)
-        second_try_handler = WordLowerCase(self.inverse_dict)
-        third_try_handler = WordPunctuationWithCaret(self.inverse_dict)
-        fourth_try_handler = WordEndsApostropheEss(self.inverse_dict, 
-                                                   self.categorization_dict)
-        fifth_try_handler = WordIsMrOrMrs(self.inverse_dict)
-        default_handler = WordUndefined(self.inverse_dict)
-        
-        first_try_handler.successor = second_try_handler
-        second_try_handler.successor = third_try_handler
-        third_try_handler.successor = fourth_try_handler
-        fourth_try_handler.successor = fifth_try_handler
-        fifth_try_handler.successor = default_handler
-
-        chord_holder = first_try_handler.handle(word)
-        chord = chord_holder.get_canon_chord(self.categorization_dict)
+        # The chord holder is cached rather than the chord, so a word with
+        # no canon chord still gets a random one each time.
+        chord_holder = self.cache.get(word)
+        if chord_holder is None:
+            chord_holder = self.handler.handle(word)
+            self.cache.put(word, chord_holder)
+        chord = chord_holder.get_canon_chord(self.categorization_dict,
+                                             random_generator)
         return chord
 
+    def get_cache_stats(self):
+
+        """Return how well remembering translated words is working.
+
+        @return: see L{fly.utils.lrucache.LRUCache.get_stats}
+        @rtype: dict of str: int
+        """
+
+        return self.cache.get_stats()
+
+
+def _translate_chunk(lines):
+
+    """Translate lines in a bulk translation worker process.
+
+    @param lines: lines of english words
+    @type lines: list of str
+
+    @return: steno chords for each line
+    @rtype: list of str
+    """
+
+    return [_bulk_translator.translate_line(line) for line in lines]
+
 
 class WordCaseHandler(object):
 
@@ -406,10 +513,13 @@ class WordEndsApostropheEss(WordCaseHandler):
         if word.endswith("'s"):
             bare_word = word.rstrip("'s")
             if bare_word in self.inverse_dict:
-                chord = self.inverse_dict[bare_word].\
-                        get_canon_chord(self.categorization_dict)
-                if chord:
-                    return ChordHolder('%s/A*ES' % chord)
+                # Keep every chord, so which is used is chosen when the word
+                # is translated, the same as for any other word.
+                bare_holder = self.inverse_dict[bare_word]
+                return ChordHolder(['%s/A*ES' % chord for chord
+                                    in bare_holder.chord_list],
+                                   bare_holder.get_canon_offset(
+                                       self.categorization_dict))
         # Nope, not applicable. Move on to next handler.
         return self.successor.handle(word)
 
@@ -479,9 +589,7 @@ if __name__ == "__main__":
     'love') will provide: HOF
     """ 
 
-    plover_control = ploverfacade.PloverControl()
-    dict_filename = fileutils.get_plover_dict_path()
-    dictionary = dictionaryreader.load_dict(dict_filename)
+    dictionary = dictionaryregistry.get_plover_dict()
 
     translator = WordToChordTranslator(dictionary)
     word = sys.argv[1]
@@ -0,0 +1,178 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Facts about the chords in a steno dictionary, cached on disk.
+
+The translator needs the number of strokes in the longest chord, and which
+stroke sequences begin a longer chord. Finding them means splitting every
+key of the plover dict, so they are worked out once and written beside the
+json dict. They are rebuilt when the json dict changes.
+
+Lesson tooling can use the same facts, see
+L{fly.utils.dictionaryregistry.get_metadata}.
+"""
+
+import threading
+
+from fly.utils import dictionaryreader
+
+METADATA_EXTENSION = '.meta'
+
+# Bump if the contents of the metadata change.
+METADATA_FORMAT_VERSION = 1
+
+# Separates the strokes of a multi stroke chord, as in plover's dicts.
+STROKE_DELIMITER = '/'
+
+# Separates prefixes when they are stored, as it can't appear in a chord.
+PREFIX_SEPARATOR = u'\n'
+
+
+class DictionaryMetadata(object):
+
+    """Stroke counts and prefixes of the chords in a dictionary.
+
+    max_strokes is the number of strokes in the longest chord, and
+    entries_per_length a dict of number of strokes to number of chords with
+    that many strokes.
+
+    Prefixes are kept as a single string, and only put in a set when first
+    looked up, so metadata is cheap to hold when prefixes aren't needed.
+    """
+
+    def __init__(self, max_strokes, entries_per_length, prefixes_text):
+
+        """
+        @param max_strokes: strokes in longest chord, at least 1
+        @param entries_per_length: number of chords with each stroke count
+        @param prefixes_text: every stroke sequence which begins a longer
+                              chord, separated by PREFIX_SEPARATOR
+
+        @type max_strokes: int
+        @type entries_per_length: dict of int: int
+        @type prefixes_text: unicode
+        """
+
+        self.max_strokes = max_strokes
+        self.entries_per_length = entries_per_length
+        self.prefixes_text = prefixes_text
+        self.prefixes = None
+        self.first_strokes = None
+        self.lock = threading.Lock()
+
+    def is_prefix(self, rtfcre):
+
+        """Return whether strokes begin a longer chord.
+
+        @param rtfcre: one or more strokes in RTF/CRE format
+        @type rtfcre: str or unicode
+
+        @rtype: bool
+        """
+
+        if self.prefixes is None:
+            self.load_prefixes()
+        return rtfcre in self.prefixes
+
+    def get_first_strokes(self):
+
+        """Return strokes which start a multi stroke chord.
+
+        @rtype: frozenset of unicode
+        """
+
+        if self.first_strokes is None:
+            self.load_prefixes()
+        return self.first_strokes
+
+    def load_prefixes(self):
+
+        """Put prefixes in sets for looking up, if not done already."""
+
+        with self.lock:
+            if self.prefixes is not None:
+                return
+            if self.prefixes_text:
+                prefixes = self.prefixes_text.split(PREFIX_SEPARATOR)
+            else:
+                prefixes = []
+            self.first_strokes = frozenset(prefix for prefix in prefixes
+                                           if STROKE_DELIMITER not in prefix)
+            # Set last, as it marks the prefixes as loaded.
+            self.prefixes = frozenset(prefixes)
+
+    def __len__(self):
+
+        """Return number of chords in the dictionary."""
+
+        return sum(self.entries_per_length.itervalues())
+
+
+def build_metadata(dictionary):
+
+    """Work out the metadata of dictionary.
+
+    @param dictionary: steno to english dictionary
+    @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+
+    @return: (max strokes, entries per length, prefixes text), ready to be
+             marshalled. See L{DictionaryMetadata}.
+    @rtype: tuple
+    """
+
+    entries_per_length = {}
+    prefixes = set()
+    for rtfcre in dictionary.iterkeys():
+        end = rtfcre.find(STROKE_DELIMITER)
+        while end != -1:
+            prefixes.add(rtfcre[:end])
+            end = rtfcre.find(STROKE_DELIMITER, end + 1)
+        length = rtfcre.count(STROKE_DELIMITER) + 1
+        entries_per_length[length] = entries_per_length.get(length, 0) + 1
+
+    max_strokes = max(entries_per_length) if entries_per_length else 1
+    prefixes_text = PREFIX_SEPARATOR.join(sorted(unicode(prefix)
+                                                 for prefix in prefixes))
+    return max_strokes, entries_per_length, prefixes_text
+
+
+def load_metadata(dictionary, dictionary_filename=None):
+
+    """Read the metadata of dictionary from disk, or work it out.
+
+    @param dictionary: steno to english dictionary
+    @param dictionary_filename: json file dictionary was loaded from. If
+                                given, the metadata is cached beside it.
+
+    @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+    @type dictionary_filename: str
+
+    @rtype: L{DictionaryMetadata}
+    """
+
+    metadata = None
+    if dictionary_filename is not None:
+        metadata_filename = get_metadata_path(dictionary_filename)
+        stamp = ((METADATA_FORMAT_VERSION,) +
+                 dictionaryreader.get_source_stamp(dictionary_filename))
+        metadata = dictionaryreader.read_cache(metadata_filename, stamp)
+
+    if metadata is None:
+        metadata = build_metadata(dictionary)
+        if dictionary_filename is not None:
+            dictionaryreader.write_cache(metadata_filename, stamp, metadata)
+
+    return DictionaryMetadata(*metadata)
+
+
+def get_metadata_path(dictionary_filename):
+
+    """Return the path of the metadata for a json dict.
+
+    @param dictionary_filename: path to a json dict
+    @type dictionary_filename: str
+
+    @rtype: str
+    """
+
+    return dictionary_filename + METADATA_EXTENSION
@@ -1,17 +1,66 @@
-# Copyright (c) 2011 Pragma Nolint. 
+# Copyright (c) 2011 Pragma Nolint.
 # See LICENSE.txt for details.
 
-"""Loads dictionaries that have been pickled in json."""
+"""Loads dictionaries that have been pickled in json.
 
+Parsing the larger json dictionaries (the plover dict alone is several MB)
+dominates start up time, so every parsed dictionary is also written out next
+to its source in marshal format. The cache is tied to the modification time
+and size of the source file, and is rebuilt whenever the source changes.
+"""
+
+import os
+import sys
 import json
+import marshal
+import logging
+logger = logging.getLogger(__name__)
+
+ALTERNATIVE_ENCODING = 'latin-1'
 
-ALTERNATIVE_ENCODING = 'latin-1' 
+CACHE_EXTENSION = '.cache'
 
+# Bump if the layout of the cache file changes. Marshal output is only
+# guaranteed to be readable by the same python version, so that is recorded
+# in the header too.
+CACHE_FORMAT_VERSION = 1
+CACHE_HEADER = (CACHE_FORMAT_VERSION, marshal.version,
+                tuple(sys.version_info[:2]))
 
-def load_dict(dictionary_filename):
+
+def load_dict(dictionary_filename, use_cache=True):
 
     """Load json dict with file name provided.
 
+    @param dictionary_filename: path to an existing json dict
+    @param use_cache: whether to read from/write to the binary cache
+                      beside the json dict
+
+    @type dictionary_filename: str
+    @type use_cache: bool
+
+    @return: dictionary in file
+    @rtype: dict
+    """
+
+    if not use_cache:
+        return parse_json_dict(dictionary_filename)
+
+    source_stamp = get_source_stamp(dictionary_filename)
+    cache_filename = get_cache_path(dictionary_filename)
+
+    dictionary = read_cache(cache_filename, source_stamp)
+    if dictionary is None:
+        dictionary = parse_json_dict(dictionary_filename)
+        write_cache(cache_filename, source_stamp, dictionary)
+
+    return dictionary
+
+
+def parse_json_dict(dictionary_filename):
+
+    """Parse json dict with file name provided, bypassing the cache.
+
     @param dictionary_filename: path to an existing json dict
     @type dictionary_filename: str
 
@@ -30,3 +79,91 @@ def load_dict(dictionary_filename):
     return dictionary
 
 
+def get_cache_path(dictionary_filename):
+
+    """Return the path of the binary cache for a json dict.
+
+    @param dictionary_filename: path to a json dict
+    @type dictionary_filename: str
+
+    @rtype: str
+    """
+
+    return dictionary_filename + CACHE_EXTENSION
+
+
+def get_source_stamp(dictionary_filename):
+
+    """Identify the current version of a source file.
+
+    @param dictionary_filename: path to an existing json dict
+    @type dictionary_filename: str
+
+    @return: modification time and size of the file
+    @rtype: tuple of (float, int)
+    """
+
+    stat = os.stat(dictionary_filename)
+    return (stat.st_mtime, stat.st_size)
+
+
+def read_cache(cache_filename, source_stamp):
+
+    """Read a cached dictionary if it is still valid for its source.
+
+    @param cache_filename: path to the cache file
+    @param source_stamp: stamp of the source file, see L{get_source_stamp}
+
+    @type cache_filename: str
+    @type source_stamp: tuple
+
+    @return: cached dictionary, or None if missing, stale or unreadable
+    @rtype: dict
+    """
+
+    if not os.path.exists(cache_filename):
+        return None
+
+    try:
+        with open(cache_filename, 'rb') as f:
+            header = marshal.load(f)
+            if header != (CACHE_HEADER, source_stamp):
+                logger.info("Cache %s is out of date." % cache_filename)
+                return None
+            return marshal.load(f)
+
+    except (IOError, EOFError, ValueError, TypeError):
+        logger.warning("Could not read cache %s." % cache_filename)
+        return None
+
+
+def write_cache(cache_filename, source_stamp, dictionary):
+
+    """Write dictionary to the cache file, replacing any previous cache.
+
+    Failing to write the cache is not fatal (the dicts directory may not be
+    writable), the json will just be parsed again next time.
+
+    @param cache_filename: path to the cache file
+    @param source_stamp: stamp of the source file, see L{get_source_stamp}
+    @param dictionary: the parsed dictionary
+
+    @type cache_filename: str
+    @type source_stamp: tuple
+    @type dictionary: dict
+    """
+
+    # Write to a temporary file first so a half written cache is never read.
+    temp_filename = '%s.%s.tmp' % (cache_filename, os.getpid())
+    try:
+        with open(temp_filename, 'wb') as f:
+            marshal.dump((CACHE_HEADER, source_stamp), f)
+            marshal.dump(dictionary, f)
+        if os.name == 'nt' and os.path.exists(cache_filename):
+            os.remove(cache_filename)
+        os.rename(temp_filename, cache_filename)
+
+    except (IOError, OSError, ValueError):
+        logger.warning("Could not write cache %s." % cache_filename)
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
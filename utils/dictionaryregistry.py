@@ -0,0 +1,294 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Process-wide registry of the dictionaries Fly reads from disk.
+
+Several parts of Fly need the same dictionaries (the plover dict, the
+word:category dict and the level store). Rather than each of them parsing
+the file and keeping its own multi-MB copy, they ask this module, which
+loads each file once and hands out the same read-only instance to everyone.
+
+The plover dict can instead be served from a memory mapped string table,
+see L{fly.utils.stringtable} and DICTIONARY_BACKEND in the config.
+"""
+
+import os
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+from fly import config
+from fly.utils import dictionarymetadata
+from fly.utils import dictionaryreader
+from fly.utils import files as fileutils
+from fly.utils import inverseindex
+from fly.utils import leveldictstore
+from fly.utils import stringtable
+
+DICT_BACKEND = "dict"
+TABLE_BACKEND = "table"
+
+
+class ReadOnlyDict(dict):
+
+    """A dict that is shared between consumers, so must not be changed.
+
+    Take a copy with dict(shared_dict) if a modifiable version is needed.
+    """
+
+    def __readonly(self, *args, **kwargs):
+        raise TypeError("Shared dictionaries are read-only, take a copy "
+                        "with dict() to modify.")
+
+    __setitem__ = __readonly
+    __delitem__ = __readonly
+    clear = __readonly
+    pop = __readonly
+    popitem = __readonly
+    setdefault = __readonly
+    update = __readonly
+
+
+_dictionaries = {}
+_level_stores = {}
+_tables = {}
+_inverse_indexes = {}
+_metadata = {}
+_path_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _get_key(dictionary_filename):
+
+    """Normalise a path so that all spellings of it share one entry."""
+
+    return os.path.realpath(dictionary_filename)
+
+
+def _get_path_lock(key):
+
+    """Return the lock that serialises loading of one file."""
+
+    with _registry_lock:
+        if key not in _path_locks:
+            _path_locks[key] = threading.Lock()
+        return _path_locks[key]
+
+
+def get_dict(dictionary_filename):
+
+    """Return the shared dictionary loaded from dictionary_filename.
+
+    The file is read the first time it is asked for. Concurrent requests
+    for the same file wait for the first load to finish rather than
+    loading it again.
+
+    @param dictionary_filename: path to an existing json dict
+    @type dictionary_filename: str
+
+    @return: dictionary in file
+    @rtype: L{ReadOnlyDict}
+    """
+
+    key = _get_key(dictionary_filename)
+    dictionary = _dictionaries.get(key)
+    if dictionary is not None:
+        return dictionary
+
+    with _get_path_lock(key):
+        # Another thread may have loaded it while we waited.
+        if key not in _dictionaries:
+            loaded = dictionaryreader.load_dict(key)
+            _dictionaries[key] = ReadOnlyDict(loaded)
+        return _dictionaries[key]
+
+
+def is_loaded(dictionary_filename):
+
+    """Return True if the file has already been loaded.
+
+    @param dictionary_filename: path to a json dict
+    @type dictionary_filename: str
+
+    @rtype: bool
+    """
+
+    return _get_key(dictionary_filename) in _dictionaries
+
+
+def release(dictionary_filename):
+
+    """Forget a loaded dictionary, e.g. after the file has been rewritten.
+
+    Consumers holding the old instance keep it, the next call to
+    L{get_dict} reads the file again.
+
+    @param dictionary_filename: path to a json dict
+    @type dictionary_filename: str
+    """
+
+    key = _get_key(dictionary_filename)
+    with _registry_lock:
+        _dictionaries.pop(key, None)
+        _level_stores.pop(key, None)
+        _tables.pop(key, None)
+        _inverse_indexes.pop(key, None)
+        _metadata.pop(key, None)
+        # Indexes also depend on the categorization dict.
+        for index_key, index in _inverse_indexes.items():
+            if index.categorization_filename == key:
+                del _inverse_indexes[index_key]
+
+
+def get_dict_path(dictionary):
+
+    """Return the file a shared dictionary was loaded from.
+
+    @param dictionary: dictionary returned by L{get_dict} or L{get_table}
+    @type dictionary: L{ReadOnlyDict} or
+                      L{fly.utils.stringtable.StringTable}
+
+    @return: path, or None if dictionary was not loaded by the registry
+    @rtype: str
+    """
+
+    for key, loaded in _dictionaries.items() + _tables.items():
+        if loaded is dictionary:
+            return key
+    return None
+
+
+def get_inverse_index(dictionary):
+
+    """Return an english to chords index of dictionary.
+
+    Canon chords in the index are chosen with the shared categorization
+    dict. Dictionaries loaded by the registry share one index, cached on
+    disk beside their json file. Other dictionaries get an index of their
+    own, built in memory when first used.
+
+    @param dictionary: steno to english dictionary
+    @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+
+    @rtype: L{fly.utils.inverseindex.InverseIndex}
+    """
+
+    categorization_dict = get_categorization_dict()
+    categorization_filename = _get_key(
+            fileutils.get_categorization_dict_path())
+
+    key = get_dict_path(dictionary)
+    if key is None:
+        return inverseindex.InverseIndex(
+                dictionary, categorization_dict=categorization_dict)
+
+    with _registry_lock:
+        if key not in _inverse_indexes:
+            _inverse_indexes[key] = inverseindex.InverseIndex(
+                    dictionary, key, categorization_dict,
+                    categorization_filename)
+        return _inverse_indexes[key]
+
+
+def get_metadata(dictionary):
+
+    """Return stroke counts and prefixes of the chords in dictionary.
+
+    Dictionaries loaded by the registry share one copy, cached on disk
+    beside their json file. Other dictionaries get metadata of their own,
+    worked out now.
+
+    @param dictionary: steno to english dictionary
+    @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+
+    @rtype: L{fly.utils.dictionarymetadata.DictionaryMetadata}
+    """
+
+    key = get_dict_path(dictionary)
+    if key is None:
+        return dictionarymetadata.load_metadata(dictionary)
+
+    metadata = _metadata.get(key)
+    if metadata is not None:
+        return metadata
+
+    with _get_path_lock(key):
+        if key not in _metadata:
+            _metadata[key] = dictionarymetadata.load_metadata(dictionary, key)
+        return _metadata[key]
+
+
+def get_table(dictionary_filename):
+
+    """Return the shared string table for a json dict.
+
+    The table is built beside the json dict if it is missing or out of date.
+    If it can't be written, the json dict is loaded instead.
+
+    @param dictionary_filename: path to an existing json dict
+    @type dictionary_filename: str
+
+    @return: dictionary in file
+    @rtype: L{fly.utils.stringtable.StringTable} (or L{ReadOnlyDict})
+    """
+
+    key = _get_key(dictionary_filename)
+    table = _tables.get(key)
+    if table is not None:
+        return table
+
+    with _get_path_lock(key):
+        if key not in _tables:
+            try:
+                _tables[key] = stringtable.load_table(key)
+            except (EnvironmentError, stringtable.StringTableError):
+                logger.warning("Could not use string table for %s, loading "
+                               "dictionary instead." % key)
+        table = _tables.get(key)
+
+    if table is None:
+        return get_dict(key)
+    return table
+
+
+def get_plover_dict():
+
+    """Return the shared plover (steno to english) dictionary.
+
+    @return: a dict, or a string table if DICTIONARY_BACKEND is "table"
+    @rtype: L{ReadOnlyDict} or L{fly.utils.stringtable.StringTable}
+    """
+
+    if config.DICTIONARY_BACKEND == TABLE_BACKEND:
+        return get_table(fileutils.get_plover_dict_path())
+    return get_dict(fileutils.get_plover_dict_path())
+
+
+def get_categorization_dict():
+
+    """Return the shared chord:category dictionary.
+
+    @rtype: L{ReadOnlyDict}
+    """
+
+    return get_dict(fileutils.get_categorization_dict_path())
+
+
+def get_level_store():
+
+    """Return the shared store of chords for all difficulty levels.
+
+    @rtype: L{fly.utils.leveldictstore.LevelDictionaryStore}
+    """
+
+    key = _get_key(fileutils.get_level_store_path())
+    store = _level_stores.get(key)
+    if store is not None:
+        return store
+
+    store_dict = get_dict(key)
+    with _get_path_lock(key):
+        if key not in _level_stores:
+            store = leveldictstore.LevelDictionaryStore.from_dict(store_dict)
+            _level_stores[key] = store
+        return _level_stores[key]
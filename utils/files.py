@@ -21,10 +21,9 @@ def get_plover_dict_path():
     return os.path.join(get_dictionaries_directory(), 'dict.json')
 
 
-def get_level_dict_path(level):
-    """Return the file path to the level dict specified."""
-    return os.path.join(get_dictionaries_directory(),
-                        'dict_level_%s.json' % level)
+def get_level_store_path():
+    """Return the file path to the store of all level dicts."""
+    return os.path.join(get_dictionaries_directory(), 'dict_levels.json')
 
 def get_categorization_dict_path():
     """Return the file path to the categorization dict."""
@@ -36,6 +35,11 @@ def get_lessons_directory():
     return os.path.join(get_base_directory(), 'data', 'lessons')
 
 
+def get_latency_report_path():
+    """Return the file path latencies are written to, see config."""
+    return os.path.join(get_base_directory(), 'latency.txt')
+
+
 def get_test_data_directory():
     """Return the file path to the directory containing test data."""
     return os.path.join(get_base_directory(), 'tests', 'data')
@@ -0,0 +1,352 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Index of a steno dictionary from english to chords, cached on disk.
+
+Translating english to steno needs every chord for a word. Building that
+inverse of the plover dict walks the whole dict and creates an object per
+word, so instead an index is built once and written beside the json dict.
+It is rebuilt when the json dict changes.
+
+The index is compact: rather than a copy of every word and chord, it holds
+arrays of numbers and one string of all the chords.
+
+    hashes      hash of each english word, sorted
+    starts      offset of each word's first chord in the chords
+    chord_ends  offset of the end of each chord in the chord string
+    chords      all chords as one utf-8 string, grouped by word
+
+Words are found by binary search on their hash. As different words can
+share a hash, a match is checked by looking up one of its chords in the
+dictionary.
+
+The chord to teach for each word (see L{fly.translation.chordcategories})
+is also worked out once, and cached in a second file beside the json dict.
+It is rebuilt when either the json dict or the categorization dict changes.
+"""
+
+import array
+import bisect
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+from fly.translation import chordcategories
+from fly.utils import dictionaryreader
+
+INDEX_EXTENSION = '.inverse'
+CANON_EXTENSION = '.canon'
+
+# Bump if the layout of the index or canon chords changes.
+INDEX_FORMAT_VERSION = 1
+CANON_FORMAT_VERSION = 1
+
+# Hashes differ between platforms and with hash randomisation, so an index is
+# only valid where this string hashes the same as when it was built.
+HASH_CHECK = u"Fly, Plover, Fly!"
+
+
+class InverseIndex(object):
+
+    """Looks up all chords for an english word.
+
+    The index is read (or built) the first time it is used.
+    """
+
+    def __init__(self, dictionary, dictionary_filename=None,
+                 categorization_dict=None, categorization_filename=None):
+
+        """
+        @param dictionary: steno to english dictionary
+        @param dictionary_filename: json file dictionary was loaded from. If
+                                    given, the index is cached beside it.
+        @param categorization_dict: chord: category dict used to choose the
+                                    canon chord of each word. If None, canon
+                                    chords aren't known.
+        @param categorization_filename: json file categorization_dict was
+                                        loaded from. If given (with
+                                        dictionary_filename), canon chords
+                                        are cached.
+
+        @type dictionary: dict or L{fly.utils.stringtable.StringTable}
+        @type dictionary_filename: str
+        @type categorization_dict: dict of str: str
+        @type categorization_filename: str
+        """
+
+        self.dictionary = dictionary
+        self.dictionary_filename = dictionary_filename
+        self.categorization_dict = categorization_dict
+        self.categorization_filename = categorization_filename
+        self.hashes = None
+        self.starts = None
+        self.chord_ends = None
+        self.chords = None
+        self.canon_offsets = None
+        self.load_lock = threading.Lock()
+
+    def load(self):
+
+        """Read the index from disk, or build it, if not done already."""
+
+        if self.hashes is not None:
+            return
+
+        with self.load_lock:
+            if self.hashes is not None:
+                return
+
+            index = None
+            if self.dictionary_filename is not None:
+                index_filename = get_index_path(self.dictionary_filename)
+                stamp = get_index_stamp(self.dictionary_filename)
+                index = dictionaryreader.read_cache(index_filename, stamp)
+
+            if index is None:
+                index = build_index(self.dictionary)
+                if self.dictionary_filename is not None:
+                    dictionaryreader.write_cache(index_filename, stamp, index)
+
+            hashes, starts, chord_ends, self.chords = index
+            self.starts = array.array('I')
+            self.starts.fromstring(starts)
+            self.chord_ends = array.array('I')
+            self.chord_ends.fromstring(chord_ends)
+            loaded_hashes = array.array('l')
+            loaded_hashes.fromstring(hashes)
+            # Set last, as it marks the index as loaded.
+            self.hashes = loaded_hashes
+
+    def load_canon(self):
+
+        """Read canon chords from disk, or work them out, if not done
+        already."""
+
+        if self.canon_offsets is not None:
+            return
+        self.load()
+
+        with self.load_lock:
+            if self.canon_offsets is not None:
+                return
+
+            canon = None
+            use_cache = self.dictionary_filename is not None and \
+                        self.categorization_filename is not None
+            if use_cache:
+                canon_filename = get_canon_path(self.dictionary_filename)
+                stamp = get_canon_stamp(self.dictionary_filename,
+                                        self.categorization_filename)
+                canon = dictionaryreader.read_cache(canon_filename, stamp)
+
+            if canon is None:
+                canon = self.build_canon()
+                if use_cache:
+                    dictionaryreader.write_cache(canon_filename, stamp, canon)
+
+            canon_offsets = array.array('i')
+            canon_offsets.fromstring(canon)
+            self.canon_offsets = canon_offsets
+
+    def build_canon(self):
+
+        """Work out the canon chord of every word.
+
+        @return: offset of each word's canon chord among its chords, as
+                 array bytes ready to be marshalled
+        @rtype: str
+        """
+
+        canon_offsets = array.array('i')
+        for position in xrange(len(self.hashes)):
+            canon_offsets.append(chordcategories.get_canon_offset(
+                    self.get_chords(position), self.categorization_dict))
+
+        uncategorized = canon_offsets.count(chordcategories.NO_CANON_CHORD)
+        if uncategorized:
+            logger.info("%s of %s words have no categorized chords. Run "
+                        "fly.data.generation.categoriser to categorize them." %
+                        (uncategorized, len(canon_offsets)))
+        return canon_offsets.tostring()
+
+    def get_chord(self, chord_offset):
+
+        """Return the chord at chord_offset in the chords string."""
+
+        if chord_offset:
+            start = self.chord_ends[chord_offset - 1]
+        else:
+            start = 0
+        return self.chords[start:self.chord_ends[chord_offset]].decode('utf-8')
+
+    def find(self, english):
+
+        """Return position of english in the index.
+
+        @param english: translation to look up
+        @type english: str or unicode
+
+        @return: position, or None if english isn't in the index
+        @rtype: int
+        """
+
+        self.load()
+        if isinstance(english, str):
+            try:
+                english = english.decode('utf-8')
+            except UnicodeError:
+                return None
+
+        english_hash = hash(english)
+        position = bisect.bisect_left(self.hashes, english_hash)
+        while position < len(self.hashes) and \
+              self.hashes[position] == english_hash:
+            first_chord = self.get_chord(self.starts[position])
+            if self.dictionary.get(first_chord) == english:
+                return position
+            position += 1
+        return None
+
+    def get_chords(self, position):
+
+        """Return all chords of the word at position.
+
+        @param position: position of word, see L{find}
+        @type position: int
+
+        @return: chords in sorted order
+        @rtype: list of unicode
+        """
+
+        return [self.get_chord(chord_offset) for chord_offset
+                in xrange(self.starts[position], self.starts[position + 1])]
+
+    def get_canon_offset(self, position):
+
+        """Return which of the chords of the word at position to teach.
+
+        @param position: position of word, see L{find}
+        @type position: int
+
+        @return: offset in L{get_chords}, NO_CANON_CHORD if any chord will
+                 do, or None if there is no categorization dict
+        @rtype: int
+        """
+
+        if self.categorization_dict is None:
+            return None
+        self.load_canon()
+        return self.canon_offsets[position]
+
+    def lookup_chords(self, english):
+
+        """Return all chords that translate to english.
+
+        @param english: translation to look up
+        @type english: str or unicode
+
+        @return: chords in sorted order, empty if english isn't in the index
+        @rtype: list of unicode
+        """
+
+        position = self.find(english)
+        if position is None:
+            return []
+        return self.get_chords(position)
+
+    def __len__(self):
+
+        """Return number of english words in the index."""
+
+        self.load()
+        return len(self.hashes)
+
+
+def build_index(dictionary):
+
+    """Build the index contents for dictionary.
+
+    @param dictionary: steno to english dictionary
+    @type dictionary: dict
+
+    @return: (hashes, starts, chord ends, chords), each as a string, ready to
+             be marshalled. See module docs.
+    @rtype: tuple of str
+    """
+
+    entries = sorted((hash(english), english, chord.encode('utf-8'))
+                     for chord, english in dictionary.iteritems())
+    hashes = array.array('l')
+    starts = array.array('I')
+    chord_ends = array.array('I')
+    chords = []
+    chords_length = 0
+    previous_english = None
+    for english_hash, english, chord in entries:
+        if english != previous_english:
+            hashes.append(english_hash)
+            starts.append(len(chords))
+            previous_english = english
+        chords.append(chord)
+        chords_length += len(chord)
+        chord_ends.append(chords_length)
+    starts.append(len(chords))
+    return (hashes.tostring(), starts.tostring(), chord_ends.tostring(),
+            ''.join(chords))
+
+
+def get_index_path(dictionary_filename):
+
+    """Return the path of the inverse index for a json dict.
+
+    @param dictionary_filename: path to a json dict
+    @type dictionary_filename: str
+
+    @rtype: str
+    """
+
+    return dictionary_filename + INDEX_EXTENSION
+
+
+def get_canon_path(dictionary_filename):
+
+    """Return the path of the canon chords for a json dict.
+
+    @param dictionary_filename: path to a json dict
+    @type dictionary_filename: str
+
+    @rtype: str
+    """
+
+    return dictionary_filename + CANON_EXTENSION
+
+
+def get_index_stamp(dictionary_filename):
+
+    """Identify the version of the index a json dict needs.
+
+    @param dictionary_filename: path to an existing json dict
+    @type dictionary_filename: str
+
+    @rtype: tuple
+    """
+
+    return ((INDEX_FORMAT_VERSION, hash(HASH_CHECK)) +
+            dictionaryreader.get_source_stamp(dictionary_filename))
+
+
+def get_canon_stamp(dictionary_filename, categorization_filename):
+
+    """Identify the version of the canon chords a json dict needs.
+
+    @param dictionary_filename: path to an existing json dict
+    @param categorization_filename: path to the existing categorization dict
+
+    @type dictionary_filename: str
+    @type categorization_filename: str
+
+    @rtype: tuple
+    """
+
+    return ((CANON_FORMAT_VERSION,) + get_index_stamp(dictionary_filename) +
+            dictionaryreader.get_source_stamp(categorization_filename))
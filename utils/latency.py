@@ -0,0 +1,208 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Time how long a chord takes to get from the steno machine to the screen.
+
+A chord passes through these stages, each timed from the end of the last:
+
+    translate - the machine sends the chord, until plover emits a translation
+    callback  - plover's callbacks, until the translation is queued for Fly
+    queue     - waiting in the queue for the next frame
+    model     - the model evaluating the chord
+    display   - the rest of the frame, until the screen is flipped
+
+and total is the time from the machine sending the chord to the flip.
+
+Recording is switched on with RECORD_LATENCY in the config. When it is off
+no recorder is created, so the only cost is checking for one.
+"""
+
+import collections
+import threading
+import time
+
+TRANSLATE_STAGE = "translate"
+CALLBACK_STAGE = "callback"
+QUEUE_STAGE = "queue"
+MODEL_STAGE = "model"
+DISPLAY_STAGE = "display"
+TOTAL_STAGE = "total"
+STAGES = (TRANSLATE_STAGE, CALLBACK_STAGE, QUEUE_STAGE, MODEL_STAGE,
+          DISPLAY_STAGE, TOTAL_STAGE)
+
+PERCENTILES = (50, 95, 99)
+
+# Latencies kept for each stage, the most recent replacing the oldest.
+SAMPLES_KEPT = 10000
+
+
+class LatencyRecorder(object):
+
+    """Latencies of the recent chords, for each stage.
+
+    The machine thread calls L{on_steno_keys}, L{on_translation} and
+    L{record_queued} as a chord is translated, the game loop calls
+    L{record_model} and L{record_displayed} as it handles it.
+    """
+
+    def __init__(self, samples_kept=SAMPLES_KEPT):
+
+        """
+        @param samples_kept: latencies kept for each stage
+        @type samples_kept: int
+        """
+
+        self.samples = dict((stage, collections.deque(maxlen=samples_kept))
+                            for stage in STAGES)
+        self.stroke_timestamp = None
+        self.translation_timestamp = None
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def on_steno_keys(self, steno_keys):
+
+        """Time a chord sent by the machine.
+
+        Register with the machine before the translator, so it is called
+        first.
+
+        @param steno_keys: keys in the chord, unused
+        @type steno_keys: list of str
+        """
+
+        self.stroke_timestamp = time.time()
+
+    def on_translation(self, translation, overflow):
+
+        """Time a translation emitted by plover.
+
+        Register with the translator before Fly's callback.
+
+        @param translation: unused
+        @param overflow: unused
+        """
+
+        self.translation_timestamp = time.time()
+        if self.stroke_timestamp is not None:
+            self.add(TRANSLATE_STAGE,
+                     self.translation_timestamp - self.stroke_timestamp)
+
+    def record_queued(self):
+
+        """Time a translation being queued for the game loop.
+
+        @return: time the machine sent the chord translated, or None if not
+                 known
+        @rtype: float
+        """
+
+        if self.translation_timestamp is not None:
+            self.add(CALLBACK_STAGE, time.time() - self.translation_timestamp)
+        return self.stroke_timestamp
+
+    def record_model(self, queued_timestamp, stroke_timestamp, started,
+                     finished):
+
+        """Time the model evaluating a chord.
+
+        @param queued_timestamp: time the translation was queued
+        @param stroke_timestamp: time the machine sent the chord, or None
+        @param started: time the model started evaluating the chord
+        @param finished: time the model finished
+
+        @type queued_timestamp: float
+        @type stroke_timestamp: float
+        @type started: float
+        @type finished: float
+        """
+
+        self.add(QUEUE_STAGE, started - queued_timestamp)
+        self.add(MODEL_STAGE, finished - started)
+        self.pending.append((stroke_timestamp, finished))
+
+    def record_displayed(self):
+
+        """Time the screen being flipped after chords were evaluated."""
+
+        if not self.pending:
+            return
+        flipped = time.time()
+        for stroke_timestamp, finished in self.pending:
+            self.add(DISPLAY_STAGE, flipped - finished)
+            if stroke_timestamp is not None:
+                self.add(TOTAL_STAGE, flipped - stroke_timestamp)
+        self.pending = []
+
+    def add(self, stage, latency):
+
+        """Record the latency of a stage.
+
+        @param stage: one of STAGES
+        @param latency: seconds
+
+        @type stage: str
+        @type latency: float
+        """
+
+        with self.lock:
+            self.samples[stage].append(latency)
+
+    def get_percentiles(self, stage):
+
+        """Return percentiles of the recent latencies of a stage.
+
+        @param stage: one of STAGES
+        @type stage: str
+
+        @return: latency in seconds for each of PERCENTILES, or None if
+                 nothing has been recorded
+        @rtype: tuple of float
+        """
+
+        with self.lock:
+            samples = sorted(self.samples[stage])
+        if not samples:
+            return None
+        # Nearest rank: the smallest latency at least percentile % of the
+        # latencies are no greater than.
+        return tuple(samples[max(0, (len(samples) * percentile + 99) // 100
+                                    - 1)]
+                     for percentile in PERCENTILES)
+
+    def get_count(self, stage):
+
+        """Return the number of recent latencies of a stage.
+
+        @rtype: int
+        """
+
+        return len(self.samples[stage])
+
+    def get_report(self):
+
+        """Return a table of the percentiles of each stage, in ms.
+
+        @rtype: str
+        """
+
+        lines = ["%-10s %7s %8s %8s %8s" % (("stage", "count") + tuple(
+                     "p%d" % percentile for percentile in PERCENTILES))]
+        for stage in STAGES:
+            percentiles = self.get_percentiles(stage)
+            if percentiles is None:
+                continue
+            lines.append("%-10s %7d %8.2f %8.2f %8.2f" % (
+                (stage, self.get_count(stage)) +
+                tuple(latency * 1000 for latency in percentiles)))
+        return "\n".join(lines)
+
+    def write_report(self, path):
+
+        """Write the table from L{get_report} to a file.
+
+        @param path: file to write, replaced if it exists
+        @type path: str
+        """
+
+        with open(path, "w") as f:
+            f.write(self.get_report() + "\n")
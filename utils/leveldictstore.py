@@ -0,0 +1,159 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Store of the chords for all six difficulty levels.
+
+The level dicts are nested: every chord in level 1 is also in levels 2 to 6.
+Rather than keeping six dictionaries, the store keeps each chord and its
+translation once, tagged with the lowest level it appears in. A level is
+viewed as an array of offsets into the store.
+"""
+
+import array
+import json
+
+MIN_LEVEL = 1
+MAX_LEVEL = 6
+
+CHORDS_KEY = "chords"
+TRANSLATIONS_KEY = "translations"
+LEVELS_KEY = "levels"
+
+
+class LevelDictionaryStore(object):
+
+    """Chords and translations for every level, each stored once."""
+
+    def __init__(self, chords, translations, levels):
+
+        """
+        @param chords: steno chords
+        @param translations: english translation of each chord
+        @param levels: lowest level each chord appears in
+
+        @type chords: list of str
+        @type translations: list of str
+        @type levels: list of int
+        """
+
+        if not len(chords) == len(translations) == len(levels):
+            raise ValueError("Chords, translations and levels must be the "
+                             "same length.")
+        self.chords = chords
+        self.translations = translations
+        self.levels = array.array('B', levels)
+        self.level_views = {}
+
+    @classmethod
+    def from_dict(cls, store_dict):
+
+        """Create store from the dict written by L{to_dict}.
+
+        @param store_dict: dict as read from the level store json file
+        @type store_dict: dict
+
+        @rtype: L{LevelDictionaryStore}
+        """
+
+        return cls(store_dict[CHORDS_KEY], store_dict[TRANSLATIONS_KEY],
+                   store_dict[LEVELS_KEY])
+
+    @classmethod
+    def from_level_dicts(cls, level_dicts):
+
+        """Create store from nested level dicts.
+
+        @param level_dicts: level dicts, easiest first. Each dict must
+                            contain all entries of the dicts before it.
+        @type level_dicts: list of dict of str: str
+
+        @rtype: L{LevelDictionaryStore}
+        """
+
+        min_levels = {}
+        for level, level_dict in reversed(list(enumerate(level_dicts,
+                                                         MIN_LEVEL))):
+            for chord in level_dict:
+                min_levels[chord] = level
+
+        hardest_dict = level_dicts[-1]
+        ordered_chords = sorted(min_levels,
+                                key=lambda chord: (min_levels[chord], chord))
+        return cls(ordered_chords,
+                   [hardest_dict[chord] for chord in ordered_chords],
+                   [min_levels[chord] for chord in ordered_chords])
+
+    def to_dict(self):
+
+        """Return store contents in a form that can be written as json.
+
+        @rtype: dict
+        """
+
+        return {CHORDS_KEY: self.chords,
+                TRANSLATIONS_KEY: self.translations,
+                LEVELS_KEY: self.levels.tolist()}
+
+    def dump(self, filepath):
+
+        """Write store to filepath as json.
+
+        @param filepath: path of file to write store to
+        @type filepath: str
+        """
+
+        with open(filepath, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    def get_level_view(self, level):
+
+        """Return offsets of all entries available at level.
+
+        Views are built on first use and kept.
+
+        @param level: levels are numbered 1 to 6, where 6 is the hardest.
+        @type level: int
+
+        @return: offsets into the store
+        @rtype: array.array of int
+        """
+
+        if level < MIN_LEVEL or level > MAX_LEVEL:
+            raise ValueError("Level must be between %s and %s, not %s." %
+                             (MIN_LEVEL, MAX_LEVEL, level))
+
+        view = self.level_views.get(level)
+        if view is None:
+            view = array.array('i', [offset for offset, entry_level
+                                     in enumerate(self.levels)
+                                     if entry_level <= level])
+            self.level_views[level] = view
+        return view
+
+    def get_chord(self, offset):
+
+        """Return the chord stored at offset."""
+
+        return self.chords[offset]
+
+    def get_translation(self, offset):
+
+        """Return the translation of the chord stored at offset."""
+
+        return self.translations[offset]
+
+    def get_level_dict(self, level):
+
+        """Build a chord: translation dict for the level (e.g. for tools).
+
+        @param level: levels are numbered 1 to 6, where 6 is the hardest.
+        @type level: int
+
+        @rtype: dict of str: str
+        """
+
+        return dict((self.chords[offset], self.translations[offset])
+                    for offset in self.get_level_view(level))
+
+    def __len__(self):
+        return len(self.chords)
@@ -0,0 +1,120 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""A bounded cache which evicts the least recently used entry when full."""
+
+# Links in the circular list of entries, oldest after the root.
+PREVIOUS, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+
+class LRUCache(object):
+
+    """Map of keys to values holding at most max_size entries.
+
+    Entries are kept in a circular doubly linked list in order of use, so
+    that getting, adding and evicting are all constant time. Counts of hits,
+    misses and evictions are kept to show how well the cache is working.
+
+    Not thread safe: each thread should use its own cache.
+    """
+
+    def __init__(self, max_size):
+
+        """
+        @param max_size: maximum number of entries held
+        @type max_size: int
+        """
+
+        if max_size < 1:
+            raise ValueError("Cache must hold at least one entry, not %s" %
+                             max_size)
+        self.max_size = max_size
+        self.links = {}
+        self.root = []
+        self.root[:] = [self.root, self.root, None, None]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+
+        """Return value for key, marking it as most recently used.
+
+        @param key: key to look up
+        @param default: returned if key isn't cached
+
+        @return: cached value, or default
+        """
+
+        link = self.links.get(key)
+        if link is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._move_to_newest(link)
+        return link[VALUE]
+
+    def put(self, key, value):
+
+        """Cache value for key as the most recently used entry, evicting the
+        least recently used entry if the cache is full.
+
+        @param key: key to cache value under
+        @param value: value to cache
+        """
+
+        link = self.links.get(key)
+        if link is not None:
+            link[VALUE] = value
+            self._move_to_newest(link)
+            return
+
+        if len(self.links) >= self.max_size:
+            oldest = self.root[NEXT]
+            self.root[NEXT] = oldest[NEXT]
+            oldest[NEXT][PREVIOUS] = self.root
+            del self.links[oldest[KEY]]
+            self.evictions += 1
+
+        newest = self.root[PREVIOUS]
+        link = [newest, self.root, key, value]
+        newest[NEXT] = self.root[PREVIOUS] = link
+        self.links[key] = link
+
+    def _move_to_newest(self, link):
+
+        """Move link to the newest end of the list."""
+
+        previous_link, next_link = link[PREVIOUS], link[NEXT]
+        previous_link[NEXT] = next_link
+        next_link[PREVIOUS] = previous_link
+        newest = self.root[PREVIOUS]
+        newest[NEXT] = self.root[PREVIOUS] = link
+        link[PREVIOUS] = newest
+        link[NEXT] = self.root
+
+    def clear(self):
+
+        """Remove all entries. Counts are kept."""
+
+        self.links.clear()
+        self.root[:] = [self.root, self.root, None, None]
+
+    def get_stats(self):
+
+        """Return counts of how the cache has been used.
+
+        @return: {"hits": int, "misses": int, "evictions": int, "size": int}
+        @rtype: dict of str: int
+        """
+
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.links)}
+
+    def __contains__(self, key):
+        return key in self.links
+
+    def __len__(self):
+        return len(self.links)
@@ -0,0 +1,397 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Read only steno dictionary kept on disk as a sorted string table.
+
+Holding the plover dict in a python dict costs tens of MB and most of start
+up time. A string table holds the same entries in a binary file which is
+memory mapped, so only the pages that lookups touch are read, and nothing is
+parsed up front.
+
+File layout (all integers little endian):
+
+    header          magic, format version, stamp of the json source,
+                    number of entries, most strokes in any chord
+    key index       offset of each record, ordered by key
+    records         key length, value length, key, value (utf-8)
+
+Lookups are binary searches over the key index, so O(log n). English to
+chords lookups are done by L{fly.utils.inverseindex}.
+"""
+
+import os
+import mmap
+import struct
+import logging
+logger = logging.getLogger(__name__)
+
+from fly.utils import dictionaryreader
+
+TABLE_EXTENSION = '.sst'
+
+MAGIC = 'FLYSST\r\n'
+# Bump if the layout of the table changes.
+TABLE_FORMAT_VERSION = 2
+
+HEADER = struct.Struct('<8sIdqII')
+INDEX_ENTRY = struct.Struct('<I')
+RECORD_HEADER = struct.Struct('<HH')
+
+MAX_FIELD_LENGTH = 0xffff
+
+# Separates the strokes of a multi stroke chord, as in plover's dicts.
+STROKE_DELIMITER = '/'
+
+
+class StringTableError(Exception):
+
+    """Raised when a file is not a string table Fly can read."""
+
+
+class StringTable(object):
+
+    """Steno to english dictionary backed by a memory mapped table file.
+
+    Behaves like a read only dict with unicode keys and values, and can be
+    passed anywhere the plover dict is expected. max_strokes is the number
+    of strokes in the longest chord, so the translator need not scan every
+    key to find it.
+    """
+
+    def __init__(self, table_filename):
+
+        """
+        @param table_filename: path to a table written by L{write_table}
+        @type table_filename: str
+
+        @raise StringTableError: if the file is not a valid table
+        """
+
+        self.table_filename = table_filename
+        with open(table_filename, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, EnvironmentError):
+                raise StringTableError("Can't map %s." % table_filename)
+
+        if len(self._map) < HEADER.size:
+            raise StringTableError("%s is too short to be a string table." %
+                                   table_filename)
+        (magic, version, mtime, size, self._length,
+         self.max_strokes) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != TABLE_FORMAT_VERSION:
+            raise StringTableError("%s is not a version %s string table." %
+                                   (table_filename, TABLE_FORMAT_VERSION))
+        self.source_stamp = (mtime, size)
+
+        self._key_index = HEADER.size
+        self._records_start = self._key_index + self._length * INDEX_ENTRY.size
+        if len(self._map) < self._records_start:
+            raise StringTableError("%s is truncated." % table_filename)
+
+    def close(self):
+
+        """Unmap the file. The table can't be used afterwards."""
+
+        self._map.close()
+
+    def _get_record_offset(self, index_start, position):
+        return INDEX_ENTRY.unpack_from(self._map,
+                                       index_start +
+                                       position * INDEX_ENTRY.size)[0]
+
+    def _read_record(self, record_offset):
+
+        """Return raw (key, value) bytes of the record at record_offset."""
+
+        key_length, value_length = RECORD_HEADER.unpack_from(self._map,
+                                                             record_offset)
+        key_start = record_offset + RECORD_HEADER.size
+        value_start = key_start + key_length
+        return (self._map[key_start:value_start],
+                self._map[value_start:value_start + value_length])
+
+    def _find_key(self, key):
+
+        """Return record offset of key (as utf-8 bytes), or None."""
+
+        table_map = self._map
+        low, high = 0, self._length
+        while low < high:
+            middle = (low + high) // 2
+            record_offset = self._get_record_offset(self._key_index, middle)
+            key_start = record_offset + RECORD_HEADER.size
+            key_length = RECORD_HEADER.unpack_from(table_map,
+                                                   record_offset)[0]
+            middle_key = table_map[key_start:key_start + key_length]
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                return record_offset
+        return None
+
+    def _find_first_key(self, key):
+
+        """Return position in the key index of the first record whose key
+        is not less than key (as utf-8 bytes), and that key."""
+
+        table_map = self._map
+        low, high = 0, self._length
+        while low < high:
+            middle = (low + high) // 2
+            record_offset = self._get_record_offset(self._key_index, middle)
+            key_start = record_offset + RECORD_HEADER.size
+            key_length = RECORD_HEADER.unpack_from(table_map,
+                                                   record_offset)[0]
+            if table_map[key_start:key_start + key_length] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._length:
+            return low, None
+        return low, self._read_record(
+                self._get_record_offset(self._key_index, low))[0]
+
+    def get(self, key, default=None):
+
+        """Return english for the chord key, or default if not present.
+
+        @param key: steno chord in RTF/CRE format
+        @type key: str or unicode
+
+        @rtype: unicode
+        """
+
+        try:
+            encoded_key = _encode(key)
+        except UnicodeError:
+            return default
+        record_offset = self._find_key(encoded_key)
+        if record_offset is None:
+            return default
+        return self._read_record(record_offset)[1].decode('utf-8')
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    has_key = __contains__
+
+    def has_prefix(self, prefix):
+
+        """Return whether any chord starts with prefix.
+
+        Chords are in order, so this is a single binary search. The
+        translator uses it to know whether strokes could still become part
+        of a longer chord.
+
+        @param prefix: start of a steno chord in RTF/CRE format
+        @type prefix: str or unicode
+
+        @rtype: bool
+        """
+
+        try:
+            encoded_prefix = _encode(prefix)
+        except UnicodeError:
+            return False
+        first_key = self._find_first_key(encoded_prefix)[1]
+        return first_key is not None and first_key.startswith(encoded_prefix)
+
+    def iteritems(self):
+
+        """Yield (chord, english) pairs in chord order."""
+
+        # Records are stored in key order, so read them straight through
+        # rather than going via the index.
+        table_map = self._map
+        unpack_from = RECORD_HEADER.unpack_from
+        record_offset = self._records_start
+        for position in xrange(self._length):
+            key_length, value_length = unpack_from(table_map, record_offset)
+            key_start = record_offset + RECORD_HEADER.size
+            value_start = key_start + key_length
+            record_offset = value_start + value_length
+            yield (table_map[key_start:value_start].decode('utf-8'),
+                   table_map[value_start:record_offset].decode('utf-8'))
+
+    def iterkeys(self):
+
+        """Yield chords in order."""
+
+        for key, value in self.iteritems():
+            yield key
+
+    def itervalues(self):
+
+        """Yield english translations in chord order."""
+
+        for key, value in self.iteritems():
+            yield value
+
+    __iter__ = iterkeys
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.table_filename)
+
+
+def _encode(text):
+
+    """Return text as utf-8 bytes, as stored in the table."""
+
+    if isinstance(text, unicode):
+        return text.encode('utf-8')
+    # Check plain strings are valid utf-8, as they are compared bytewise.
+    text.decode('utf-8')
+    return text
+
+
+def get_table_path(dictionary_filename):
+
+    """Return the path of the string table built from a json dict.
+
+    @param dictionary_filename: path to a json dict
+    @type dictionary_filename: str
+
+    @rtype: str
+    """
+
+    return dictionary_filename + TABLE_EXTENSION
+
+
+def write_table(table_filename, dictionary, source_stamp=(0.0, 0)):
+
+    """Write dictionary to a string table file, replacing any previous one.
+
+    @param table_filename: path of the table to write
+    @param dictionary: steno to english dictionary
+    @param source_stamp: stamp of the json the dictionary was read from,
+                         see L{fly.utils.dictionaryreader.get_source_stamp}
+
+    @type table_filename: str
+    @type dictionary: dict
+    @type source_stamp: tuple of (float, int)
+
+    @raise ValueError: if a chord or translation is too long to store
+    """
+
+    entries = []
+    max_strokes = 0
+    for key, value in dictionary.iteritems():
+        encoded_key = _encode(key)
+        encoded_value = _encode(value)
+        if len(encoded_key) > MAX_FIELD_LENGTH or \
+           len(encoded_value) > MAX_FIELD_LENGTH:
+            raise ValueError("Entry %r is too long for a string table." % key)
+        entries.append((encoded_key, encoded_value))
+        max_strokes = max(max_strokes,
+                          encoded_key.count(STROKE_DELIMITER) + 1)
+    entries.sort()
+
+    records_start = HEADER.size + len(entries) * INDEX_ENTRY.size
+    record_offsets = []
+    record_offset = records_start
+    for encoded_key, encoded_value in entries:
+        record_offsets.append(record_offset)
+        record_offset += (RECORD_HEADER.size + len(encoded_key) +
+                          len(encoded_value))
+
+    # Write to a temporary file first so a half written table is never read.
+    temp_filename = '%s.%s.tmp' % (table_filename, os.getpid())
+    try:
+        with open(temp_filename, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, TABLE_FORMAT_VERSION, source_stamp[0],
+                                source_stamp[1], len(entries), max_strokes))
+            f.write(''.join(INDEX_ENTRY.pack(offset)
+                            for offset in record_offsets))
+            for encoded_key, encoded_value in entries:
+                f.write(RECORD_HEADER.pack(len(encoded_key),
+                                           len(encoded_value)))
+                f.write(encoded_key)
+                f.write(encoded_value)
+        if os.name == 'nt' and os.path.exists(table_filename):
+            os.remove(table_filename)
+        os.rename(temp_filename, table_filename)
+
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+
+def convert_dict(dictionary_filename, table_filename=None):
+
+    """Build a string table from a json dict.
+
+    @param dictionary_filename: path to an existing json dict
+    @param table_filename: path of the table to write, beside the json dict
+                           if None
+
+    @type dictionary_filename: str
+    @type table_filename: str
+
+    @return: path of the table written
+    @rtype: str
+    """
+
+    if table_filename is None:
+        table_filename = get_table_path(dictionary_filename)
+    source_stamp = dictionaryreader.get_source_stamp(dictionary_filename)
+    dictionary = dictionaryreader.load_dict(dictionary_filename,
+                                            use_cache=False)
+    write_table(table_filename, dictionary, source_stamp)
+    return table_filename
+
+
+def load_table(dictionary_filename):
+
+    """Open the string table for a json dict, building it if needed.
+
+    The table lives beside the json dict and is rebuilt whenever the json
+    changes, in the same way as the binary cache of
+    L{fly.utils.dictionaryreader}.
+
+    @param dictionary_filename: path to an existing json dict
+    @type dictionary_filename: str
+
+    @raise EnvironmentError: if the table is out of date and can't be
+                             written
+
+    @rtype: L{StringTable}
+    """
+
+    table_filename = get_table_path(dictionary_filename)
+    source_stamp = dictionaryreader.get_source_stamp(dictionary_filename)
+
+    if os.path.exists(table_filename):
+        try:
+            table = StringTable(table_filename)
+            if table.source_stamp == source_stamp:
+                return table
+            table.close()
+            logger.info("String table %s is out of date." % table_filename)
+        except (StringTableError, EnvironmentError, struct.error):
+            logger.warning("Could not read string table %s." %
+                           table_filename)
+
+    logger.info("Building string table %s." % table_filename)
+    convert_dict(dictionary_filename, table_filename)
+    return StringTable(table_filename)
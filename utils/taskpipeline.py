@@ -0,0 +1,199 @@
+# Copyright (c) 2012 Pragma Nolint.
+# See LICENSE.txt for details.
+
+"""Run independent loading tasks on worker threads and report progress.
+
+Each task is a function that is given a callback to report how far through
+it is (as a fraction). It is started once the tasks it depends on have
+finished, and can fetch their results with L{TaskPipeline.get_result}.
+Tasks have a weight, such as the number of bytes they read, so that the
+overall progress reflects the work actually done.
+"""
+
+import sys
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+
+class TaskFailedError(Exception):
+
+    """Raised for a task that could not run because a dependency failed."""
+
+
+class Task(object):
+
+    """A unit of work in a L{TaskPipeline}."""
+
+    def __init__(self, name, function, weight, depends_on):
+
+        """
+        @param name: unique name of task
+        @param function: called with a progress callback
+        @param weight: amount of work in the task relative to others
+        @param depends_on: names of tasks that must finish first
+
+        @type name: str
+        @type function: function
+        @type weight: int
+        @type depends_on: tuple of str
+        """
+
+        self.name = name
+        self.function = function
+        self.weight = weight
+        self.depends_on = depends_on
+
+        self.progress = 0.0
+        self.result = None
+        self.exc_info = None
+        self.done = threading.Event()
+
+    def set_progress(self, fraction):
+
+        """Record how far through the task is.
+
+        @param fraction: between 0 and 1
+        @type fraction: float
+        """
+
+        self.progress = min(max(fraction, 0.0), 1.0)
+
+
+class TaskPipeline(object):
+
+    """Runs tasks concurrently, each as soon as its dependencies finish."""
+
+    def __init__(self):
+        self.tasks = {}
+        self.task_order = []
+
+    def add_task(self, name, function, weight=1, depends_on=()):
+
+        """Add task to be run when the pipeline starts.
+
+        @param name: unique name of task
+        @param function: called as function(report_progress), and returns
+                         the result of the task
+        @param weight: amount of work in the task relative to others, e.g.
+                       the size in bytes of the file it reads
+        @param depends_on: names of tasks (already added) that must finish
+                           before this one starts
+
+        @type name: str
+        @type function: function
+        @type weight: int
+        @type depends_on: sequence of str
+        """
+
+        if name in self.tasks:
+            raise ValueError("Task %s has already been added." % name)
+        for dependency in depends_on:
+            if dependency not in self.tasks:
+                raise ValueError("Task %s depends on unknown task %s." %
+                                 (name, dependency))
+        self.tasks[name] = Task(name, function, weight, tuple(depends_on))
+        self.task_order.append(name)
+
+    def start(self):
+
+        """Start every task on its own worker thread."""
+
+        for name in self.task_order:
+            thread = threading.Thread(target=self.__run_task,
+                                      args=(self.tasks[name],),
+                                      name="load %s" % name)
+            # Don't keep the game running if it is closed while loading.
+            thread.daemon = True
+            thread.start()
+
+    def __run_task(self, task):
+
+        """Wait for dependencies, then run task, recording its outcome."""
+
+        try:
+            for dependency_name in task.depends_on:
+                dependency = self.tasks[dependency_name]
+                dependency.done.wait()
+                if dependency.exc_info is not None:
+                    raise TaskFailedError("Task %s failed." % dependency_name)
+
+            task.result = task.function(task.set_progress)
+
+        except Exception:
+            task.exc_info = sys.exc_info()
+            logger.exception("Loading %s failed." % task.name)
+
+        finally:
+            task.progress = 1.0
+            task.done.set()
+
+    def is_done(self, name):
+
+        """Return True if the named task has finished (or failed).
+
+        @param name: name of task
+        @type name: str
+
+        @rtype: bool
+        """
+
+        return self.tasks[name].done.is_set()
+
+    def all_done(self):
+
+        """Return True if every task has finished.
+
+        @rtype: bool
+        """
+
+        return all(self.is_done(name) for name in self.task_order)
+
+    def get_result(self, name, timeout=None):
+
+        """Return result of the named task, waiting for it if necessary.
+
+        If the task raised an exception, it is raised again here, so that
+        failures surface on the thread that uses the result.
+
+        @param name: name of task
+        @param timeout: seconds to wait, or None to wait until done
+
+        @type name: str
+        @type timeout: float
+
+        @raise RuntimeError: if the task is still running after timeout
+        """
+
+        task = self.tasks[name]
+        task.done.wait(timeout)
+        if not task.done.is_set():
+            raise RuntimeError("Task %s has not finished." % name)
+        if task.exc_info is not None:
+            exc_type, exc_value, traceback = task.exc_info
+            raise exc_type, exc_value, traceback
+        return task.result
+
+    def get_progress(self, names=None):
+
+        """Return overall progress of the tasks, weighted by their weights.
+
+        @param names: tasks to include, or None for all of them
+        @type names: sequence of str
+
+        @return: fraction between 0 and 1. Only 1 when all tasks are done.
+        @rtype: float
+        """
+
+        if names is None:
+            names = self.task_order
+        tasks = [self.tasks[name] for name in names]
+        if all(task.done.is_set() for task in tasks):
+            return 1.0
+
+        total_weight = sum(task.weight for task in tasks)
+        if not total_weight:
+            return 0.0
+        done_weight = sum(task.weight * task.progress for task in tasks)
+        # Don't claim to be finished while light tasks are still running.
+        return min(done_weight / float(total_weight), 0.99)